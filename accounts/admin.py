@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Account, AccountSolvedProblems
+from .models import Account, AccountSolvedProblems, AccountStats
 
 # Register your models here.
 admin.site.register(Account)
-admin.site.register(AccountSolvedProblems)
\ No newline at end of file
+admin.site.register(AccountSolvedProblems)
+admin.site.register(AccountStats)
@@ -0,0 +1,24 @@
+import time
+from django.db import transaction
+from django.core.management.base import BaseCommand
+from accounts.models import Account
+from accounts.stats import rebuild_account_activity, rebuild_account_stats
+
+class Command(BaseCommand):
+    help = "Recount the daily activity, streaks and solve counters of accounts from their submissions and solved problems"
+
+    def add_arguments(self, parser):
+        parser.add_argument("emails", nargs="*", help="Only rebuild these accounts (all accounts by default)")
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+
+        account_ids = None
+        if options.get("emails"):
+            account_ids = list(Account.objects.filter(email__in=options.get("emails")).values_list("pk", flat=True))
+
+        with transaction.atomic():
+            days = rebuild_account_activity(account_ids)
+            count = rebuild_account_stats(account_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the stats of {count} account(s) ({days} active days) in {time.monotonic() - start:.2f}s"))
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:15
+
+from django.db import migrations
+from django.db.models import Min
+
+
+def remove_duplicate_solves(apps, schema_editor):
+    AccountSolvedProblems = apps.get_model("accounts", "AccountSolvedProblems")
+
+    # keep the first row of every (account, problem) pair
+    keep = AccountSolvedProblems.objects.values("account", "problem").annotate(first=Min("pk")).values_list("first", flat=True)
+    AccountSolvedProblems.objects.exclude(pk__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_alter_account_profile_picture'),
+    ]
+
+    # separate from the constraint, postgres refuses to alter a table with pending deferred checks
+    operations = [
+        migrations.RunPython(remove_duplicate_solves, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_remove_duplicate_solved_problems'),
+        ('problems', '0012_tune_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='accountsolvedproblems',
+            constraint=models.UniqueConstraint(fields=('account', 'problem'), name='unique_solved_problem_per_account'),
+        ),
+        migrations.AlterField(
+            model_name='accountsolvedproblems',
+            name='account',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, to_field='public_id'),
+        ),
+    ]
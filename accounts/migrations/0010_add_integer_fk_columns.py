@@ -0,0 +1,26 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Integer key columns for AccountSolvedProblems, see problems.0013_add_integer_fk_columns.
+    """
+
+    dependencies = [
+        ('accounts', '0009_unique_solved_problems'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountsolvedproblems',
+            name='account_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='accountsolvedproblems',
+            name='problem_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:02
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+# (model, foreign key, referenced model)
+RELATIONS = [
+    ('accountsolvedproblems', 'account', settings.AUTH_USER_MODEL),
+    ('accountsolvedproblems', 'problem', 'problems.problem'),
+]
+
+
+def copy_integer_keys(apps, schema_editor):
+    # one UPDATE per relation, resolving the referenced public_id to its primary key
+    for model_name, field, target in RELATIONS:
+        model = apps.get_model('accounts', model_name)
+        target_model = apps.get_model(target)
+        target_pk = target_model.objects.filter(public_id=OuterRef(f"{field}_id")).values("pk")[:1]
+        model.objects.update(**{f"{field}_pk": Subquery(target_pk)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_add_integer_fk_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_integer_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_backfill_integer_fks'),
+        ('problems', '0015_switch_to_integer_fks'),
+    ]
+
+    operations = [
+        # indexes and constraints over the old columns are rebuilt at the end
+        migrations.RemoveConstraint(
+            model_name='accountsolvedproblems',
+            name='unique_solved_problem_per_account',
+        ),
+        # drop the uuid columns, then turn the integer columns into the foreign keys
+        migrations.RemoveField(
+            model_name='accountsolvedproblems',
+            name='account',
+        ),
+        migrations.RemoveField(
+            model_name='accountsolvedproblems',
+            name='problem',
+        ),
+        migrations.RenameField(
+            model_name='accountsolvedproblems',
+            old_name='account_pk',
+            new_name='account',
+        ),
+        migrations.RenameField(
+            model_name='accountsolvedproblems',
+            old_name='problem_pk',
+            new_name='problem',
+        ),
+        migrations.AlterField(
+            model_name='accountsolvedproblems',
+            name='account',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='accountsolvedproblems',
+            name='problem',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='problems.problem'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountsolvedproblems',
+            constraint=models.UniqueConstraint(fields=('account', 'problem'), name='unique_solved_problem_per_account'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_solved_problems(apps, schema_editor):
+    Account = apps.get_model("accounts", "Account")
+    AccountStats = apps.get_model("accounts", "AccountStats")
+    AccountSolvedProblems = apps.get_model("accounts", "AccountSolvedProblems")
+
+    # difficulty values of problems.DifficultyChoices
+    fields = {0: "solved_school_count", 1: "solved_easy_count", 2: "solved_medium_count", 3: "solved_hard_count"}
+    aggregates = {"solved_count": Count("pk")}
+    for difficulty, field in fields.items():
+        aggregates[field] = Count("pk", filter=Q(problem__difficulty=difficulty))
+
+    counts = {row.pop("account"): row for row in AccountSolvedProblems.objects.values("account").annotate(**aggregates)}
+    AccountStats.objects.bulk_create(
+        [AccountStats(account_id=pk, **counts.get(pk, {})) for pk in Account.objects.values_list("pk", flat=True)],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_switch_to_integer_fks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountStats',
+            fields=[
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('solved_count', models.IntegerField(default=0)),
+                ('solved_school_count', models.IntegerField(default=0)),
+                ('solved_easy_count', models.IntegerField(default=0)),
+                ('solved_medium_count', models.IntegerField(default=0)),
+                ('solved_hard_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_solved_problems, migrations.RunPython.noop),
+    ]
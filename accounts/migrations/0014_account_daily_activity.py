@@ -0,0 +1,74 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:23
+
+import django.db.models.deletion
+from django.conf import settings
+from datetime import timedelta, timezone
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def count_daily_activity(apps, schema_editor):
+    Account = apps.get_model("accounts", "Account")
+    AccountStats = apps.get_model("accounts", "AccountStats")
+    AccountDailyActivity = apps.get_model("accounts", "AccountDailyActivity")
+    Submission = apps.get_model("problems", "Submission")
+
+    # status 1 is problems.SubmissionStatus.ACCEPTED
+    rows = Submission.objects.filter(account__isnull=False) \
+        .annotate(day=TruncDate("date", tzinfo=timezone.utc)) \
+        .values("account", "day") \
+        .annotate(submissions_count=Count("pk"), accepted_count=Count("pk", filter=Q(status=1))) \
+        .order_by("account", "day")
+
+    days = []
+    streaks = {}
+    for row in rows.iterator():
+        account_id, day = row["account"], row["day"]
+        days.append(AccountDailyActivity(account_id=account_id, date=day, submissions_count=row["submissions_count"], accepted_count=row["accepted_count"]))
+
+        # (current streak, last active day, longest streak)
+        current, last, longest = streaks.get(account_id, (0, None, 0))
+        current = current + 1 if last is not None and day - last == timedelta(days=1) else 1
+        streaks[account_id] = (current, day, max(longest, current))
+
+    AccountDailyActivity.objects.bulk_create(days, batch_size=1000)
+    for account_id, (current, last, longest) in streaks.items():
+        AccountStats.objects.filter(account_id=account_id).update(current_streak=current, last_active_date=last)
+        Account.objects.filter(pk=account_id, max_streak__lt=longest).update(max_streak=longest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_account_stats'),
+        ('problems', '0015_switch_to_integer_fks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountstats',
+            name='current_streak',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='accountstats',
+            name='last_active_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AccountDailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('submissions_count', models.IntegerField(default=0)),
+                ('accepted_count', models.IntegerField(default=0)),
+                ('account', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='activity', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='accountdailyactivity',
+            constraint=models.UniqueConstraint(fields=('account', 'date'), name='unique_activity_per_account_day'),
+        ),
+        migrations.RunPython(count_daily_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:25
+
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_breakdown(apps, schema_editor):
+    AccountStats = apps.get_model("accounts", "AccountStats")
+    AccountSolvedProblems = apps.get_model("accounts", "AccountSolvedProblems")
+    Submission = apps.get_model("problems", "Submission")
+
+    breakdown = defaultdict(lambda: {"solved_tag_counts": {}, "accepted_language_counts": {}})
+    tags = AccountSolvedProblems.objects.filter(problem__tags__isnull=False) \
+        .values_list("account", "problem__tags__public_id").annotate(count=Count("pk")).order_by()
+    for account_id, public_id, count in tags.iterator():
+        breakdown[account_id]["solved_tag_counts"][str(public_id)] = count
+
+    # status 1 is problems.SubmissionStatus.ACCEPTED
+    languages = Submission.objects.filter(account__isnull=False, status=1) \
+        .values_list("account", "language__public_id").annotate(count=Count("pk")).order_by()
+    for account_id, public_id, count in languages.iterator():
+        breakdown[account_id]["accepted_language_counts"][str(public_id)] = count
+
+    for account_id, fields in breakdown.items():
+        AccountStats.objects.filter(account_id=account_id).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_account_daily_activity'),
+        ('problems', '0015_switch_to_integer_fks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountstats',
+            name='accepted_language_counts',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='accountstats',
+            name='solved_tag_counts',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(count_breakdown, migrations.RunPython.noop),
+    ]
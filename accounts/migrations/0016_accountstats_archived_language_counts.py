@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_account_solved_breakdown'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountstats',
+            name='archived_language_counts',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -49,8 +49,15 @@ class AccountManager(BaseUserManager):
 
 class AccountSolvedProblems(models.Model):
     public_id = models.UUIDField(default=generate_uuid, unique=True)
-    problem = models.ForeignKey('problems.Problem', to_field="public_id", on_delete=models.CASCADE)
-    account = models.ForeignKey('Account', to_field="public_id", on_delete=models.CASCADE)
+    problem = models.ForeignKey('problems.Problem', on_delete=models.CASCADE)
+
+    # indexed by the (account, problem) unique constraint
+    account = models.ForeignKey('Account', on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["account", "problem"], name="unique_solved_problem_per_account")
+        ]
 
 class Account(AbstractBaseUser, PermissionsMixin):
 
@@ -80,4 +87,43 @@ class Account(AbstractBaseUser, PermissionsMixin):
     objects = AccountManager()
 
     def get_full_name(self):
-        return self.first_name + " " + self.last_name
\ No newline at end of file
+        return self.first_name + " " + self.last_name
+
+class AccountStats(models.Model):
+    """
+    Denormalized solve counters and streak of an account, kept in step with its
+    AccountSolvedProblems rows and submissions (see accounts/stats.py).
+    """
+    account = models.OneToOneField('Account', on_delete=models.CASCADE, primary_key=True, related_name="stats")
+
+    solved_count = models.IntegerField(default=0)
+    solved_school_count = models.IntegerField(default=0)
+    solved_easy_count = models.IntegerField(default=0)
+    solved_medium_count = models.IntegerField(default=0)
+    solved_hard_count = models.IntegerField(default=0)
+
+    # {tag public id: solved problems}, {language public id: accepted submissions}
+    solved_tag_counts = models.JSONField(default=dict)
+    accepted_language_counts = models.JSONField(default=dict)
+    # share of accepted_language_counts whose submissions were archived
+    archived_language_counts = models.JSONField(default=dict)
+
+    # consecutive active days ending at last_active_date, the longest run is Account.max_streak
+    current_streak = models.IntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
+
+class AccountDailyActivity(models.Model):
+    """
+    Submissions of an account per (UTC) day, the source of the profile heatmap.
+    """
+    # indexed by the (account, date) unique constraint
+    account = models.ForeignKey('Account', on_delete=models.CASCADE, db_index=False, related_name="activity")
+    date = models.DateField()
+
+    submissions_count = models.IntegerField(default=0)
+    accepted_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["account", "date"], name="unique_activity_per_account_day")
+        ]
\ No newline at end of file
@@ -0,0 +1,62 @@
+from django.dispatch import receiver
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+
+from problems.models import Problem, ProblemTag, Submission, SubmissionStatus
+from .models import Account, AccountStats, AccountSolvedProblems
+from .stats import add_solved, add_accepted, change_difficulty, refresh_solved_tags, record_activity, get_activity_date
+
+@receiver(post_save, sender=Account)
+def account_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AccountStats.objects.get_or_create(account=instance)
+
+@receiver(post_save, sender=AccountSolvedProblems)
+def solved_problem_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        add_solved(instance.account_id, instance.problem_id, instance.problem.difficulty)
+
+@receiver(post_delete, sender=AccountSolvedProblems)
+def solved_problem_deleted(sender, instance, **kwargs):
+    difficulty = Problem.objects.filter(pk=instance.problem_id).values_list("difficulty", flat=True).first()
+    if difficulty is not None:
+        add_solved(instance.account_id, instance.problem_id, difficulty, delta=-1)
+
+@receiver(pre_save, sender=Problem)
+def problem_difficulty_changed(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+
+    old = Problem.objects.filter(pk=instance.pk).values_list("difficulty", flat=True).first()
+    if old is not None:
+        change_difficulty(instance.pk, old, instance.difficulty)
+
+@receiver(post_save, sender=Submission)
+def submission_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.account_id:
+        accepted = instance.status == SubmissionStatus.ACCEPTED
+        record_activity(instance.account_id, get_activity_date(instance.date), accepted)
+        if accepted:
+            add_accepted(instance.account_id, instance.language.public_id)
+
+@receiver(post_save, sender=ProblemTag)
+@receiver(post_delete, sender=ProblemTag)
+def problem_tag_changed(sender, instance, **kwargs):
+    if instance.problem_id:
+        refresh_solved_tags([instance.problem_id])
+
+@receiver(m2m_changed, sender=Problem.tags.through)
+def problem_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # remember the affected problems, the relation is gone once it is cleared
+        instance._cleared_solved_problem_ids = list(Problem.objects.filter(tags=instance).values_list("pk", flat=True))
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        refresh_solved_tags([instance.pk])
+    elif action == "post_clear":
+        refresh_solved_tags(getattr(instance, "_cleared_solved_problem_ids", []))
+    else:
+        refresh_solved_tags(pk_set)
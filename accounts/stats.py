@@ -0,0 +1,343 @@
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from django.db import transaction, IntegrityError
+from django.db.models import Count, Q, F, Case, When, Value
+from django.db.models.functions import TruncDate
+
+from problems.models import DifficultyChoices, Submission, SubmissionStatus, ProblemTag
+from problems.cache import get_tag_list
+from problems.languages import LANGUAGES
+from .models import Account, AccountStats, AccountSolvedProblems, AccountDailyActivity
+
+BATCH_SIZE = 1000
+
+# the heatmap shows one column per week, most recent week first
+HEATMAP_WEEKS = 24
+
+# per difficulty solve counter of AccountStats
+DIFFICULTY_FIELDS = {
+    DifficultyChoices.SCHOOL: "solved_school_count",
+    DifficultyChoices.EASY: "solved_easy_count",
+    DifficultyChoices.MEDIUM: "solved_medium_count",
+    DifficultyChoices.HARD: "solved_hard_count"
+}
+
+COUNTER_FIELDS = ["solved_count", *DIFFICULTY_FIELDS.values()]
+STREAK_FIELDS = ["current_streak", "last_active_date"]
+BREAKDOWN_FIELDS = ["solved_tag_counts", "accepted_language_counts"]
+
+def get_activity_date(value=None):
+    """
+    Returns the UTC day of a submission date (of now when None), the unit of
+    the daily activity and streaks.
+    """
+    value = value or timezone.now()
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value.astimezone(dt_timezone.utc).date()
+
+def get_streaks(dates):
+    """
+    Walk ascending, distinct active days.
+
+    Returns:
+        tuple: the streak ending at the last day, the last day and the longest streak
+    """
+    current, longest, last = 0, 0, None
+    for date in dates:
+        current = current + 1 if last is not None and date - last == timedelta(days=1) else 1
+        longest = max(longest, current)
+        last = date
+    return current, last, longest
+
+def count_by(queryset, field):
+    """
+    Count the rows of ``queryset`` per account and value of ``field`` with one
+    grouped query.
+
+    Returns:
+        dict: ``{account id: {str(value): count}}``
+    """
+    counts = defaultdict(dict)
+    rows = queryset.filter(**{f"{field}__isnull": False}).values("account", field).annotate(count=Count("pk")).order_by()
+    for row in rows.iterator():
+        counts[row["account"]][str(row[field])] = row["count"]
+    return counts
+
+def add_counts(counts, keys, delta):
+    for key in map(str, keys):
+        value = counts.get(key, 0) + delta
+        if value > 0:
+            counts[key] = value
+        else:
+            counts.pop(key, None)
+
+def rebuild_account_stats(account_ids=None):
+    """
+    Recount the solve counters and the tag breakdown from the AccountSolvedProblems
+    rows and the language breakdown from the accepted submissions plus the
+    archived ones (one grouped query each), recompute the streaks from the daily activity and write it all
+    back, creating missing AccountStats rows. Max streaks are only raised.
+
+    Args:
+        account_ids (List[int]): primary keys of the accounts to rebuild, every account when None
+
+    Returns:
+        int: number of rebuilt accounts
+    """
+    solved = AccountSolvedProblems.objects.all()
+    accepted = Submission.objects.filter(status=SubmissionStatus.ACCEPTED)
+    activity = AccountDailyActivity.objects.all()
+    if account_ids is None:
+        account_ids = Account.objects.values_list("pk", flat=True)
+    else:
+        solved = solved.filter(account__in=account_ids)
+        accepted = accepted.filter(account__in=account_ids)
+        activity = activity.filter(account__in=account_ids)
+
+    aggregates = {"solved_count": Count("pk")}
+    for difficulty, field in DIFFICULTY_FIELDS.items():
+        aggregates[field] = Count("pk", filter=Q(problem__difficulty=difficulty))
+
+    counts = {row.pop("account"): row for row in solved.values("account").annotate(**aggregates)}
+    tag_counts = count_by(solved, "problem__tags__public_id")
+    language_counts = count_by(accepted, "language__public_id")
+    archived_counts = dict(AccountStats.objects.filter(account__in=account_ids).values_list("account", "archived_language_counts"))
+
+    dates = defaultdict(list)
+    for account_id, date in activity.order_by("account", "date").values_list("account", "date").iterator():
+        dates[account_id].append(date)
+
+    stats = []
+    longest_streaks = defaultdict(list)
+    for pk in account_ids:
+        current, last, longest = get_streaks(dates.get(pk, []))
+
+        languages = language_counts.get(pk, {})
+        for public_id, count in archived_counts.get(pk, {}).items():
+            add_counts(languages, [public_id], count)
+
+        stats.append(AccountStats(
+            account_id=pk,
+            current_streak=current,
+            last_active_date=last,
+            solved_tag_counts=tag_counts.get(pk, {}),
+            accepted_language_counts=languages,
+            **counts.get(pk, {})
+        ))
+        if longest:
+            longest_streaks[longest].append(pk)
+
+    AccountStats.objects.bulk_create(
+        stats,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["account"],
+        update_fields=COUNTER_FIELDS + STREAK_FIELDS + BREAKDOWN_FIELDS
+    )
+    for longest, pks in longest_streaks.items():
+        Account.objects.filter(pk__in=pks, max_streak__lt=longest).update(max_streak=longest)
+
+    return len(stats)
+
+def rebuild_account_activity(account_ids=None):
+    """
+    Recount the daily activity from the submissions with one grouped query.
+    Days without any submission left are kept as they are, their submissions
+    may have been archived.
+
+    Args:
+        account_ids (List[int]): primary keys of the accounts to rebuild, every account when None
+
+    Returns:
+        int: number of written days
+    """
+    submissions = Submission.objects.filter(account__isnull=False)
+    if account_ids is not None:
+        submissions = submissions.filter(account__in=account_ids)
+
+    rows = submissions.annotate(day=TruncDate("date", tzinfo=dt_timezone.utc)) \
+        .values("account", "day") \
+        .annotate(submissions_count=Count("pk"), accepted_count=Count("pk", filter=Q(status=SubmissionStatus.ACCEPTED))) \
+        .order_by()
+
+    days = [
+        AccountDailyActivity(
+            account_id=row["account"],
+            date=row["day"],
+            submissions_count=row["submissions_count"],
+            accepted_count=row["accepted_count"]
+        )
+        for row in rows.iterator()
+    ]
+    AccountDailyActivity.objects.bulk_create(
+        days,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["account", "date"],
+        update_fields=["submissions_count", "accepted_count"]
+    )
+    return len(days)
+
+def add_solved(account_id, problem_id, difficulty, delta=1):
+    """
+    Count a problem of ``difficulty`` (and its tags) as solved, or unsolved with a
+    negative ``delta``, by the account. The stats row is locked, so concurrent
+    solves of the same account apply one after the other.
+    """
+    with transaction.atomic():
+        stats = AccountStats.objects.select_for_update().filter(account_id=account_id).first()
+
+        # accounts without stats get them counted from scratch, which already
+        # includes this change (deletes are skipped, the account may be going away)
+        if stats is None:
+            if delta > 0:
+                rebuild_account_stats([account_id])
+            return
+
+        field = DIFFICULTY_FIELDS[difficulty]
+        stats.solved_count += delta
+        setattr(stats, field, getattr(stats, field) + delta)
+        add_counts(stats.solved_tag_counts, ProblemTag.objects.filter(problem=problem_id).values_list("tag__public_id", flat=True), delta)
+        stats.save(update_fields=["solved_count", field, "solved_tag_counts"])
+
+def add_accepted(account_id, language_public_id):
+    """
+    Count an accepted submission in the language breakdown of the account.
+    """
+    with transaction.atomic():
+        stats = AccountStats.objects.select_for_update().filter(account_id=account_id).first()
+        if stats is None:
+            rebuild_account_stats([account_id])
+            return
+
+        add_counts(stats.accepted_language_counts, [language_public_id], 1)
+        stats.save(update_fields=["accepted_language_counts"])
+
+def refresh_solved_tags(problem_ids):
+    """
+    Recount the tag breakdown of every account that solved one of the problems,
+    after their tags changed.
+    """
+    solvers = AccountSolvedProblems.objects.filter(problem__in=problem_ids).values("account")
+    with transaction.atomic():
+        stats = list(AccountStats.objects.select_for_update().filter(account__in=solvers))
+        if not stats:
+            return
+
+        counts = count_by(AccountSolvedProblems.objects.filter(account__in=[entry.pk for entry in stats]), "problem__tags__public_id")
+        for entry in stats:
+            entry.solved_tag_counts = counts.get(entry.pk, {})
+        AccountStats.objects.bulk_update(stats, ["solved_tag_counts"], batch_size=BATCH_SIZE)
+
+def change_difficulty(problem_id, old, new):
+    """
+    Move the solves of a problem between difficulty counters once its
+    difficulty changes.
+    """
+    if old == new:
+        return
+
+    old_field, new_field = DIFFICULTY_FIELDS[old], DIFFICULTY_FIELDS[new]
+    AccountStats.objects.filter(account__accountsolvedproblems__problem=problem_id).update(**{
+        old_field: F(old_field) - 1,
+        new_field: F(new_field) + 1
+    })
+
+def record_activity(account_id, date, accepted=False):
+    """
+    Count a submission in the activity of its day, the first submission of a
+    day also extends (or restarts) the streak of the account.
+    """
+    counts = {
+        "submissions_count": F("submissions_count") + 1,
+        "accepted_count": F("accepted_count") + (1 if accepted else 0)
+    }
+    if AccountDailyActivity.objects.filter(account_id=account_id, date=date).update(**counts):
+        return
+
+    try:
+        with transaction.atomic():
+            AccountDailyActivity.objects.create(account_id=account_id, date=date, submissions_count=1, accepted_count=1 if accepted else 0)
+    except IntegrityError:
+        # a concurrent submission created the day (and extends the streak)
+        AccountDailyActivity.objects.filter(account_id=account_id, date=date).update(**counts)
+        return
+
+    extend_streak(account_id, date)
+
+def extend_streak(account_id, date):
+    # only move forward, days older than the last active one cannot change the current streak
+    updated = AccountStats.objects.filter(account_id=account_id) \
+        .filter(Q(last_active_date__lt=date) | Q(last_active_date__isnull=True)) \
+        .update(
+            current_streak=Case(When(last_active_date=date - timedelta(days=1), then=F("current_streak") + 1), default=Value(1)),
+            last_active_date=date
+        )
+
+    if updated:
+        streak = AccountStats.objects.filter(account_id=account_id).values_list("current_streak", flat=True).first()
+        Account.objects.filter(pk=account_id, max_streak__lt=streak).update(max_streak=streak)
+    elif not AccountStats.objects.filter(account_id=account_id).exists():
+        rebuild_account_stats([account_id])
+
+def get_current_streak(stats, today=None):
+    """
+    Returns the streak of the account, which is over once a full day passed
+    without a submission.
+    """
+    today = today or get_activity_date()
+    if stats.last_active_date is None or stats.last_active_date < today - timedelta(days=1):
+        return 0
+    return stats.current_streak
+
+def get_heatmap(account, today=None):
+    """
+    Returns the submissions of the last ``HEATMAP_WEEKS`` weeks as a weekday x
+    week grid, read from at most one activity row per day.
+    """
+    today = today or get_activity_date()
+    start = today - timedelta(days=HEATMAP_WEEKS * 7 - 1)
+
+    heatmap = [[0 for _ in range(HEATMAP_WEEKS)] for _ in range(7)]
+    days = AccountDailyActivity.objects.filter(account=account, date__gte=start, date__lte=today).values_list("date", "submissions_count")
+    for date, count in days:
+        heatmap[date.weekday()][(today - date).days // 7] += count
+    return heatmap
+
+def get_solved_breakdown(stats):
+    """
+    Returns the solved problems of an account by difficulty, tag and language
+    name, resolving the stored public ids against the cached tag list and the
+    language registry.
+    """
+    names = {str(tag["public_id"]): tag["name"] for tag in get_tag_list()}
+
+    count_by_tags = defaultdict(int)
+    for public_id, count in stats.solved_tag_counts.items():
+        if public_id in names:
+            count_by_tags[names[public_id]] += count
+
+    count_by_language = defaultdict(int)
+    for public_id, count in stats.accepted_language_counts.items():
+        language = LANGUAGES.get(public_id)
+        if language:
+            count_by_language[language.name] += count
+
+    return {
+        "total": stats.solved_count,
+        "count_by_difficulty": {
+            difficulty.label.lower(): getattr(stats, field) for difficulty, field in DIFFICULTY_FIELDS.items()
+        },
+        "count_by_language": dict(sorted(count_by_language.items(), key=lambda item: -item[1])),
+        "count_by_tags": dict(sorted(count_by_tags.items(), key=lambda item: -item[1]))
+    }
+
+def get_account_stats(account):
+    stats = AccountStats.objects.filter(account=account).first()
+    if stats is None:
+        rebuild_account_stats([account.pk])
+        stats = AccountStats.objects.get(account=account)
+    return stats
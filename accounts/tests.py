@@ -1,3 +1,224 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from problems.models import Problem, Language, Submission, SubmissionStatus, Tag, ProblemTag
+from problems.cache import bump_version, invalidate_namespace, LIST_VERSION_KEY
+from problems.languages import LANGUAGES
+from .models import Account, AccountStats, AccountSolvedProblems, AccountDailyActivity
+from .stats import COUNTER_FIELDS, HEATMAP_WEEKS, rebuild_account_stats, rebuild_account_activity, get_activity_date, get_current_streak, get_heatmap, get_solved_breakdown
+
+def get_counters(account):
+    return AccountStats.objects.filter(account=account).values(*COUNTER_FIELDS).get()
+
+class AccountStatsTests(TestCase):
+    """
+    Keeps the solve counters of AccountStats in step with the solved problems.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="Name")
+        cls.problems = [
+            Problem.objects.create(name=name, difficulty=difficulty, description="", constraints="")
+            for name, difficulty in [("Two Sum", 1), ("Valid Parentheses", 1), ("Group Anagrams", 2), ("Trapping Rain Water", 3)]
+        ]
+
+    def solve(self, *problems):
+        for problem in problems:
+            AccountSolvedProblems.objects.create(account=self.account, problem=problem)
+
+    def test_solves_are_counted(self):
+        self.solve(*self.problems[:3])
+        counters = {"solved_count": 3, "solved_school_count": 0, "solved_easy_count": 2, "solved_medium_count": 1, "solved_hard_count": 0}
+        self.assertEqual(get_counters(self.account), counters)
+
+        AccountSolvedProblems.objects.filter(problem=self.problems[0]).delete()
+        counters.update(solved_count=2, solved_easy_count=1)
+        self.assertEqual(get_counters(self.account), counters)
+
+        # a recount from the solved problems agrees
+        rebuild_account_stats([self.account.pk])
+        self.assertEqual(get_counters(self.account), counters)
+
+    def test_difficulty_change_moves_solves(self):
+        self.solve(self.problems[0])
+
+        problem = Problem.objects.get(pk=self.problems[0].pk)
+        problem.difficulty = 3
+        problem.save()
+
+        counters = get_counters(self.account)
+        self.assertEqual((counters["solved_easy_count"], counters["solved_hard_count"]), (0, 1))
+
+    def test_missing_stats_are_rebuilt(self):
+        self.solve(*self.problems)
+        AccountStats.objects.filter(account=self.account).delete()
+
+        self.solve(Problem.objects.create(name="Climbing Stairs", difficulty=0, description="", constraints=""))
+        self.assertEqual(get_counters(self.account)["solved_count"], 5)
+
+    def test_stats_endpoint(self):
+        self.solve(self.problems[0], self.problems[3])
+        # the catalog totals are cached per problem list version
+        bump_version(LIST_VERSION_KEY)
+
+        client = APIClient()
+        client.force_authenticate(self.account)
+        with self.assertNumQueries(2):
+            response = client.get("/api/v1/account/stats/")
+
+        self.assertEqual(response.json(), {
+            "solved": {"all": 2, "school": 0, "easy": 1, "medium": 0, "hard": 1},
+            "total": {"all": 4, "school": 0, "easy": 2, "medium": 1, "hard": 1}
+        })
+
+class AccountActivityTests(TestCase):
+    """
+    Rolls submissions up into daily activity and streaks.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name="python", judge_id=71)
+        cls.account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="Name")
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="")
+        cls.today = get_activity_date()
+
+    def submit(self, days_ago, status=SubmissionStatus.ACCEPTED):
+        date = datetime.combine(self.today - timedelta(days=days_ago), time(12), tzinfo=dt_timezone.utc)
+        Submission.objects.create(
+            problem=self.problem, account=self.account, status=status, code="", language=self.language,
+            time="0.01", memory=1024, date=date, time_percent=50, memory_percent=50
+        )
+
+    def get_activity(self):
+        return {
+            (self.today - date).days: (submissions, accepted)
+            for date, submissions, accepted in AccountDailyActivity.objects.filter(account=self.account).values_list("date", "submissions_count", "accepted_count")
+        }
+
+    def get_streak(self):
+        stats = AccountStats.objects.get(account=self.account)
+        return stats.current_streak, Account.objects.get(pk=self.account.pk).max_streak
+
+    def test_submissions_are_rolled_up_per_day(self):
+        self.submit(1)
+        self.submit(1, SubmissionStatus.REJECTED)
+        self.submit(0, SubmissionStatus.REJECTED)
+        self.assertEqual(self.get_activity(), {1: (2, 1), 0: (1, 0)})
+
+    def test_streaks(self):
+        for days_ago in [9, 8, 7, 3, 2]:
+            self.submit(days_ago)
+        self.assertEqual(self.get_streak(), (2, 3))
+
+        # a late submission of an older day does not touch the streak
+        self.submit(5)
+        self.assertEqual(self.get_streak(), (2, 3))
+
+        stats = AccountStats.objects.get(account=self.account)
+        self.assertEqual(get_current_streak(stats, self.today), 0)
+        self.assertEqual(get_current_streak(stats, self.today - timedelta(days=1)), 2)
+        self.assertEqual(get_current_streak(stats, self.today - timedelta(days=2)), 2)
+
+    def test_rebuild_matches_the_rollup(self):
+        for days_ago in [4, 3, 3, 1, 0]:
+            self.submit(days_ago)
+        activity, streak = self.get_activity(), self.get_streak()
+
+        AccountDailyActivity.objects.all().delete()
+        AccountStats.objects.all().delete()
+        Account.objects.update(max_streak=0)
+
+        self.assertEqual(rebuild_account_activity([self.account.pk]), 4)
+        rebuild_account_stats([self.account.pk])
+        self.assertEqual(self.get_activity(), activity)
+        self.assertEqual(self.get_streak(), streak)
+
+    def test_heatmap(self):
+        for days_ago in [0, 0, 8, HEATMAP_WEEKS * 7]:
+            self.submit(days_ago)
+
+        heatmap = get_heatmap(self.account, self.today)
+        self.assertEqual((len(heatmap), len(heatmap[0])), (7, HEATMAP_WEEKS))
+        self.assertEqual(heatmap[self.today.weekday()][0], 2)
+        self.assertEqual(heatmap[(self.today - timedelta(days=8)).weekday()][1], 1)
+        # older days are out of the grid
+        self.assertEqual(sum(map(sum, heatmap)), 3)
+
+class SolvedBreakdownTests(TestCase):
+    """
+    Keeps the solved-by-tag and accepted-by-language breakdowns of AccountStats in step.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.python = Language.objects.create(name="python", judge_id=71)
+        cls.java = Language.objects.create(name="java", judge_id=62)
+        cls.account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="Name")
+        cls.tags = {name: Tag.objects.create(name=name) for name in ["Array", "Hash Table", "Stack"]}
+        cls.problems = {}
+        for name, tag_names in [("Two Sum", ["Array", "Hash Table"]), ("Valid Parentheses", ["Stack"]), ("Group Anagrams", ["Array", "Hash Table"])]:
+            problem = Problem.objects.create(name=name, difficulty=1, description="", constraints="")
+            ProblemTag.objects.bulk_create([ProblemTag(problem=problem, tag=cls.tags[tag_name]) for tag_name in tag_names])
+            cls.problems[name] = problem
+
+    def setUp(self):
+        # the tag list and the language registry outlive the rolled back rows of earlier tests
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_namespace("tag")
+        LANGUAGES.invalidate()
+
+    def accept(self, problem, language):
+        Submission.objects.create(
+            problem=problem, account=self.account, status=SubmissionStatus.ACCEPTED, code="", language=language,
+            time="0.01", memory=1024, time_percent=50, memory_percent=50
+        )
+        AccountSolvedProblems.objects.get_or_create(account=self.account, problem=problem)
+
+    def get_breakdown(self):
+        return get_solved_breakdown(AccountStats.objects.get(account=self.account))
+
+    def test_breakdown(self):
+        self.accept(self.problems["Two Sum"], self.python)
+        self.accept(self.problems["Two Sum"], self.java)
+        self.accept(self.problems["Valid Parentheses"], self.python)
+
+        breakdown = self.get_breakdown()
+        self.assertEqual(breakdown["total"], 2)
+        self.assertEqual(breakdown["count_by_difficulty"]["easy"], 2)
+        self.assertEqual(breakdown["count_by_tags"], {"Array": 1, "Hash Table": 1, "Stack": 1})
+        self.assertEqual(breakdown["count_by_language"], {"python": 2, "java": 1})
+
+        # the recount agrees
+        stats = AccountStats.objects.get(account=self.account)
+        rebuild_account_stats([self.account.pk])
+        rebuilt = AccountStats.objects.get(account=self.account)
+        self.assertEqual((rebuilt.solved_tag_counts, rebuilt.accepted_language_counts), (stats.solved_tag_counts, stats.accepted_language_counts))
+
+    def test_tag_changes_of_solved_problems(self):
+        self.accept(self.problems["Two Sum"], self.python)
+        self.accept(self.problems["Group Anagrams"], self.python)
+
+        ProblemTag.objects.create(problem=self.problems["Two Sum"], tag=self.tags["Stack"])
+        ProblemTag.objects.filter(problem=self.problems["Group Anagrams"], tag=self.tags["Array"]).delete()
+        self.assertEqual(self.get_breakdown()["count_by_tags"], {"Hash Table": 2, "Array": 1, "Stack": 1})
+
+    def test_archived_languages_are_kept(self):
+        self.accept(self.problems["Two Sum"], self.python)
+        AccountStats.objects.filter(account=self.account).update(archived_language_counts={str(self.java.public_id): 4, str(self.python.public_id): 1})
+
+        rebuild_account_stats([self.account.pk])
+        self.assertEqual(self.get_breakdown()["count_by_language"], {"java": 4, "python": 2})
+
+    def test_profile_endpoint(self):
+        self.accept(self.problems["Valid Parentheses"], self.java)
 
-# Create your tests here.
+        client = APIClient()
+        client.force_authenticate(Account.objects.get(pk=self.account.pk))
+        response = client.get("/api/v1/account/profile/").json()
+        self.assertEqual(response["solved_problems"]["count_by_tags"], {"Stack": 1})
+        self.assertEqual(response["solved_problems"]["count_by_language"], {"java": 1})
+        self.assertEqual((response["active_days"], response["max_streak"]), (1, 1))
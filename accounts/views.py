@@ -1,11 +1,13 @@
-from datetime import datetime, timedelta, timezone
+from uuid import UUID
 
-from .models import Account, AccountSolvedProblems
+from .models import Account
 from .services import get_user_data
 from .serializers import CreateAccountSerializer, RetrieveAccountSerializer, ListAccountSerializer, GoogleAuthSerializer, UploadProfilePicSerializer, GetProfilePictureSerializer, UpdateProfileSerializer
 
-from problems.models import Submission, DifficultyChoices, Problem, DifficultyChoices, SubmissionStatus
-from problems.serializers import SubmissionSerializer
+from problems.models import Submission
+from problems.serializers import SubmissionSerializer, SubmissionListSerializer, get_submission_list_queryset
+from problems.pagination import RecentSubmissionPagination
+from problems.cache import get_difficulty_totals
 
 from django.conf import settings
 from django.shortcuts import redirect
@@ -22,6 +24,7 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from .permissions import AccountPermissions
+from .stats import DIFFICULTY_FIELDS, get_account_stats, get_current_streak, get_heatmap, get_solved_breakdown
 from .blob import upload_file_from_bytes, download_blob, get_all_blobs
 
 class AccountViewSet(ViewSet):
@@ -82,66 +85,39 @@ class AccountViewSet(ViewSet):
     
     @action(detail=False, methods=['GET'], url_path="recent_submissions", authentication_classes=[JWTAuthentication])
     def get_recent_submissions(self, request):
-        query_params = request.GET
-
-        page_size = query_params.get("size", 10)
+        submissions = get_submission_list_queryset(Submission.objects.filter(account=request.user))
+        paginator = RecentSubmissionPagination()
+        page = paginator.paginate_queryset(submissions, request, view=self)
+        serializer = SubmissionListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['GET'], url_path=r"submissions/(?P<submission_id>[^/.]+)", authentication_classes=[JWTAuthentication])
+    def get_submission(self, request, submission_id=None):
         try:
-            page_size = int(page_size)
-        except:
-            return Response({"message": "Invalid page size"}, status=status.HTTP_400_BAD_REQUEST)
-    
-        data = Submission.objects.filter(account=request.user).order_by('-date')[:page_size].all()
-        serializer = SubmissionSerializer(data, many=True)
+            submission_id = UUID(submission_id)
+        except ValueError:
+            return Response({"message": "Invalid submission ID"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # code and judge output of a single submission of the user
+        submission = Submission.objects.select_related("language", "problem", "source").filter(public_id=submission_id, account=request.user).first()
+        if not submission:
+            return Response({"message": "Invalid submission ID"}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = SubmissionSerializer(submission)
         return Response(serializer.data)
-    
 
     @action(detail=False, methods=['GET'], url_path="stats", authentication_classes=[JWTAuthentication])
     def get_user_stats(self, request):
-        output = {
-            'solved': {
-                'all': 0,
-                'easy': 0,
-                'school': 0,
-                'medium': 0,
-                'hard': 0
-            },
-            'total': {
-                'all': 0,
-                'easy': 0,
-                'school': 0,
-                'medium': 0,
-                'hard': 0
-            }
-        }
-
-        # get all problems count
-        problems = Problem.objects.filter(published=True).all()
-        for problem in problems:
-            output['total']['all'] += 1
-
-            if problem.difficulty == DifficultyChoices.SCHOOL:
-                output['total']['school'] += 1
-            elif problem.difficulty == DifficultyChoices.EASY:
-                output['total']['easy'] += 1
-            elif problem.difficulty == DifficultyChoices.MEDIUM:
-                output['total']['medium'] += 1
-            elif problem.difficulty == DifficultyChoices.HARD:
-                output['total']['hard'] += 1
-
-        # get problems solved
-        entries = AccountSolvedProblems.objects.filter(account=request.user).all()
-        for entry in entries:
-            output['solved']['all'] += 1
+        stats = get_account_stats(request.user)
 
-            if entry.problem.difficulty == DifficultyChoices.SCHOOL:
-                output['solved']['school'] += 1
-            elif entry.problem.difficulty == DifficultyChoices.EASY:
-                output['solved']['easy'] += 1
-            elif entry.problem.difficulty == DifficultyChoices.MEDIUM:
-                output['solved']['medium'] += 1
-            elif entry.problem.difficulty == DifficultyChoices.HARD:
-                output['solved']['hard'] += 1
+        solved = {'all': stats.solved_count}
+        for difficulty, field in DIFFICULTY_FIELDS.items():
+            solved[difficulty.label.lower()] = getattr(stats, field)
 
+        output = {
+            'solved': solved,
+            'total': get_difficulty_totals()
+        }
         return Response(output)
     
     @action(detail=False, methods=['POST'], url_path="upload_profile_picture", authentication_classes=[JWTAuthentication])
@@ -169,69 +145,11 @@ class AccountViewSet(ViewSet):
     def get_profile_info(self, request):
         user = request.user
 
-        solved_problems_stats = {
-            "total": 0,
-            "count_by_difficulty": {
-                "school": 0, "easy": 0, "medium": 0, "hard": 0
-            },
-            "count_by_language": {},
-            "count_by_tags": {}
-        }
-        solved_problems = AccountSolvedProblems.objects.filter(account=user).all()
-        submissions = Submission.objects.filter(account=user, status=SubmissionStatus.ACCEPTED).all()
-        solved_problems_stats['total'] = len(solved_problems)
-
-        for solved_problem in solved_problems:
-            org_problem = solved_problem.problem
-            
-            # count problems by difficulty
-            if org_problem.difficulty == DifficultyChoices.SCHOOL: 
-                if 'school' in solved_problems_stats['count_by_difficulty']: solved_problems_stats['count_by_difficulty']['school'] += 1
-                else: solved_problems_stats['count_by_difficulty']['school'] = 1
-            elif org_problem.difficulty == DifficultyChoices.EASY: 
-                if 'easy' in solved_problems_stats['count_by_difficulty']: solved_problems_stats['count_by_difficulty']['easy'] += 1
-                else: solved_problems_stats['count_by_difficulty']['school'] = 1
-            elif org_problem.difficulty == DifficultyChoices.MEDIUM: 
-                if 'medium' in solved_problems_stats['count_by_difficulty']: solved_problems_stats['count_by_difficulty']['medium'] += 1
-                else: solved_problems_stats['count_by_difficulty']['medium'] = 1
-            elif org_problem.difficulty == DifficultyChoices.HARD: 
-                if 'hard' in solved_problems_stats['count_by_difficulty']: solved_problems_stats['count_by_difficulty']['hard'] += 1
-                else: solved_problems_stats['count_by_difficulty']['hard'] = 1
-
-            # count problems by tags
-            for tag in org_problem.tags.all():
-                if tag.name in solved_problems_stats['count_by_tags']: solved_problems_stats['count_by_tags'][tag.name] += 1
-                else: solved_problems_stats['count_by_tags'][tag.name] = 1
-
-        for submission in submissions:
-            # count submissions by language
-            if submission.language.name in solved_problems_stats['count_by_language']: 
-                solved_problems_stats['count_by_language'][submission.language.name] += 1
-            else: 
-                solved_problems_stats['count_by_language'][submission.language.name] = 1
-
-        # calculate data for heatmap
-        heatmap = [[0 for _ in range(24)] for _ in range(7)]
-        start_date = datetime.now(timezone.utc) - timedelta(days=168)
-        end_date = datetime.now(timezone.utc)
-
-        submission_dates = set()
-        submissions = Submission.objects.filter(date__gte=start_date, date__lte=end_date).all()
-        for submission in submissions:
-            gap_days = (end_date - submission.date).days
-            heatmap[submission.date.weekday()][gap_days % 24] += 1
-            submission_dates.add(submission.date)
-
-        active_days = 0
-        curr = datetime.now(timezone.utc)
-        for date in sorted(submission_dates, reverse=True):
-            if (curr - date).days <= 1:
-                active_days += 1
-                curr - date
-
-        if active_days > user.max_streak:
-            user.max_streak = active_days
-            user.save()
+        # breakdowns, heatmap and streaks are all maintained on write
+        stats = get_account_stats(user)
+        solved_problems_stats = get_solved_breakdown(stats)
+        heatmap = get_heatmap(user)
+        active_days = get_current_streak(stats)
 
         output = {
             "email": user.email,
@@ -0,0 +1,258 @@
+"""
+Two tier cache backend: a small in-process LRU (L1) in front of a shared cache
+(L2) that every worker of every node can see.
+
+Keys are namespaced by their first ``:`` separated segment (``problem:detail:...``
+lives in the ``problem`` namespace). Each namespace has its own timeouts and a
+generation number stored in L2; bumping the generation with
+``invalidate_namespace`` drops every key of the namespace at once, in every
+process.
+"""
+
+import os
+import time
+import pickle
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+class LocalLRU:
+    """
+    Thread safe LRU of pickled values with per entry expiry.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return data
+
+    def set(self, key, data, timeout):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def size(self):
+        with self.lock:
+            return len(self.entries), sum(len(data) for _, data in self.entries.values())
+
+class TieredCache(BaseCache):
+    """
+    Django cache backend combining an in-process LRU with a shared cache alias.
+
+    OPTIONS:
+        SHARED_CACHE (str): alias of the L2 cache in ``CACHES``
+        LOCAL_MAX_ENTRIES (int): L1 capacity
+        LOCAL_TIMEOUT (int): default seconds an entry may be served from L1
+        GENERATION_TIMEOUT (int): seconds a namespace generation is trusted locally
+        NAMESPACES (dict): per namespace ``{"timeout": ..., "local_timeout": ...}``
+    """
+
+    def __init__(self, location, params):
+        options = params.get("OPTIONS", {})
+        super().__init__(params)
+
+        self.shared_alias = options.get("SHARED_CACHE", "shared")
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 5)
+        self.generation_timeout = options.get("GENERATION_TIMEOUT", 1)
+        self.namespaces = options.get("NAMESPACES", {})
+
+        self.local = LocalLRU(options.get("LOCAL_MAX_ENTRIES", 1000))
+        self.generations = {}
+        self.counters_lock = threading.Lock()
+        self.counters = {}
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def get_namespace(self, key):
+        return key.split(":", 1)[0]
+
+    def get_timeout(self, key, timeout):
+        if timeout is not DEFAULT_TIMEOUT:
+            return timeout
+        return self.namespaces.get(self.get_namespace(key), {}).get("timeout", self.default_timeout)
+
+    def get_local_timeout(self, key, timeout):
+        local_timeout = self.namespaces.get(self.get_namespace(key), {}).get("local_timeout", self.local_timeout)
+        if timeout is None:
+            return local_timeout
+        return min(local_timeout, timeout)
+
+    def set_local(self, key, physical, value, timeout):
+        # namespaces with a zero local timeout (e.g. locks) always go to L2
+        local_timeout = self.get_local_timeout(key, timeout)
+        if local_timeout > 0:
+            self.local.set(physical, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), local_timeout)
+
+    def get_generation(self, namespace):
+        """
+        Returns the current generation of ``namespace``, re-read from L2 at most once
+        per ``GENERATION_TIMEOUT`` seconds.
+        """
+        cached = self.generations.get(namespace)
+        now = time.monotonic()
+        if cached and cached[0] > now:
+            return cached[1]
+
+        # an evicted generation must not restart at a value older keys were stored under
+        generation = self.shared.get_or_set(f"namespace:{namespace}", time.time_ns, timeout=None)
+        self.generations[namespace] = (now + self.generation_timeout, generation)
+        return generation
+
+    def invalidate_namespace(self, namespace):
+        """
+        Drop every key of ``namespace`` in every process (within GENERATION_TIMEOUT).
+        """
+        key = f"namespace:{namespace}"
+        try:
+            generation = self.shared.incr(key)
+        except ValueError:
+            generation = time.time_ns()
+            self.shared.set(key, generation, timeout=None)
+
+        self.generations[namespace] = (time.monotonic() + self.generation_timeout, generation)
+        self.record(namespace, "invalidations")
+
+    def physical_key(self, key, version=None):
+        namespace = self.get_namespace(key)
+        return f"{key}:g{self.get_generation(namespace)}:v{self.version if version is None else version}"
+
+    def record(self, namespace, counter):
+        with self.counters_lock:
+            counters = self.counters.setdefault(namespace, {})
+            counters[counter] = counters.get(counter, 0) + 1
+
+    def stats(self):
+        """
+        Returns hit/miss counters per namespace plus L1 size and eviction figures
+        for this process.
+        """
+        entries, size = self.local.size()
+        with self.counters_lock:
+            return {
+                "namespaces": {namespace: dict(counters) for namespace, counters in self.counters.items()},
+                "local": {
+                    "entries": entries,
+                    "bytes": size,
+                    "max_entries": self.local.max_entries,
+                    "evictions": self.local.evictions
+                }
+            }
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.get_timeout(key, timeout)
+        physical = self.physical_key(key, version)
+
+        added = self.shared.add(physical, value, timeout=timeout)
+        if added:
+            self.set_local(key, physical, value, timeout)
+        return added
+
+    def get(self, key, default=None, version=None):
+        namespace = self.get_namespace(key)
+        physical = self.physical_key(key, version)
+
+        data = self.local.get(physical)
+        if data is not None:
+            self.record(namespace, "local_hits")
+            return pickle.loads(data)
+
+        sentinel = object()
+        value = self.shared.get(physical, sentinel)
+        if value is sentinel:
+            self.record(namespace, "misses")
+            return default
+
+        self.record(namespace, "shared_hits")
+        self.set_local(key, physical, value, None)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.get_timeout(key, timeout)
+        physical = self.physical_key(key, version)
+
+        self.shared.set(physical, value, timeout=timeout)
+        self.set_local(key, physical, value, timeout)
+        self.record(self.get_namespace(key), "sets")
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(self.physical_key(key, version), timeout=self.get_timeout(key, timeout))
+
+    def delete(self, key, version=None):
+        physical = self.physical_key(key, version)
+        self.local.delete(physical)
+        return self.shared.delete(physical)
+
+    def has_key(self, key, version=None):
+        physical = self.physical_key(key, version)
+        return self.local.get(physical) is not None or self.shared.has_key(physical)
+
+    def incr(self, key, delta=1, version=None):
+        physical = self.physical_key(key, version)
+        value = self.shared.incr(physical, delta)
+        self.set_local(key, physical, value, None)
+        return value
+
+    def clear(self):
+        self.local.clear()
+        self.generations.clear()
+        self.shared.clear()
+
+class LockingFileBasedCache(FileBasedCache):
+    """
+    File based cache whose ``add`` and ``incr`` (and so ``get_or_set``) hold an
+    exclusive lock on one lock file in the cache directory, which makes them
+    atomic across the workers of a host: the build locks and version counters
+    of problems/cache.py need that when there is no Redis.
+    """
+    lock_name = "atomic.lock"
+
+    @contextmanager
+    def atomic(self):
+        os.makedirs(self._dir, exist_ok=True)
+        with open(os.path.join(self._dir, self.lock_name), "ab") as file:
+            locks.lock(file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(file)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self.atomic():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self.atomic():
+            return super().incr(key, delta, version)
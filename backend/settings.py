@@ -150,6 +150,10 @@ CSRF_TRUSTED_ORIGINS = ["https://leetclone-backend.azurewebsites.net"]
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     )
 }
 
@@ -177,6 +181,61 @@ GOOGLE_OAUTH_FRONTEND_REDIRECT_URL = os.environ.get("GOOGLE_OAUTH_FRONTEND_REDIR
 
 JUDGE_URL = os.environ.get("JUDGE_URL")
 
+# judge job queue, worked off by `manage.py judgeworker` (see problems/judging.py)
+JUDGE_WORKER_THREADS = int(os.environ.get("JUDGE_WORKER_THREADS", 4))
+# seconds between two polls of the judge for a batch and of the queue when it is empty
+JUDGE_POLL_INTERVAL = float(os.environ.get("JUDGE_POLL_INTERVAL", 1))
+# failed attempts are retried after JUDGE_RETRY_DELAY * 2 ** (attempt - 1) seconds
+JUDGE_MAX_ATTEMPTS = int(os.environ.get("JUDGE_MAX_ATTEMPTS", 5))
+JUDGE_RETRY_DELAY = float(os.environ.get("JUDGE_RETRY_DELAY", 2))
+# a running job is given back to the queue after this many seconds (its worker died)
+JUDGE_JOB_TIMEOUT = int(os.environ.get("JUDGE_JOB_TIMEOUT", 300))
+# seconds run/submit wait for their job before answering with the job id to poll
+JUDGE_WAIT_TIMEOUT = float(os.environ.get("JUDGE_WAIT_TIMEOUT", 30))
+# days finished jobs are kept
+JUDGE_JOB_RETENTION = int(os.environ.get("JUDGE_JOB_RETENTION", 7))
+
+# cache warm-up (`manage.py warmcaches`, and every gunicorn worker when WARM_CACHES_ON_FORK=1)
+WARM_CACHES_TOP = int(os.environ.get("WARM_CACHES_TOP", 50))
+WARM_CACHES_DAYS = int(os.environ.get("WARM_CACHES_DAYS", 7))
+# absolute urls of problem list pages as clients request them, comma separated
+WARM_CACHES_LIST_URLS = [url for url in os.environ.get("WARM_CACHES_LIST_URLS", "").split(",") if url]
+
+# seconds between two flushes of the buffered like/dislike counters
+VOTE_FLUSH_INTERVAL = int(os.environ.get("VOTE_FLUSH_INTERVAL", 5))
+
 STORAGE_ACCOUNT_URL = os.environ.get("STORAGE_ACCOUNT_URL")
 STORAGE_CONN_STRING = os.environ.get("STORAGE_CONN_STRING")
-STORAGE_CONTAINER_NAME = os.environ.get("STORAGE_CONTAINER_NAME")
\ No newline at end of file
+STORAGE_CONTAINER_NAME = os.environ.get("STORAGE_CONTAINER_NAME")
+# caching: in-process LRU (L1) in front of a cache shared by every worker (L2),
+# redis when CACHE_REDIS_URL is set (required once workers run on several hosts),
+# a file based cache shared by the workers of this host otherwise
+CACHE_DIR = os.environ.get("CACHE_DIR", "/tmp/leetclone-cache")
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+
+CACHES = {
+    "default": {
+        "BACKEND": "backend.cache.TieredCache",
+        "OPTIONS": {
+            "SHARED_CACHE": "shared",
+            "LOCAL_MAX_ENTRIES": int(os.environ.get("CACHE_LOCAL_MAX_ENTRIES", 1000)),
+            "LOCAL_TIMEOUT": 5,
+            "GENERATION_TIMEOUT": 1,
+            "NAMESPACES": {
+                "problem": { "timeout": 60 * 60 * 24, "local_timeout": 60 },
+                "tag": { "timeout": 60 * 60 * 24, "local_timeout": 60 },
+                "language": { "timeout": 60 * 60 * 24, "local_timeout": 300 },
+                "version": { "timeout": None, "local_timeout": 1 },
+                "lock": { "local_timeout": 0 },
+            }
+        }
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": CACHE_REDIS_URL,
+    } if CACHE_REDIS_URL else {
+        "BACKEND": "backend.cache.LockingFileBasedCache",
+        "LOCATION": CACHE_DIR,
+        "OPTIONS": { "MAX_ENTRIES": 10000 }
+    }
+}
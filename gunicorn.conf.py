@@ -0,0 +1,37 @@
+import os
+import time
+
+# gunicorn reads this file from the working directory it is started in (the project
+# root on App Service), the bind address and worker count stay on the command line
+
+def post_fork(server, worker):
+    """
+    Load the language registry of every worker before it takes requests, and warm
+    the rest of its per-process caches (tag and search indexes, local cache) too
+    when WARM_CACHES_ON_FORK=1.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connections
+    from problems.languages import LANGUAGES
+    from problems.warmup import warm_caches
+
+    start = time.monotonic()
+    try:
+        if os.environ.get("WARM_CACHES_ON_FORK") != "1":
+            # every run, submit and problem payload looks languages up
+            LANGUAGES.load()
+            server.log.debug("Worker %s loaded %d language(s)", worker.pid, len(LANGUAGES.all()))
+            return
+
+        warm_caches(top=settings.WARM_CACHES_TOP, days=settings.WARM_CACHES_DAYS, list_urls=settings.WARM_CACHES_LIST_URLS, log=server.log.debug)
+        server.log.info("Worker %s warmed its caches in %.2fs", worker.pid, time.monotonic() - start)
+    except Exception:
+        # a cold worker still serves requests
+        server.log.exception("Worker %s failed to warm its caches", worker.pid)
+    finally:
+        connections.close_all()
@@ -1,11 +1,48 @@
-from django.contrib import admin
-from .models import Problem, Solution, Implementation, Submission, Language, ProblemTag, Tag, ValueField
+from django import forms
+from django.contrib import admin, messages
+from .models import Problem, Solution, Implementation, Submission, Language, ProblemTag, Tag, ValueField, JudgeJob, ProblemBaseline
+from .judging import JudgeError
+from .verification import VerificationError, get_publish_errors, publish_problem
+
+class ProblemAdminForm(forms.ModelForm):
+    class Meta:
+        model = Problem
+        fields = "__all__"
+
+    def clean_published(self):
+        published = self.cleaned_data.get("published")
+        # problems are published by the verify and publish action, which runs the verification
+        if published and not self.instance.published:
+            errors = get_publish_errors(self.instance)
+            if errors:
+                raise forms.ValidationError(errors)
+        return published
+
+@admin.register(Problem)
+class ProblemAdmin(admin.ModelAdmin):
+    form = ProblemAdminForm
+    list_display = ["name", "difficulty", "published"]
+    list_filter = ["published", "difficulty"]
+    actions = ["verify_and_publish"]
+
+    @admin.action(description="Verify and publish selected problems")
+    def verify_and_publish(self, request, queryset):
+        for problem in queryset.defer("search_vector"):
+            try:
+                publish_problem(problem)
+            except VerificationError as ex:
+                self.message_user(request, "; ".join(ex.errors), messages.ERROR)
+            except JudgeError as ex:
+                self.message_user(request, f"{problem.name}: {ex}", messages.ERROR)
+            else:
+                self.message_user(request, f"{problem.name} published")
 
-admin.site.register(Problem)
 admin.site.register(Solution)
 admin.site.register(Implementation)
 admin.site.register(Submission)
 admin.site.register(Language)
 admin.site.register(ProblemTag)
 admin.site.register(Tag)
-admin.site.register(ValueField)
\ No newline at end of file
+admin.site.register(ValueField)
+admin.site.register(JudgeJob)
+admin.site.register(ProblemBaseline)
@@ -0,0 +1,163 @@
+import time
+from hashlib import sha1
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Problem, Tag, DifficultyChoices
+
+# detail payloads are keyed by version, so they can live until evicted
+DETAIL_TIMEOUT = 60 * 60 * 24
+
+# how long a rebuild may hold the lock and how long others wait for it
+BUILD_LOCK_TIMEOUT = 30
+BUILD_WAIT_TIMEOUT = 5
+BUILD_POLL_INTERVAL = 0.05
+
+CATALOG_VERSION_KEY = "version:catalog"
+LIST_VERSION_KEY = "version:problem_list"
+
+def get_version(key):
+    # a missing version (never set or evicted) starts from a value no payload cached
+    # under an earlier version of the key can use, like bump_version does
+    return cache.get_or_set(key, time.time_ns, timeout=None)
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # the version was evicted, restart from a value no cached payload can use
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
+
+def get_or_build(key, builder, timeout=DETAIL_TIMEOUT):
+    """
+    Return the cached value of ``key`` or build it with ``builder``.
+
+    Only the worker that wins the build lock runs ``builder``, the others poll the
+    cache until the value shows up, so a cold popular key is built once instead of
+    once per worker. ``None`` results are never cached.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f"lock:{key}"
+    if cache.add(lock_key, 1, timeout=BUILD_LOCK_TIMEOUT):
+        try:
+            value = builder()
+            if value is not None:
+                cache.set(key, value, timeout=timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + BUILD_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(BUILD_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        # the builder gave up (e.g. the problem does not exist), stop waiting
+        if cache.get(lock_key) is None:
+            break
+
+    return builder()
+
+def problem_version_key(public_id):
+    return f"version:problem:{public_id}"
+
+def get_problem_version(public_id):
+    """
+    Returns the version of a single problem combined with the catalog version, any
+    of the two changing produces a new detail cache key.
+    """
+    return f"{get_version(CATALOG_VERSION_KEY)}.{get_version(problem_version_key(public_id))}"
+
+def problem_payload_key(public_id, version, variant=None):
+    key = f"problem:payload:{public_id}:{version}"
+    if variant:
+        key = f"{key}:{sha1(variant.encode('utf-8')).hexdigest()}"
+    return key
+
+def get_problem_payload(public_id, builder, version=None, variant=None):
+    """
+    Returns the materialized payload of a problem, ``variant`` tells apart the
+    payloads built from the same problem (field selections, solutions, ...).
+    """
+    if version is None:
+        version = get_problem_version(public_id)
+    return get_or_build(problem_payload_key(public_id, version, variant), builder)
+
+def get_problem_list_version():
+    return f"{get_version(CATALOG_VERSION_KEY)}.{get_version(LIST_VERSION_KEY)}"
+
+def get_difficulty_totals():
+    """
+    Returns the number of published problems, overall and per difficulty name,
+    counted with one query and cached until the problem list changes (which any
+    problem save, including a publish, does).
+    """
+    def build():
+        aggregates = {"all": Count("pk")}
+        for difficulty in DifficultyChoices:
+            aggregates[difficulty.label.lower()] = Count("pk", filter=Q(difficulty=difficulty))
+        return Problem.objects.filter(published=True).aggregate(**aggregates)
+
+    return get_or_build(f"problem:difficulty_totals:{get_problem_list_version()}", build)
+
+def problem_list_key(url, version):
+    return f"problem:list:{version}:{sha1(url.encode('utf-8')).hexdigest()}"
+
+def invalidate_problem(public_id):
+    """
+    Bump the version of a problem once the current transaction commits, so no
+    reader can cache the pre-commit state under the new version.
+    """
+    transaction.on_commit(lambda: bump_version(problem_version_key(public_id)))
+
+def invalidate_problem_list():
+    transaction.on_commit(lambda: bump_version(LIST_VERSION_KEY))
+
+def invalidate_catalog():
+    transaction.on_commit(lambda: bump_version(CATALOG_VERSION_KEY))
+
+def namespace_version_key(namespace):
+    return f"version:namespace:{namespace}"
+
+def get_namespace_version(namespace):
+    return get_version(namespace_version_key(namespace))
+
+def invalidate_namespace(namespace):
+    """
+    Drop every cached key of ``namespace`` once the current transaction commits
+    and bump its version, so responses built from it get new ETags.
+    """
+    def invalidate():
+        if hasattr(cache, "invalidate_namespace"):
+            cache.invalidate_namespace(namespace)
+        else:
+            cache.clear()
+        bump_version(namespace_version_key(namespace))
+    transaction.on_commit(invalidate)
+
+def get_published_problem(public_id):
+    """
+    Returns the published problem with the given public id (without its relations)
+    or None, cached until the problem changes.
+    """
+    if not public_id:
+        return None
+
+    version = get_problem_version(public_id)
+    return get_or_build(
+        f"problem:instance:{public_id}:{version}",
+        lambda: Problem.objects.filter(public_id=public_id, published=True).defer("search_vector").first()
+    )
+
+def get_tag_list():
+    from .serializers import TagSerializer
+    return get_or_build("tag:list", lambda: list(TagSerializer(Tag.objects.all(), many=True).data))
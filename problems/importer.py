@@ -0,0 +1,371 @@
+import json
+import time
+from hashlib import sha1
+
+from django.db import transaction
+
+from .models import Problem, ProblemTag, Tag, TestCase, ValueField, Code, Solution, Implementation, Complexity, ProblemBaseline
+from .models import DifficultyChoices, FieldType, ComplexityType
+from .serializers import createCode
+from .signals import refresh_indexes
+from .cache import invalidate_problem, invalidate_namespace
+from .languages import LANGUAGES
+
+from accounts.stats import change_difficulty, refresh_solved_tags
+
+READ_SIZE = 64 * 1024
+CHUNK_SIZE = 50
+
+class InvalidImportError(Exception):
+    """
+    Raised when the import file has invalid entries, nothing is written in that case.
+    """
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid entr{'y' if len(errors) == 1 else 'ies'}")
+
+def iter_json_array(file, read_size=READ_SIZE):
+    """
+    Yield the items of a top-level JSON array without loading the whole file.
+
+    Args:
+        file (file): text file opened for reading
+        read_size (int): number of characters read at a time
+
+    Returns:
+        generator: decoded items
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = file.read(read_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def next_char():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            fill()
+
+    if next_char() != "[":
+        raise ValueError("Expected a JSON array")
+    position += 1
+
+    if next_char() == "]":
+        return
+
+    while True:
+        next_char()
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # the item continues past the buffer
+            if eof:
+                raise
+            fill()
+            continue
+
+        position = end
+        yield item
+
+        separator = next_char()
+        position += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Unexpected '{separator}' between array items")
+
+def get_source_hash(entry):
+    return sha1(json.dumps(entry, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def check(condition, errors, message):
+    if not condition:
+        errors.append(message)
+    return condition
+
+def validate_entry(entry, language_ids):
+    """
+    Check one import entry against the model constraints.
+
+    Args:
+        entry (dict): problem as found in the import file
+        language_ids (set): public IDs of the known languages
+
+    Returns:
+        list: error messages, empty when the entry is valid
+    """
+    errors = []
+    if not check(isinstance(entry, dict), errors, "entry is not an object"):
+        return errors
+
+    name = entry.get("name")
+    check(isinstance(name, str) and 0 < len(name) <= 100, errors, "name must be a string of 1 to 100 characters")
+    # True == 1, a boolean would pass the membership test alone
+    difficulty = entry.get("difficulty")
+    check(isinstance(difficulty, int) and not isinstance(difficulty, bool) and difficulty in DifficultyChoices.values, errors, f"invalid difficulty {difficulty!r}")
+    for field in ["description", "constraints"]:
+        check(isinstance(entry.get(field), str), errors, f"{field} must be a string")
+
+    # tags
+    tags = entry.get("tags") or []
+    if check(isinstance(tags, list), errors, "tags must be a list"):
+        for tag in tags:
+            check(isinstance(tag, dict) and isinstance(tag.get("name"), str) and 0 < len(tag["name"]) <= 100, errors, f"invalid tag {tag!r}")
+
+    # test cases, the inputs of the last one shape the default code
+    testcases = entry.get("testcases")
+    if check(isinstance(testcases, list) and testcases, errors, "testcases must be a non-empty list"):
+        for index, testcase in enumerate(testcases):
+            if not check(isinstance(testcase, dict) and isinstance(testcase.get("inputs"), list), errors, f"testcase {index} has no inputs"):
+                continue
+            check(isinstance(testcase.get("is_sample"), bool), errors, f"testcase {index}: is_sample must be a boolean")
+            for field in testcase["inputs"]:
+                if not check(isinstance(field, dict), errors, f"testcase {index}: invalid input {field!r}"):
+                    continue
+                check(isinstance(field.get("name"), str) and 0 < len(field["name"]) <= 20, errors, f"testcase {index}: invalid input name {field.get('name')!r}")
+                check(field.get("type") in FieldType.values, errors, f"testcase {index}: invalid input type {field.get('type')!r}")
+
+    # solutions
+    solutions = entry.get("solutions") or []
+    if check(isinstance(solutions, list), errors, "solutions must be a list"):
+        for index, solution in enumerate(solutions):
+            if not check(isinstance(solution, dict), errors, f"solution {index} is not an object"):
+                continue
+            check(isinstance(solution.get("name"), str) and 0 < len(solution["name"]) <= 100, errors, f"solution {index}: invalid name")
+            for implementation in solution.get("implementations") or []:
+                check(isinstance(implementation, dict) and implementation.get("language") in language_ids, errors, f"solution {index}: unknown language {implementation.get('language') if isinstance(implementation, dict) else implementation!r}")
+            for complexity in solution.get("complexities") or []:
+                check(
+                    isinstance(complexity, dict) and complexity.get("type") in ComplexityType.values and isinstance(complexity.get("value"), str) and len(complexity["value"]) <= 20,
+                    errors,
+                    f"solution {index}: invalid complexity {complexity!r}"
+                )
+
+    return errors
+
+class ProblemImporter:
+    """
+    Imports problems from a JSON array file in chunks.
+
+    The file is read twice: the first pass validates every entry (nothing is
+    written if any entry is invalid), the second writes each chunk with
+    ``bulk_create`` inside its own transaction. Problems are matched by name;
+    unchanged problems (same source hash) are skipped, changed ones have their
+    content replaced in place so their IDs, votes and submissions survive. The
+    verification baselines of changed problems no longer apply, they are dropped
+    and the problems unpublished until ``verifyproblems`` passes them again.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, log=None):
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.stats = {"created": 0, "updated": 0, "unchanged": 0, "unpublished": 0, "rows": 0, "seconds": 0.0}
+
+    def validate(self, path):
+        """
+        Validate every entry of the file.
+
+        Raises:
+            InvalidImportError: when any entry is invalid or a name is repeated
+        """
+        errors = []
+        names = set()
+        language_ids = {str(language.public_id) for language in LANGUAGES.all()}
+        count = 0
+        with open(path) as file:
+            for index, entry in enumerate(iter_json_array(file)):
+                count += 1
+                label = entry.get("name") if isinstance(entry, dict) and entry.get("name") else f"#{index}"
+                errors += [f"{label}: {error}" for error in validate_entry(entry, language_ids)]
+
+                if label in names:
+                    errors.append(f"{label}: duplicate problem name")
+                names.add(label)
+
+        if errors:
+            raise InvalidImportError(errors)
+        return count
+
+    def run(self, path, dry_run=False):
+        """
+        Validate then import the file.
+
+        Returns:
+            dict: created/updated/unchanged problem counts, rows written and elapsed seconds
+        """
+        total = self.validate(path)
+        self.log(f"Validated {total} problem(s)")
+        if dry_run:
+            return self.stats
+
+        start = time.monotonic()
+        chunk = []
+        with open(path) as file:
+            for entry in iter_json_array(file):
+                chunk.append(entry)
+                if len(chunk) >= self.chunk_size:
+                    self.import_chunk(chunk)
+                    chunk = []
+        if chunk:
+            self.import_chunk(chunk)
+
+        self.stats["seconds"] = time.monotonic() - start
+        return self.stats
+
+    def import_chunk(self, entries):
+        start = time.monotonic()
+        rows = 0
+
+        with transaction.atomic():
+            existing = {
+                problem.name: problem
+                for problem in Problem.objects.filter(name__in=[entry["name"] for entry in entries]).only("pk", "public_id", "name", "difficulty", "source_hash", "published")
+            }
+
+            created, updated, moved, unpublished = [], [], [], []
+            for entry in entries:
+                source_hash = get_source_hash(entry)
+                problem = existing.get(entry["name"])
+
+                if problem is None:
+                    problem = Problem(name=entry["name"])
+                    created.append(problem)
+                elif problem.source_hash == source_hash:
+                    self.stats["unchanged"] += 1
+                    continue
+                else:
+                    updated.append(problem)
+                    if problem.published:
+                        problem.published = False
+                        unpublished.append(problem)
+                    if problem.difficulty != entry["difficulty"]:
+                        moved.append((problem.pk, problem.difficulty, entry["difficulty"]))
+
+                problem.difficulty = entry["difficulty"]
+                problem.description = entry["description"]
+                problem.constraints = entry["constraints"]
+                problem.source_hash = source_hash
+                problem._entry = entry
+
+            if not created and not updated:
+                return
+
+            Problem.objects.bulk_create(created)
+            if updated:
+                Problem.objects.bulk_update(updated, ["difficulty", "description", "constraints", "source_hash", "published"])
+
+                # replace the content of changed problems, their baselines were
+                # recorded against the old test cases and implementations
+                for model in [TestCase, Solution, Code, ProblemTag, ProblemBaseline]:
+                    model.objects.filter(problem__in=updated).delete()
+
+                # keep the solved-by-difficulty counters of the solvers in step
+                for pk, old, new in moved:
+                    change_difficulty(pk, old, new)
+            rows += len(created) + len(updated)
+
+            problems = created + updated
+            rows += self.create_children(problems)
+
+            # tags were replaced with bulk inserts
+            if updated:
+                refresh_solved_tags([problem.pk for problem in updated])
+
+        # bulk writes send no signals, refresh indexes and caches once per chunk
+        refresh_indexes([problem.pk for problem in problems])
+        for problem in problems:
+            invalidate_problem(problem.public_id)
+
+        self.stats["created"] += len(created)
+        self.stats["updated"] += len(updated)
+        self.stats["unpublished"] += len(unpublished)
+        self.stats["rows"] += rows
+
+        if unpublished:
+            self.log(f"Unpublished {len(unpublished)} changed problem(s) until they are verified again: {', '.join(problem.name for problem in unpublished)}")
+
+        elapsed = time.monotonic() - start
+        self.log(f"Imported {len(problems)} problem(s), {rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else rows:.0f} rows/sec)")
+
+    def get_tags(self, names):
+        """
+        Returns a tag per name, creating the missing ones.
+        """
+        tags = {}
+        for tag in Tag.objects.filter(name__in=names).order_by("pk"):
+            tags.setdefault(tag.name, tag)
+
+        missing = [Tag(name=name) for name in names if name not in tags]
+        if missing:
+            Tag.objects.bulk_create(missing)
+            tags.update({tag.name: tag for tag in missing})
+            invalidate_namespace("tag")
+        return tags
+
+    def create_children(self, problems):
+        testcases, fields, codes, solutions, implementations, complexities, problem_tags = [], [], [], [], [], [], []
+
+        tag_names = {tag["name"] for problem in problems for tag in problem._entry.get("tags") or []}
+        tags = self.get_tags(sorted(tag_names))
+
+        for problem in problems:
+            entry = problem._entry
+
+            # create test cases
+            inputs = []
+            for data in entry["testcases"]:
+                testcase = TestCase(problem=problem, is_sample=data["is_sample"])
+                testcases.append(testcase)
+
+                inputs = [
+                    ValueField(testcase=testcase, name=field["name"], type=field["type"], value=str(field.get("value")))
+                    for field in data["inputs"]
+                ]
+                fields += inputs
+
+            # create default code from the inputs of the last test case
+            for language_name, value in createCode(problem.name, inputs).items():
+                language = LANGUAGES.get_by_name(language_name)
+                if not language:
+                    self.log(f"Unable to find language '{language_name}'")
+                    continue
+                codes.append(Code(language=language, problem=problem, value=value))
+
+            # create solutions
+            for data in entry.get("solutions") or []:
+                solution = Solution(problem=problem, name=data["name"], intution=data.get("intution"), algorithm=data.get("algorithm"))
+                solutions.append(solution)
+
+                implementations += [
+                    Implementation(solution=solution, language=LANGUAGES.get(implementation["language"]), value=implementation.get("value"))
+                    for implementation in data.get("implementations") or []
+                ]
+                complexities += [
+                    Complexity(solution=solution, type=complexity["type"], value=complexity["value"], explanation=complexity.get("explanation") or "")
+                    for complexity in data.get("complexities") or []
+                ]
+
+            # set tags
+            seen = set()
+            for data in entry.get("tags") or []:
+                if data["name"] not in seen:
+                    seen.add(data["name"])
+                    problem_tags.append(ProblemTag(problem=problem, tag=tags[data["name"]]))
+
+        rows = 0
+        for model, objects in [(TestCase, testcases), (ValueField, fields), (Code, codes), (Solution, solutions), (Implementation, implementations), (Complexity, complexities), (ProblemTag, problem_tags)]:
+            model.objects.bulk_create(objects)
+            rows += len(objects)
+        return rows
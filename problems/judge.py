@@ -221,21 +221,21 @@ class JudgeManager:
         except Exception as ex:
             return False, ex
         
-    def create_boilerplate_code(self, source_code: str, problem, language, is_sample = True) -> str:
+    def get_harness_fragments(self, problem, language, is_sample = True) -> List[dict]:
         """
-        Combines the source code, problem details, the selected language  type to create a final boilerplate code for the solution
+        Builds the parts of the boilerplate code of every testcase which do not depend on
+        the submitted source code, along with the details of the testcase
 
         Args:
-            source_code (str): predefined source code
             problem (Problem): model problem object
             language (Language): model language object
             is_sample (bool, optional): whether the test case is sample test case or not. Defaults to True.
 
         Returns:
-            string: boilerplate code
+            List[dict]: template arguments of every testcase, its inputs and expected output under "details"
         """
 
-        codes = []
+        fragments = []
         testcases = []
 
         if is_sample:
@@ -243,15 +243,13 @@ class JudgeManager:
         else:
             testcases = problem.testcases.all()
 
+        func_name = problem.name.replace(" ", "")
+        func_name = func_name[0].lower() + func_name[1:]
 
         for testcase in testcases:
 
-            code = ""
             inputs = testcase.inputs.all()
             args = []
-            
-            func_name = problem.name.replace(" ", "")
-            func_name = func_name[0].lower() + func_name[1:]
 
             read_inputs = ""
             out_type = ""
@@ -297,13 +295,50 @@ class JudgeManager:
                         read_inputs += f"String[] {input.name} = new String[] "+"{ "+ input.value.replace("[", "").replace("]", "") +" };\n"
                     elif input.type == FieldType.FLOAT:
                         read_inputs += f"float {input.name} = {input.value};\n"
-            
+
+            output = find(lambda x: x.name == "output", inputs)
+            fragments.append({
+                "args": ",".join(args),
+                "func_name": func_name,
+                "read_inputs": read_inputs,
+                "out_type": out_type,
+                "out_print": out_print,
+                "details": {
+                    "inputs": [{ "name": input.name, "value": input.value } for input in inputs],
+                    "expected_output": output.value if output else None
+                }
+            })
+
+        return fragments
+
+    def create_boilerplate_code(self, source_code: str, problem, language, is_sample = True, fragments = None) -> str:
+        """
+        Combines the source code, problem details, the selected language  type to create a final boilerplate code for the solution
+
+        Args:
+            source_code (str): predefined source code
+            problem (Problem): model problem object
+            language (Language): model language object
+            is_sample (bool, optional): whether the test case is sample test case or not. Defaults to True.
+            fragments (List[dict], optional): prebuilt (e.g. cached) harness fragments of the testcases. Defaults to None.
+
+        Returns:
+            string: boilerplate code
+        """
+
+        if fragments is None:
+            fragments = self.get_harness_fragments(problem, language, is_sample)
+
+        codes = []
+        for fragment in fragments:
+
+            code = ""
             if language.name == "python":
-                code = Template(PYTHON_BOILERPLATE).substitute(args=",".join(args), func_name=func_name, read_inputs=read_inputs, source_code=source_code)
+                code = Template(PYTHON_BOILERPLATE).substitute(fragment, source_code=source_code)
             elif language.name == "javascript":    
-                code = Template(JAVASCRIPT_BOILERPLATE).substitute(args=",".join(args), func_name=func_name, read_inputs=read_inputs, source_code=source_code)
+                code = Template(JAVASCRIPT_BOILERPLATE).substitute(fragment, source_code=source_code)
             elif language.name == "java":
-                code = Template(JAVA_BOILERPLATE).substitute(args=",".join(args), func_name=func_name, read_inputs=read_inputs, source_code=source_code, out_type=out_type, out_print=out_print)
+                code = Template(JAVA_BOILERPLATE).substitute(fragment, source_code=source_code)
             codes.append(code)
         
         return codes
@@ -334,24 +369,22 @@ class JudgeManager:
         Get the status of submission (whether all answers match testcase results or not)
 
         Args:
-            testcases (List[TestCase]): List of testcases within the problem
+            testcases (List[dict]): inputs and expected output of every testcase, the "details" of the harness fragments
             submissions (List[]): List of Judge0 submission
 
         Returns:
             bool: True if all answers are correct else False
         """
         for index, testcase in enumerate(testcases):
-            inputs = testcase.inputs.all()
-            expected_output = find(lambda x: x.name == "output", inputs).value
             program_output = submissions[index]['stdout']
 
             failed_testcase_details = {
-                "inputs": [{ "name": input.name, "value": input.value } for input in inputs],
-                "expected_output": expected_output,
+                "inputs": testcase["inputs"],
+                "expected_output": testcase["expected_output"],
                 "original_output": program_output
             }
 
-            if program_output != expected_output:
+            if program_output != testcase["expected_output"]:
                 return False, failed_testcase_details
             
         return True, {}
\ No newline at end of file
@@ -0,0 +1,322 @@
+import time
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from accounts.models import AccountSolvedProblems
+from .models import Problem, Submission, SubmissionStatus, JudgeJob, JudgeJobKind, JudgeJobStatus
+from .judge import JudgeManager
+from .cache import get_or_build, get_problem_version, invalidate_problem
+from .sources import store_source
+
+logger = logging.getLogger(__name__)
+
+JUDGE_MANAGER = JudgeManager()
+
+# judge statuses of a batch entry that is still queued or processing
+PENDING_JUDGE_STATUSES = (1, 2)
+
+# seconds between two reads of a job the web request waits for
+WAIT_INTERVAL = 0.25
+
+FINISHED_STATUSES = (JudgeJobStatus.DONE, JudgeJobStatus.FAILED)
+
+class JudgeError(Exception):
+    """
+    The judge could not be reached or refused a batch, the attempt is retried.
+    """
+
+def enqueue_job(kind, problem, language, code, account=None):
+    """
+    Store a run or submit for the judge workers.
+
+    Args:
+        kind (JudgeJobKind): run against the sample test cases or submit against all of them
+        problem (Problem): problem the code solves
+        language (Language): language of the code
+        code (str): decoded source code
+        account (Account): account the job (and its submission) belongs to
+
+    Returns:
+        JudgeJob: the queued job
+    """
+    now = timezone.now()
+    return JudgeJob.objects.create(
+        kind = kind,
+        problem = problem,
+        account = account,
+        language = language,
+        source = store_source(code),
+        created_at = now,
+        run_after = now
+    )
+
+def get_retry_delay(attempts):
+    return settings.JUDGE_RETRY_DELAY * 2 ** (attempts - 1)
+
+def claim_job(worker):
+    """
+    Claim the next due job: a queued job whose backoff passed, or a running one
+    whose worker did not finish it within JUDGE_JOB_TIMEOUT (it died). The row is
+    read with FOR UPDATE SKIP LOCKED, so concurrent workers claim different jobs
+    without waiting on each other, and the claim is committed before judging.
+
+    Returns:
+        JudgeJob: the claimed job or None when nothing is due
+    """
+    while True:
+        now = timezone.now()
+        due = Q(status=JudgeJobStatus.QUEUED, run_after__lte=now) | \
+            Q(status=JudgeJobStatus.RUNNING, started_at__lt=now - timedelta(seconds=settings.JUDGE_JOB_TIMEOUT))
+
+        with transaction.atomic():
+            job = JudgeJob.objects.select_for_update(skip_locked=True, of=("self",)) \
+                .select_related("problem", "language", "source", "account") \
+                .filter(due) \
+                .order_by("run_after", "pk") \
+                .first()
+            if job is None:
+                return None
+
+            # a job which keeps taking its workers down is given up
+            if job.status == JudgeJobStatus.RUNNING and job.attempts >= settings.JUDGE_MAX_ATTEMPTS:
+                job.status = JudgeJobStatus.FAILED
+                job.error = "Judging timed out"
+                job.finished_at = now
+                job.save(update_fields=["status", "error", "finished_at"])
+                continue
+
+            # a timed out attempt counts from its timeout on
+            due_at = job.run_after if job.status == JudgeJobStatus.QUEUED else job.started_at + timedelta(seconds=settings.JUDGE_JOB_TIMEOUT)
+
+            job.status = JudgeJobStatus.RUNNING
+            job.attempts += 1
+            job.worker = worker
+            job.started_at = now
+            job.wait_time = max((now - due_at).total_seconds(), 0)
+            job.save(update_fields=["status", "attempts", "worker", "started_at", "wait_time"])
+            return job
+
+def get_harness_fragments(problem, language, is_sample=True):
+    """
+    Returns the harness fragments of the test cases of the problem in a language,
+    cached until the problem or one of its test cases changes.
+    """
+    variant = "sample" if is_sample else "all"
+    key = f"problem:harness:{problem.public_id}:{get_problem_version(problem.public_id)}:{language.public_id}:{variant}"
+    return get_or_build(key, lambda: JUDGE_MANAGER.get_harness_fragments(problem, language, is_sample))
+
+def judge_batch(codes, language):
+    """
+    Send the codes to the judge as one batch and wait until every entry is judged.
+
+    Returns:
+        dict: the judged batch
+
+    Raises:
+        JudgeError: the judge failed or did not finish within JUDGE_JOB_TIMEOUT
+    """
+    status, response = JUDGE_MANAGER.create_batch(codes=codes, language=language.judge_id)
+    if not status:
+        raise JudgeError(str(response))
+
+    tokens = [entry['token'] for entry in response]
+    deadline = time.monotonic() + settings.JUDGE_JOB_TIMEOUT
+    while True:
+        status, response = JUDGE_MANAGER.get_batch(tokens)
+        if not status:
+            raise JudgeError(str(response))
+
+        if not any(entry['status']['id'] in PENDING_JUDGE_STATUSES for entry in response['submissions']):
+            return response
+
+        if time.monotonic() >= deadline:
+            raise JudgeError("Timed out waiting for the judge")
+        time.sleep(settings.JUDGE_POLL_INTERVAL)
+
+def judge_run(job, code):
+    """
+    Run the code against the sample test cases.
+
+    Returns:
+        dict: the judged batch, as answered by run
+    """
+    fragments = get_harness_fragments(job.problem, job.language)
+    codes = JUDGE_MANAGER.create_boilerplate_code(code, job.problem, job.language, fragments=fragments)
+    response = judge_batch(codes, job.language)
+
+    for entry in response['submissions']:
+        del entry['token']
+        entry['stdout'] = JUDGE_MANAGER.parse_stdout(entry['stdout'])
+    return response
+
+def judge_code(problem, language, code):
+    """
+    Run the code against every test case of the problem, wrapped in the harness
+    fragments of ``get_harness_fragments`` (cached per problem version).
+
+    Returns:
+        dict: verdict fields of the submission
+    """
+    fragments = get_harness_fragments(problem, language, is_sample=False)
+    codes = JUDGE_MANAGER.create_boilerplate_code(code, problem, language, fragments=fragments)
+    response = judge_batch(codes, language)
+
+    status = True
+    total_time = 0
+    total_memory = 0
+    count = len(codes)
+    error_string = ""
+    failed_testcase_details = {}
+
+    # check for errors in code and parse stdout
+    for entry in response['submissions']:
+        if entry['stderr']:
+            error_string = entry['stderr']
+            status = None
+            break
+        elif entry['compile_output']:
+            error_string = entry['compile_output']
+            status = None
+            break
+
+        total_time += float(entry['time'])
+        total_memory += entry['memory']
+        entry['stdout'] = JUDGE_MANAGER.parse_stdout(entry['stdout'])
+
+    # check if answers are right or not
+    if status != None:
+        testcases = [fragment["details"] for fragment in fragments]
+        status, failed_testcase_details = JUDGE_MANAGER.get_submission_status(testcases, response['submissions'])
+
+    return {
+        "status": SubmissionStatus.ACCEPTED if status == True else SubmissionStatus.REJECTED if status == False else SubmissionStatus.RUNTIME_ERROR,
+        "time": str(float(total_time / count)),
+        "memory": float(total_memory / count),
+        "time_percent": 93.5,
+        "memory_percent": 98.3,
+        "error_string": error_string,
+        "reject_details": {} if status else failed_testcase_details
+    }
+
+def record_submission(job, fields):
+    """
+    Create the submission of a judged submit, count it and record the solve.
+    Runs inside the transaction finishing the job.
+    """
+    problem = job.problem
+    accepted = fields["status"] == SubmissionStatus.ACCEPTED
+
+    # dated when it was submitted, not when a worker got to it
+    submission = Submission.objects.create(
+        problem = problem,
+        account = job.account,
+        language = job.language,
+        source = job.source,
+        date = job.created_at,
+        **fields
+    )
+
+    # update counters in place instead of rewriting the problem row
+    Problem.objects.filter(pk=problem.pk).update(
+        total_submissions_count = F("total_submissions_count") + 1,
+        accepted_submissions_count = F("accepted_submissions_count") + (1 if accepted else 0)
+    )
+    transaction.on_commit(lambda: invalidate_problem(problem.public_id))
+
+    # (account, problem) is unique, a concurrent accepted submit just finds the row
+    if accepted and job.account_id:
+        AccountSolvedProblems.objects.get_or_create(account=job.account, problem=problem)
+
+    return submission
+
+def lock_attempt(job):
+    """
+    Lock the job row, returns False once the attempt is not the current one
+    anymore (it timed out and another worker took the job over).
+    """
+    return JudgeJob.objects.select_for_update() \
+        .filter(pk=job.pk, status=JudgeJobStatus.RUNNING, attempts=job.attempts) \
+        .values_list("pk", flat=True) \
+        .first() is not None
+
+def finish_job(job, result, fields, run_time):
+    with transaction.atomic():
+        if not lock_attempt(job):
+            return None
+
+        if fields is not None:
+            job.submission_public_id = record_submission(job, fields).public_id
+
+        job.status = JudgeJobStatus.DONE
+        job.result = result
+        job.error = ""
+        job.finished_at = timezone.now()
+        job.run_time = run_time
+        job.save(update_fields=["status", "result", "submission_public_id", "error", "finished_at", "run_time"])
+    return job.status
+
+def retry_job(job, error, run_time):
+    with transaction.atomic():
+        if not lock_attempt(job):
+            return None
+
+        now = timezone.now()
+        if job.attempts >= settings.JUDGE_MAX_ATTEMPTS:
+            job.status = JudgeJobStatus.FAILED
+            job.finished_at = now
+        else:
+            job.status = JudgeJobStatus.QUEUED
+            job.run_after = now + timedelta(seconds=get_retry_delay(job.attempts))
+
+        job.error = error
+        job.run_time = run_time
+        job.save(update_fields=["status", "finished_at", "run_after", "error", "run_time"])
+    return job.status
+
+def run_job(job):
+    """
+    Judge a claimed job and store its outcome. A failed attempt is queued again
+    with exponential backoff until JUDGE_MAX_ATTEMPTS, then the job fails.
+
+    Returns:
+        JudgeJobStatus: the new status of the job, None when its attempt timed out
+        and was taken over by another worker meanwhile
+    """
+    start = time.monotonic()
+    try:
+        code = job.source.get_text()
+        if job.kind == JudgeJobKind.RUN:
+            result, fields = judge_run(job, code), None
+        else:
+            result, fields = None, judge_code(job.problem, job.language, code)
+    except Exception as ex:
+        if not isinstance(ex, JudgeError):
+            logger.exception("Failed to judge job %s", job.public_id)
+        return retry_job(job, str(ex) or repr(ex), time.monotonic() - start)
+
+    return finish_job(job, result, fields, time.monotonic() - start)
+
+def wait_for_job(job, timeout):
+    """
+    Wait up to ``timeout`` seconds for a worker to finish the job.
+
+    Returns:
+        JudgeJob: the job, refreshed
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        job.refresh_from_db(fields=["status", "result", "submission_public_id", "error"])
+        if job.status in FINISHED_STATUSES or time.monotonic() >= deadline:
+            return job
+        time.sleep(WAIT_INTERVAL)
+
+def purge_jobs(before):
+    """
+    Delete the jobs finished before ``before``, their submissions stay.
+    """
+    return JudgeJob.objects.filter(status__in=FINISHED_STATUSES, finished_at__lt=before).delete()[0]
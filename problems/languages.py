@@ -0,0 +1,73 @@
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from .cache import get_namespace_version
+from .models import Language
+
+LanguageTable = namedtuple("LanguageTable", ["version", "languages", "by_public_id", "by_name", "by_judge_id"])
+
+EMPTY_TABLE = LanguageTable(None, (), MappingProxyType({}), MappingProxyType({}), MappingProxyType({}))
+
+class LanguageRegistry:
+    """
+    Per-process registry of the supported languages, looked up by public id, name
+    or judge id without touching the database.
+
+    The registry holds one immutable table which is replaced as a whole on reload,
+    so readers never see a half-built table and need no lock. It is loaded on
+    first use and reloaded when the "language" cache namespace version changes,
+    which the Language signals bump on every save and delete.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.table = EMPTY_TABLE
+
+    def load(self):
+        with self.lock:
+            version = get_namespace_version("language")
+            languages = tuple(Language.objects.order_by("pk"))
+
+            self.table = LanguageTable(
+                version = version,
+                languages = languages,
+                by_public_id = MappingProxyType({str(language.public_id): language for language in languages}),
+                by_name = MappingProxyType({language.name: language for language in languages}),
+                by_judge_id = MappingProxyType({language.judge_id: language for language in languages})
+            )
+            return self.table
+
+    def get_table(self):
+        table = self.table
+        if table.version is None or table.version != get_namespace_version("language"):
+            table = self.load()
+        return table
+
+    def invalidate(self):
+        self.table = EMPTY_TABLE
+
+    def all(self):
+        return self.get_table().languages
+
+    def get(self, public_id):
+        """
+        Returns the language with the given public id or None.
+        """
+        if not public_id:
+            return None
+        return self.get_table().by_public_id.get(str(public_id))
+
+    def get_by_name(self, name):
+        return self.get_table().by_name.get(name)
+
+    def get_by_judge_id(self, judge_id):
+        return self.get_table().by_judge_id.get(judge_id)
+
+    def resolve(self, value):
+        """
+        Returns the language given by public id or name, None if it is unknown.
+        """
+        return self.get(value) or self.get_by_name(value)
+
+LANGUAGES = LanguageRegistry()
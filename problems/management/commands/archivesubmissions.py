@@ -0,0 +1,46 @@
+import os
+from datetime import datetime, timezone
+from django.core.management.base import BaseCommand, CommandError
+
+from problems.partitions import MONTHS_AHEAD, ensure_partitions, get_archivable_months, archive_month, delete_unused_sources, month_start, add_months
+
+class Command(BaseCommand):
+    help = "Create the upcoming monthly submission partitions and move months older than the given age to compressed archive files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=12, help="Archive months that ended at least this many months ago")
+        parser.add_argument("--output-dir", default="archives", help="Directory of the archive files")
+        parser.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD, help="Number of future monthly partitions to keep ready")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the months that would be archived")
+
+    def handle(self, *args, **options):
+        if options.get("older_than") < 1:
+            raise CommandError("--older-than must be at least 1 month")
+
+        before = add_months(month_start(datetime.now(timezone.utc)), -options.get("older_than"))
+        months = get_archivable_months(before)
+
+        if options.get("dry_run"):
+            for month in months:
+                self.stdout.write(f"Would archive {month:%Y-%m}")
+            self.stdout.write(f"Found {len(months)} month(s) to archive")
+            return
+
+        for name in ensure_partitions(options.get("months_ahead")):
+            self.stdout.write(f"Created partition {name}")
+
+        output_dir = options.get("output_dir")
+        os.makedirs(output_dir, exist_ok=True)
+
+        total = 0
+        for month in months:
+            path = os.path.join(output_dir, f"submissions-{month:%Y-%m}.jsonl.gz")
+            if os.path.exists(path):
+                raise CommandError(f"{path} already exists, refusing to overwrite it")
+
+            count = archive_month(month, path)
+            total += count
+            self.stdout.write(f"Archived {count} submission(s) of {month:%Y-%m}")
+
+        sources = delete_unused_sources()
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} submission(s) from {len(months)} month(s), deleted {sources} unused source(s)"))
@@ -0,0 +1,42 @@
+import time
+from django.db import transaction
+from django.core.management.base import BaseCommand
+
+from problems.models import Submission
+from problems.sources import store_sources, get_digest
+
+CHUNK_SIZE = 1000
+
+class Command(BaseCommand):
+    help = "Move the inline code of submissions to the shared, compressed source table in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Number of submissions moved per transaction")
+
+    def handle(self, *args, **options):
+        chunk_size = options.get("chunk_size")
+        start = time.monotonic()
+        moved = 0
+        last_pk = 0
+
+        while True:
+            # walk by primary key, every chunk is a short transaction of its own
+            with transaction.atomic():
+                rows = list(
+                    Submission.objects.filter(pk__gt=last_pk, source__isnull=True)
+                    .exclude(code="")
+                    .order_by("pk")
+                    .values_list("pk", "code")[:chunk_size]
+                )
+                if not rows:
+                    break
+
+                sources = store_sources(code for _, code in rows)
+                submissions = [Submission(pk=pk, source_id=sources[get_digest(code)], code="") for pk, code in rows]
+                Submission.objects.bulk_update(submissions, ["source", "code"])
+
+            last_pk = rows[-1][0]
+            moved += len(rows)
+            self.stdout.write(f"Moved {moved} submission(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Moved the code of {moved} submission(s) in {time.monotonic() - start:.2f}s"))
@@ -1,36 +1,31 @@
-import json
 from django.core.management.base import BaseCommand, CommandError
-from problems.serializers import CreateProblemSerializer
+from problems.importer import ProblemImporter, InvalidImportError, CHUNK_SIZE
 
 class Command(BaseCommand):
-    help = "Create problems from predefined JSON file"
+    help = "Create (or update) problems from predefined JSON file"
 
     def add_arguments(self, parser):
         parser.add_argument("file")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Number of problems written per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Only validate the file")
 
     def handle(self, *args, **options):
-
-        with open(options.get("file")) as file:
-            data = json.loads(file.read())
-
-        for problem in data:
-            
-            for iter in range(len(problem['solutions'])):
-                problem['solutions'][iter]['complexities'] = []
-
-            for i in range(len(problem['testcases'])):
-                for j in range(len(problem['testcases'][i]['inputs'])):
-                    problem['testcases'][i]['inputs'][j]['value'] = str(problem['testcases'][i]['inputs'][j]['value'])
-
-            print(f"Attempting to add {problem['name']}")
-
-            try:
-                serializer = CreateProblemSerializer(data = problem)
-                if serializer.is_valid():
-                    serializer.create(serializer.validated_data)
-                else:
-                    print(serializer.errors)
-            except Exception as ex:
-                CommandError(f"Failed to create problem {problem['name']}: {ex}")
-
-        print("Command ran successfully ...")
\ No newline at end of file
+        importer = ProblemImporter(chunk_size=options.get("chunk_size"), log=self.stdout.write)
+
+        try:
+            stats = importer.run(options.get("file"), dry_run=options.get("dry_run"))
+        except InvalidImportError as ex:
+            for error in ex.errors:
+                self.stderr.write(error)
+            raise CommandError(f"Nothing imported, {ex}")
+        except (OSError, ValueError) as ex:
+            raise CommandError(f"Failed to read {options.get('file')}: {ex}")
+
+        if options.get("dry_run"):
+            return
+
+        rate = stats["rows"] / stats["seconds"] if stats["seconds"] else stats["rows"]
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['created']} created, {stats['updated']} updated, {stats['unchanged']} unchanged, {stats['unpublished']} unpublished: "
+            f"{stats['rows']} rows in {stats['seconds']:.2f}s ({rate:.0f} rows/sec)"
+        ))
@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+from problems.snapshot import export_snapshot
+
+class Command(BaseCommand):
+    help = "Export the problem catalog (problems, testcases, code, solutions, tags and languages) to a compressed snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Destination file, e.g. catalog.json.gz")
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        counts = export_snapshot(options.get("file"))
+
+        for table, count in counts.items():
+            self.stdout.write(f"{table}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Exported {sum(counts.values())} rows in {time.monotonic() - start:.2f}s"))
@@ -0,0 +1,108 @@
+import os
+import time
+import signal
+import logging
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+
+from problems.models import JudgeJobStatus
+from problems.judging import claim_job, run_job, purge_jobs
+
+logger = logging.getLogger(__name__)
+
+# seconds between two purges of the finished jobs
+PURGE_INTERVAL = 3600
+
+class Command(BaseCommand):
+    help = "Judge the queued runs and submits, with several worker threads claiming jobs concurrently"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=settings.JUDGE_WORKER_THREADS, help="Number of worker threads, start more processes to use more cores")
+        parser.add_argument("--burst", action="store_true", help="Exit once the queue is empty instead of waiting for new jobs")
+
+    def handle(self, *args, **options):
+        threads = options.get("threads")
+        if threads < 1:
+            raise CommandError("--threads must be at least 1")
+
+        self.burst = options.get("burst")
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.counts = {}
+        name = f"{socket.gethostname()}:{os.getpid()}"
+
+        # finish the jobs at hand on SIGTERM/SIGINT, unfinished ones are retried by other workers
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: self.stopping.set())
+
+        self.stdout.write(f"Starting {threads} judge worker thread(s) as {name}")
+        workers = [
+            threading.Thread(target=self.work, args=(f"{name}:{index}",), name=f"judge-worker-{index}", daemon=True)
+            for index in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+
+        start = time.monotonic()
+        last_purge = None
+        while any(worker.is_alive() for worker in workers):
+            if not self.burst and (last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL):
+                self.purge()
+                last_purge = time.monotonic()
+            self.stopping.wait(1)
+
+        for worker in workers:
+            worker.join()
+
+        summary = ", ".join(f"{count} {status.lower()}" for status, count in sorted(self.counts.items())) or "no jobs"
+        self.stdout.write(self.style.SUCCESS(f"Judged {summary} in {time.monotonic() - start:.2f}s"))
+
+    def purge(self):
+        try:
+            count = purge_jobs(timezone.now() - timedelta(days=settings.JUDGE_JOB_RETENTION))
+            if count:
+                self.stdout.write(f"Purged {count} finished job(s)")
+        finally:
+            connection.close()
+
+    def work(self, name):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                try:
+                    job = claim_job(name)
+                    if job is None:
+                        if self.burst:
+                            return
+                        self.stopping.wait(settings.JUDGE_POLL_INTERVAL)
+                        continue
+
+                    status = run_job(job)
+                except Exception:
+                    # e.g. the database went away, an unfinished job is reclaimed once it timed out
+                    logger.exception("Judge worker %s failed", name)
+                    connection.close()
+                    self.stopping.wait(settings.JUDGE_POLL_INTERVAL)
+                    continue
+
+                if status is None:
+                    label = "Taken over"
+                elif status == JudgeJobStatus.QUEUED:
+                    label = "Retried"
+                else:
+                    label = status.label
+                with self.lock:
+                    self.counts[label] = self.counts.get(label, 0) + 1
+
+                self.stdout.write(
+                    f"[{name}] job {job.public_id} ({job.get_kind_display().lower()}, attempt {job.attempts}): {label.lower()}, "
+                    f"waited {job.wait_time:.2f}s, judged in {job.run_time or 0:.2f}s"
+                )
+        finally:
+            connection.close()
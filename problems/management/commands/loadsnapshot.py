@@ -0,0 +1,22 @@
+import time
+from django.db import IntegrityError
+from django.core.management.base import BaseCommand, CommandError
+from problems.snapshot import load_snapshot, SnapshotError
+
+class Command(BaseCommand):
+    help = "Restore the problem catalog from a snapshot created by exportproblems"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file")
+        parser.add_argument("--flush", action="store_true", help="Delete the current catalog first (along with its submissions and votes)")
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        try:
+            counts = load_snapshot(options.get("file"), flush=options.get("flush"))
+        except (SnapshotError, IntegrityError, OSError, ValueError) as ex:
+            raise CommandError(f"Failed to load snapshot: {ex}")
+
+        for table, count in counts.items():
+            self.stdout.write(f"{table}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Restored {sum(counts.values())} rows in {time.monotonic() - start:.2f}s"))
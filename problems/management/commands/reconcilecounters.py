@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models import Count, Q, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.core.management.base import BaseCommand
+
+from problems.models import Problem, Submission, SubmissionStatus, ProblemVote, VoteType
+from problems.cache import invalidate_problem
+
+def count_of(queryset):
+    counts = queryset.values("problem").annotate(count=Count("pk")).values("count")
+    return Coalesce(Subquery(counts), Value(0))
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized submission (and optionally vote) counters of every problem and fix any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drifted problems")
+        parser.add_argument("--votes", action="store_true", help="Also rebuild likes/dislikes from the per-user votes")
+
+    def get_expected(self, with_votes):
+        submissions = Submission.objects.filter(problem=OuterRef("pk"))
+        expected = {
+            # archived submissions are gone from the table, their counts are kept on the problem
+            "total_submissions_count": count_of(submissions) + F("archived_submissions_count"),
+            "accepted_submissions_count": count_of(submissions.filter(status=SubmissionStatus.ACCEPTED)) + F("archived_accepted_count")
+        }
+
+        if with_votes:
+            votes = ProblemVote.objects.filter(problem=OuterRef("pk"))
+            # on top of the counts from before votes were stored per account
+            expected["likes"] = count_of(votes.filter(vote_type=VoteType.LIKE)) + F("legacy_likes")
+            expected["dislikes"] = count_of(votes.filter(vote_type=VoteType.DISLIKE)) + F("legacy_dislikes")
+
+        return expected
+
+    def handle(self, *args, **options):
+        dry_run = options.get("dry_run")
+        expected = self.get_expected(options.get("votes"))
+
+        # find drifted problems with a single query
+        in_sync = Q()
+        for field in expected:
+            in_sync &= Q(**{field: F(f"expected_{field}")})
+
+        drifted = Problem.objects.annotate(**{f"expected_{field}": value for field, value in expected.items()}) \
+            .exclude(in_sync) \
+            .values_list("pk", "public_id", "name")
+
+        if dry_run:
+            for pk, public_id, name in drifted:
+                self.stdout.write(f"Counters of '{name}' have drifted")
+            self.stdout.write(f"Found {len(drifted)} drifted problem(s)")
+            return
+
+        fixed = 0
+        for pk, public_id, name in drifted:
+
+            # lock the row so concurrent submits and vote flushes cannot interleave with the recount
+            with transaction.atomic():
+                Problem.objects.select_for_update().filter(pk=pk).values("pk").first()
+                Problem.objects.filter(pk=pk).update(**expected)
+                invalidate_problem(public_id)
+
+            self.stdout.write(f"Reconciled '{name}'")
+            fixed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} problem(s)"))
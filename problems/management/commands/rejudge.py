@@ -0,0 +1,127 @@
+import os
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from problems.models import Problem, SubmissionStatus
+from problems.languages import LANGUAGES
+from problems.judging import JudgeError
+from problems.rejudge import RateLimiter, get_rejudge_queryset, iter_chunks, load_problems, judge_submission, apply_verdicts
+
+STATUSES = {status.name.lower(): status for status in SubmissionStatus}
+
+def parse_day(value):
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value}, expected YYYY-MM-DD")
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+def format_eta(seconds):
+    return str(timedelta(seconds=int(seconds)))
+
+class Command(BaseCommand):
+    help = "Judge the selected submissions again (e.g. after fixing a test case) and update their verdicts, solved problems and stats"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--problem", action="append", default=[], help="Public id of a problem to rejudge, repeatable")
+        parser.add_argument("--language", action="append", default=[], help="Public id or name of a language to rejudge, repeatable")
+        parser.add_argument("--status", action="append", default=[], choices=STATUSES.keys(), help="Current verdict to rejudge, repeatable")
+        parser.add_argument("--since", help="Only submissions of this day (YYYY-MM-DD, UTC) or later")
+        parser.add_argument("--until", help="Only submissions of this day (YYYY-MM-DD, UTC) or earlier")
+        parser.add_argument("--concurrency", type=int, default=4, help="Number of batches sent to the judge in parallel")
+        parser.add_argument("--rate", type=float, default=0, help="Maximum test case runs per second sent to the judge, unlimited by default")
+        parser.add_argument("--chunk-size", type=int, default=100, help="Number of submissions written (and checkpointed) at once")
+        parser.add_argument("--state-file", default="rejudge.state.json", help="Progress file an interrupted rejudge resumes from")
+        parser.add_argument("--restart", action="store_true", help="Ignore the progress of an interrupted rejudge")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the submissions to rejudge")
+
+    def handle(self, *args, **options):
+        if options.get("concurrency") < 1 or options.get("chunk_size") < 1:
+            raise CommandError("--concurrency and --chunk-size must be at least 1")
+        if options.get("rate") < 0:
+            raise CommandError("--rate must not be negative")
+
+        filters = {key: options.get(key) for key in ("problem", "language", "status", "since", "until")}
+        submissions = self.get_queryset(filters)
+
+        state_file = options.get("state_file")
+        state = {"filters": filters, "last_id": 0, "rejudged": 0, "changed": 0}
+        if os.path.exists(state_file) and not options.get("restart"):
+            with open(state_file) as file:
+                saved = json.load(file)
+            if saved.get("filters") != filters:
+                raise CommandError(f"{state_file} belongs to a rejudge of other submissions, pass --restart or another --state-file")
+            state = saved
+            self.stdout.write(f"Resuming after submission {state['last_id']} ({state['rejudged']} already rejudged)")
+
+        remaining = submissions.filter(pk__gt=state["last_id"]).count()
+        if options.get("dry_run"):
+            self.stdout.write(f"Found {remaining} submission(s) to rejudge")
+            return
+
+        total = state["rejudged"] + remaining
+        limiter = RateLimiter(options.get("rate"))
+        problems = {}
+        start = time.monotonic()
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=options.get("concurrency"), thread_name_prefix="rejudge") as executor:
+            for chunk in iter_chunks(submissions, state["last_id"], options.get("chunk_size")):
+                problems.update(load_problems({submission.problem_id for submission in chunk} - problems.keys()))
+
+                try:
+                    results = executor.map(lambda submission: judge_submission(submission, problems[submission.problem_id], limiter), chunk)
+                    verdicts = list(zip(chunk, results))
+                except JudgeError as ex:
+                    raise CommandError(f"The judge failed ({ex}), run the command again to resume after submission {state['last_id']}")
+
+                state["changed"] += apply_verdicts(verdicts, problems)
+                state["rejudged"] += len(chunk)
+                state["last_id"] = chunk[-1].pk
+                self.save_state(state_file, state)
+
+                done += len(chunk)
+                elapsed = time.monotonic() - start
+                rate = done / elapsed if elapsed else 0
+                eta = format_eta((remaining - done) / rate) if rate else "-"
+                self.stdout.write(f"Rejudged {state['rejudged']}/{total} submission(s), {state['changed']} verdict(s) changed, {rate:.1f}/s, ETA {eta}")
+
+        if os.path.exists(state_file):
+            os.remove(state_file)
+        self.stdout.write(self.style.SUCCESS(f"Rejudged {state['rejudged']} submission(s), {state['changed']} verdict(s) changed in {time.monotonic() - start:.2f}s"))
+
+    def get_queryset(self, filters):
+        problem_ids = []
+        if filters["problem"]:
+            try:
+                problem_ids = list(Problem.objects.filter(public_id__in=filters["problem"]).values_list("pk", flat=True))
+            except ValidationError:
+                problem_ids = []
+            if len(problem_ids) != len(set(filters["problem"])):
+                raise CommandError("Unknown problem id")
+
+        language_ids = []
+        for value in filters["language"]:
+            language = LANGUAGES.resolve(value)
+            if not language:
+                raise CommandError(f"Unknown language {value}")
+            language_ids.append(language.pk)
+
+        return get_rejudge_queryset(
+            problem_ids = problem_ids,
+            language_ids = language_ids,
+            statuses = [STATUSES[status] for status in filters["status"]],
+            since = parse_day(filters["since"]) if filters["since"] else None,
+            until = parse_day(filters["until"]) + timedelta(days=1) if filters["until"] else None
+        )
+
+    def save_state(self, path, state):
+        # written aside and renamed, an interrupted write never corrupts the progress
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(state, file)
+        os.replace(f"{path}.tmp", path)
@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from problems.models import Problem
+from problems.judging import JudgeError
+from problems.rejudge import RateLimiter
+from problems.verification import CONCURRENCY, load_problems, get_implementations, verify_problems
+
+CHUNK_SIZE = 50
+
+class Command(BaseCommand):
+    help = "Run the reference implementations of problems against all of their test cases and record the runtime and memory baselines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("problems", nargs="*", help="Public ids of the problems to verify (the whole catalog by default)")
+        parser.add_argument("--unpublished", action="store_true", help="Only verify unpublished problems")
+        parser.add_argument("--publish", action="store_true", help="Publish the verified problems which passed")
+        parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Number of implementations judged in parallel")
+        parser.add_argument("--rate", type=float, default=0, help="Maximum test case runs per second sent to the judge, unlimited by default")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Number of problems loaded and recorded at once")
+
+    def handle(self, *args, **options):
+        if options.get("concurrency") < 1 or options.get("chunk_size") < 1:
+            raise CommandError("--concurrency and --chunk-size must be at least 1")
+
+        problems = Problem.objects.all()
+        if options.get("problems"):
+            try:
+                problems = problems.filter(public_id__in=options.get("problems"))
+                found = problems.count()
+            except ValidationError:
+                found = 0
+            if found != len(set(options.get("problems"))):
+                raise CommandError("Unknown problem id")
+        if options.get("unpublished"):
+            problems = problems.filter(published=False)
+
+        problem_ids = list(problems.order_by("pk").values_list("pk", flat=True))
+        chunk_size = options.get("chunk_size")
+        limiter = RateLimiter(options.get("rate"))
+        start = time.monotonic()
+        verified = implementations = failed = published = 0
+
+        with ThreadPoolExecutor(max_workers=options.get("concurrency"), thread_name_prefix="verify") as executor:
+            for index in range(0, len(problem_ids), chunk_size):
+                chunk = load_problems(problem_ids[index:index + chunk_size])
+                try:
+                    errors = verify_problems(chunk, executor, limiter)
+                except JudgeError as ex:
+                    raise CommandError(f"The judge failed: {ex}")
+
+                for problem in chunk:
+                    implementations += len(get_implementations(problem))
+                    if errors[problem.pk]:
+                        failed += 1
+                        for error in errors[problem.pk]:
+                            self.stderr.write(error)
+                    elif options.get("publish") and not problem.published:
+                        problem.published = True
+                        problem.save(update_fields=["published"])
+                        published += 1
+
+                verified += len(chunk)
+                self.stdout.write(f"Verified {verified}/{len(problem_ids)} problem(s)")
+
+        summary = f"Verified {verified} problem(s) with {implementations} implementation(s) in {time.monotonic() - start:.2f}s, published {published}"
+        if failed:
+            raise CommandError(f"{summary}, {failed} problem(s) failed")
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,31 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from problems.warmup import warm_caches
+
+class Command(BaseCommand):
+    help = "Preload the language registry, tag index, problem list and the payloads and judge harnesses of the most popular problems"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=settings.WARM_CACHES_TOP, help="Number of popular problems to warm")
+        parser.add_argument("--days", type=int, default=settings.WARM_CACHES_DAYS, help="Rank problems by their submissions over this many days")
+        parser.add_argument("--list-url", action="append", help="Absolute url of a problem list page to warm, repeatable (WARM_CACHES_LIST_URLS by default)")
+
+    def handle(self, *args, **options):
+        if options.get("top") < 0 or options.get("days") < 1:
+            raise CommandError("--top must not be negative and --days must be at least 1")
+
+        start = time.monotonic()
+        try:
+            steps = warm_caches(
+                top = options.get("top"),
+                days = options.get("days"),
+                list_urls = options.get("list_url") or settings.WARM_CACHES_LIST_URLS,
+                log = self.stdout.write
+            )
+        except ValueError as ex:
+            raise CommandError(str(ex))
+
+        size = sum(step[2] for step in steps)
+        self.stdout.write(self.style.SUCCESS(f"Warmed {len(steps)} cache step(s), {size / 1024:.1f} KB in {time.monotonic() - start:.2f}s"))
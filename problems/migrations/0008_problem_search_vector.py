@@ -0,0 +1,55 @@
+# Generated by Django 5.0.7 on 2026-10-19 13:58
+
+import django.contrib.postgres.search
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    from django.contrib.postgres.aggregates import StringAgg
+    from django.contrib.postgres.search import SearchVector
+
+    Problem = apps.get_model("problems", "Problem")
+    ProblemTag = apps.get_model("problems", "ProblemTag")
+
+    tag_names = ProblemTag.objects.filter(problem__public_id=OuterRef("public_id")) \
+        .values("problem") \
+        .annotate(names=StringAgg("tag__name", delimiter=" ")) \
+        .values("names")
+
+    Problem.objects.update(search_vector=(
+        SearchVector("name", weight="A", config="english") +
+        SearchVector(Subquery(tag_names), weight="B", config="english") +
+        SearchVector("description", weight="C", config="english")
+    ))
+
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS problems_problem_search_vector_gin "
+        "ON problems_problem USING gin (search_vector)"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS problems_problem_search_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0007_alter_problem_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # the GIN index is postgres only, SQLite dev databases use the in-process index
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
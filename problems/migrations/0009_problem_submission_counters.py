@@ -0,0 +1,43 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Problem = apps.get_model("problems", "Problem")
+    Submission = apps.get_model("problems", "Submission")
+
+    def count(**filters):
+        counts = Submission.objects.filter(problem__public_id=OuterRef("public_id"), **filters) \
+            .values("problem") \
+            .annotate(count=Count("pk")) \
+            .values("count")
+        return Coalesce(Subquery(counts), Value(0))
+
+    Problem.objects.update(
+        total_submissions_count=count(),
+        accepted_submissions_count=count(status=1)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0008_problem_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='accepted_submissions_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='total_submissions_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
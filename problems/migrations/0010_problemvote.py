@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:04
+
+import django.db.models.deletion
+import django.utils.timezone
+import problems.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0009_problem_submission_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProblemVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.UUIDField(default=problems.models.generate_default_uuid, unique=True)),
+                ('vote_type', models.IntegerField(choices=[(0, 'Like'), (1, 'Dislike')])),
+                ('date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to=settings.AUTH_USER_MODEL, to_field='public_id')),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='problems.problem', to_field='public_id')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='problemvote',
+            constraint=models.UniqueConstraint(fields=('problem', 'account'), name='unique_problem_vote_per_account'),
+        ),
+    ]
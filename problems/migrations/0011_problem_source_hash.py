@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0010_problemvote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='source_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0011_problem_source_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='problem',
+            index=models.Index(condition=models.Q(('published', True)), fields=['difficulty', 'name', 'id'], name='problem_published_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['problem', '-date'], name='submission_problem_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['account', '-date'], name='submission_account_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['account', 'status'], name='submission_account_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testcase',
+            index=models.Index(fields=['problem', 'is_sample'], name='testcase_problem_sample_idx'),
+        ),
+        # the composite indexes above lead with these foreign keys
+        migrations.AlterField(
+            model_name='submission',
+            name='account',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to=settings.AUTH_USER_MODEL, to_field='public_id'),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='problem',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='problems.problem', to_field='public_id'),
+        ),
+        migrations.AlterField(
+            model_name='testcase',
+            name='problem',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='testcases', to='problems.problem', to_field='public_id'),
+        ),
+    ]
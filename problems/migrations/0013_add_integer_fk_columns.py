@@ -0,0 +1,92 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    First step of moving the foreign keys from public_id (uuid) to the integer
+    primary key: add a plain integer column next to every foreign key.
+    """
+
+    dependencies = [
+        ('problems', '0012_tune_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='code',
+            name='language_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='code',
+            name='problem_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='complexity',
+            name='solution_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='implementation',
+            name='language_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='implementation',
+            name='solution_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='problemtag',
+            name='problem_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='problemtag',
+            name='tag_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='problemvote',
+            name='account_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='problemvote',
+            name='problem_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='solution',
+            name='problem_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='account_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='language_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='problem_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='problem_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='valuefield',
+            name='testcase_pk',
+            field=models.BigIntegerField(null=True),
+        ),
+    ]
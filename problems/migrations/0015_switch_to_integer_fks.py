@@ -0,0 +1,268 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0014_backfill_integer_fks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # indexes and constraints over the old columns are rebuilt at the end
+        migrations.RemoveIndex(
+            model_name='submission',
+            name='submission_problem_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='submission',
+            name='submission_account_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='submission',
+            name='submission_account_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='testcase',
+            name='testcase_problem_sample_idx',
+        ),
+        migrations.RemoveConstraint(
+            model_name='problemvote',
+            name='unique_problem_vote_per_account',
+        ),
+        # drop the uuid columns, then turn the integer columns into the foreign keys
+        migrations.RemoveField(
+            model_name='code',
+            name='language',
+        ),
+        migrations.RemoveField(
+            model_name='code',
+            name='problem',
+        ),
+        migrations.RemoveField(
+            model_name='complexity',
+            name='solution',
+        ),
+        migrations.RemoveField(
+            model_name='implementation',
+            name='language',
+        ),
+        migrations.RemoveField(
+            model_name='implementation',
+            name='solution',
+        ),
+        migrations.RemoveField(
+            model_name='problemtag',
+            name='problem',
+        ),
+        migrations.RemoveField(
+            model_name='problemtag',
+            name='tag',
+        ),
+        migrations.RemoveField(
+            model_name='problemvote',
+            name='account',
+        ),
+        migrations.RemoveField(
+            model_name='problemvote',
+            name='problem',
+        ),
+        migrations.RemoveField(
+            model_name='solution',
+            name='problem',
+        ),
+        migrations.RemoveField(
+            model_name='submission',
+            name='account',
+        ),
+        migrations.RemoveField(
+            model_name='submission',
+            name='language',
+        ),
+        migrations.RemoveField(
+            model_name='submission',
+            name='problem',
+        ),
+        migrations.RemoveField(
+            model_name='testcase',
+            name='problem',
+        ),
+        migrations.RemoveField(
+            model_name='valuefield',
+            name='testcase',
+        ),
+        migrations.RenameField(
+            model_name='code',
+            old_name='language_pk',
+            new_name='language',
+        ),
+        migrations.RenameField(
+            model_name='code',
+            old_name='problem_pk',
+            new_name='problem',
+        ),
+        migrations.RenameField(
+            model_name='complexity',
+            old_name='solution_pk',
+            new_name='solution',
+        ),
+        migrations.RenameField(
+            model_name='implementation',
+            old_name='language_pk',
+            new_name='language',
+        ),
+        migrations.RenameField(
+            model_name='implementation',
+            old_name='solution_pk',
+            new_name='solution',
+        ),
+        migrations.RenameField(
+            model_name='problemtag',
+            old_name='problem_pk',
+            new_name='problem',
+        ),
+        migrations.RenameField(
+            model_name='problemtag',
+            old_name='tag_pk',
+            new_name='tag',
+        ),
+        migrations.RenameField(
+            model_name='problemvote',
+            old_name='account_pk',
+            new_name='account',
+        ),
+        migrations.RenameField(
+            model_name='problemvote',
+            old_name='problem_pk',
+            new_name='problem',
+        ),
+        migrations.RenameField(
+            model_name='solution',
+            old_name='problem_pk',
+            new_name='problem',
+        ),
+        migrations.RenameField(
+            model_name='submission',
+            old_name='account_pk',
+            new_name='account',
+        ),
+        migrations.RenameField(
+            model_name='submission',
+            old_name='language_pk',
+            new_name='language',
+        ),
+        migrations.RenameField(
+            model_name='submission',
+            old_name='problem_pk',
+            new_name='problem',
+        ),
+        migrations.RenameField(
+            model_name='testcase',
+            old_name='problem_pk',
+            new_name='problem',
+        ),
+        migrations.RenameField(
+            model_name='valuefield',
+            old_name='testcase_pk',
+            new_name='testcase',
+        ),
+        migrations.AlterField(
+            model_name='code',
+            name='language',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='codes', to='problems.language'),
+        ),
+        migrations.AlterField(
+            model_name='code',
+            name='problem',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='defaultCode', to='problems.problem'),
+        ),
+        migrations.AlterField(
+            model_name='complexity',
+            name='solution',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='complexities', to='problems.solution'),
+        ),
+        migrations.AlterField(
+            model_name='implementation',
+            name='language',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='implementations', to='problems.language'),
+        ),
+        migrations.AlterField(
+            model_name='implementation',
+            name='solution',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='implementations', to='problems.solution'),
+        ),
+        migrations.AlterField(
+            model_name='problemtag',
+            name='problem',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='problems.problem'),
+        ),
+        migrations.AlterField(
+            model_name='problemtag',
+            name='tag',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='problems.tag'),
+        ),
+        migrations.AlterField(
+            model_name='problemvote',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='problemvote',
+            name='problem',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='problems.problem'),
+        ),
+        migrations.AlterField(
+            model_name='solution',
+            name='problem',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='solutions', to='problems.problem'),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='account',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='language',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='problems.language'),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='problem',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='problems.problem'),
+        ),
+        migrations.AlterField(
+            model_name='testcase',
+            name='problem',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='testcases', to='problems.problem'),
+        ),
+        migrations.AlterField(
+            model_name='valuefield',
+            name='testcase',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inputs', to='problems.testcase'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['problem', '-date'], name='submission_problem_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['account', '-date'], name='submission_account_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['account', 'status'], name='submission_account_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testcase',
+            index=models.Index(fields=['problem', 'is_sample'], name='testcase_problem_sample_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='problemvote',
+            constraint=models.UniqueConstraint(fields=('problem', 'account'), name='unique_problem_vote_per_account'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0015_switch_to_integer_fks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='submission',
+            name='submission_problem_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='submission',
+            name='submission_account_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['problem', '-date', '-id'], name='submission_problem_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['account', '-date', '-id'], name='submission_account_date_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0016_submission_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('compression', models.IntegerField(choices=[(0, 'None'), (1, 'Zlib')], default=1)),
+                ('data', models.BinaryField()),
+                ('size', models.IntegerField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='code',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='source',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='submissions', to='problems.sourcecode'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:30
+
+import problems.models
+from datetime import datetime, timezone
+from django.db import migrations, models
+
+from problems.partitions import MONTHS_AHEAD, add_months, month_start, iter_months, create_partition, default_partition_name
+
+TABLE = "problems_submission"
+
+
+def partition_submissions(apps, schema_editor):
+    # sqlite (development, tests) keeps the plain table
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        # indexes and foreign keys are recreated under the same names on the new table
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u'))",
+            [TABLE, TABLE]
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [TABLE])
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{TABLE}_old"')
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{TABLE}_old" INCLUDING DEFAULTS) PARTITION BY RANGE (date)')
+        cursor.execute(f'CREATE TABLE "{default_partition_name(TABLE)}" PARTITION OF "{TABLE}" DEFAULT')
+
+        now = datetime.now(timezone.utc)
+        cursor.execute(f'SELECT min(date) FROM "{TABLE}_old"')
+        first = cursor.fetchone()[0] or now
+        for month in iter_months(first, add_months(month_start(now), MONTHS_AHEAD)):
+            create_partition(cursor, month, TABLE)
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{TABLE}_old"')
+        cursor.execute(f'DROP TABLE "{TABLE}_old"')
+
+        # the partition key has to be part of the primary key
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, date)')
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+        # identity columns are not supported on partitioned tables before postgres 17
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}".id')
+        cursor.execute(f"ALTER TABLE \"{TABLE}\" ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+        cursor.execute(f"SELECT setval('{TABLE}_id_seq', COALESCE(max(id), 0) + 1, false) FROM \"{TABLE}\"")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0017_submission_source_code'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='submission',
+            name='public_id',
+            field=models.UUIDField(db_index=True, default=problems.models.generate_default_uuid),
+        ),
+        migrations.RunPython(partition_submissions, migrations.RunPython.noop),
+    ]
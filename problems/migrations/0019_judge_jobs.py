@@ -0,0 +1,45 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:33
+
+import django.db.models.deletion
+import django.utils.timezone
+import problems.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0018_partition_submissions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JudgeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.UUIDField(default=problems.models.generate_default_uuid, unique=True)),
+                ('kind', models.IntegerField(choices=[(1, 'Run'), (2, 'Submit')])),
+                ('status', models.IntegerField(choices=[(1, 'Queued'), (2, 'Running'), (3, 'Done'), (4, 'Failed')], default=1)),
+                ('attempts', models.IntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('worker', models.CharField(blank=True, default='', max_length=100)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('submission_public_id', models.UUIDField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('wait_time', models.FloatField(blank=True, null=True)),
+                ('run_time', models.FloatField(blank=True, null=True)),
+                ('account', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='judge_jobs', to=settings.AUTH_USER_MODEL)),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='judge_jobs', to='problems.language')),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='judge_jobs', to='problems.problem')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='judge_jobs', to='problems.sourcecode')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status__in', [1, 2])), fields=['status', 'run_after'], name='judgejob_pending_idx'), models.Index(fields=['finished_at'], name='judgejob_finished_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0019_judge_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProblemBaseline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('passed', models.BooleanField(default=False)),
+                ('implementations_count', models.IntegerField(default=0)),
+                ('time', models.FloatField(blank=True, null=True)),
+                ('memory', models.FloatField(blank=True, null=True)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('verified_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='baselines', to='problems.language')),
+                ('problem', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='baselines', to='problems.problem')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='problembaseline',
+            constraint=models.UniqueConstraint(fields=('problem', 'language'), name='unique_baseline_per_problem_language'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0021_problem_published_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='archived_accepted_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='archived_submissions_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
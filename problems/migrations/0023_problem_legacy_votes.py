@@ -0,0 +1,42 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:53
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+# (counter, legacy counter, vote type)
+COUNTERS = [
+    ('likes', 'legacy_likes', 0),
+    ('dislikes', 'legacy_dislikes', 1),
+]
+
+
+def keep_legacy_votes(apps, schema_editor):
+    # the share of each counter no vote row accounts for was counted before votes were stored
+    Problem = apps.get_model('problems', 'problem')
+    ProblemVote = apps.get_model('problems', 'problemvote')
+    for counter, legacy, vote_type in COUNTERS:
+        votes = ProblemVote.objects.filter(problem=OuterRef('pk'), vote_type=vote_type) \
+            .values('problem').annotate(count=Count('pk')).values('count')
+        Problem.objects.update(**{legacy: Greatest(F(counter) - Coalesce(Subquery(votes), Value(0)), Value(0))})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0022_problem_archived_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='legacy_dislikes',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='legacy_likes',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(keep_legacy_votes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0023_problem_legacy_votes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sourcecode',
+            name='last_used_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
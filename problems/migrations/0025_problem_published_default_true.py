@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0024_sourcecode_last_used_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='problem',
+            name='published',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -1,5 +1,8 @@
+import zlib
 from datetime import datetime
 from django.db import models
+from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
 from uuid import uuid4
 
 from accounts.models import Account
@@ -27,6 +30,10 @@ class FieldType(models.IntegerChoices):
     BOOLEAN = 7, "Boolean"
     FLOAT = 8, "Float"
 
+class VoteType(models.IntegerChoices):
+    LIKE = (0, "Like")
+    DISLIKE = (1, "Dislike")
+
 class SubmissionStatus(models.IntegerChoices):
     ACCEPTED = 1, "Accepted"
     REJECTED = 2, "Rejected"
@@ -37,20 +44,45 @@ class Problem(models.Model):
     name = models.CharField(max_length=100, unique=True)
     likes = models.IntegerField(default=0)
     dislikes = models.IntegerField(default=0)
+    # likes/dislikes counted before votes were stored per account, reconcilecounters --votes keeps them
+    legacy_likes = models.IntegerField(default=0, editable=False)
+    legacy_dislikes = models.IntegerField(default=0, editable=False)
     difficulty = models.IntegerField(choices=DifficultyChoices.choices)
     description = models.TextField()
     constraints = models.TextField()
     tags = models.ManyToManyField("Tag", through="ProblemTag")
     published = models.BooleanField(default=True)
 
+    # denormalized submission counters, updated with F() expressions on submit
+    # and repaired by the reconcilecounters command
+    accepted_submissions_count = models.IntegerField(default=0)
+    total_submissions_count = models.IntegerField(default=0)
+
+    # share of the counters above whose submissions were archived (see problems/partitions.py),
+    # reconcilecounters adds them to what it counts in the submissions table
+    archived_submissions_count = models.IntegerField(default=0)
+    archived_accepted_count = models.IntegerField(default=0)
+
+    # weighted name/tags/description vector, maintained by problems.search (postgres only)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # hash of the import entry the problem was last written from, lets re-imports skip it
+    source_hash = models.CharField(max_length=40, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # the catalog listing: published problems by difficulty in list order
+            models.Index(fields=["difficulty", "name", "id"], condition=models.Q(published=True), name="problem_published_order_idx")
+        ]
+
     def __str__(self) -> str:
         return self.name
     
     def get_total_accepted_submissions_count(self):
-        return len(self.submissions.filter(status=SubmissionStatus.ACCEPTED).all())
+        return self.accepted_submissions_count
 
     def get_total_submissions_count(self):
-        return len(self.submissions.all())
+        return self.total_submissions_count
     
     def get_global_acceptance_rate(self):
         acceptance = self.get_total_accepted_submissions_count()
@@ -61,6 +93,18 @@ class Problem(models.Model):
 
         return str(round((acceptance / total) * 100, 2)) + "%"
     
+class ProblemVote(models.Model):
+    public_id = models.UUIDField(default=generate_default_uuid, unique=True)
+    problem = models.ForeignKey(Problem, related_name="votes", on_delete=models.CASCADE)
+    account = models.ForeignKey(Account, related_name="votes", on_delete=models.CASCADE)
+    vote_type = models.IntegerField(choices=VoteType.choices)
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["problem", "account"], name="unique_problem_vote_per_account")
+        ]
+
 class Tag(models.Model):
     public_id = models.UUIDField(default=generate_default_uuid, unique=True)
     name = models.CharField(max_length=100)
@@ -70,8 +114,8 @@ class Tag(models.Model):
     
 class ProblemTag(models.Model):
     public_id = models.UUIDField(default=generate_default_uuid, unique=True)
-    problem = models.ForeignKey(Problem, to_field="public_id", on_delete=models.CASCADE)
-    tag = models.ForeignKey(Tag, to_field="public_id", on_delete=models.CASCADE)
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
 
     def __str__(self) -> str:
         return f"{self.problem.name} - {self.tag.name}"
@@ -81,7 +125,7 @@ class ValueField(models.Model):
     name = models.CharField(max_length=20)
     type = models.IntegerField(choices=FieldType.choices)
     value = models.TextField(null=True)
-    testcase = models.ForeignKey("TestCase", related_name="inputs", to_field="public_id", on_delete=models.CASCADE, null=True)
+    testcase = models.ForeignKey("TestCase", related_name="inputs", on_delete=models.CASCADE, null=True)
 
     def __str__(self):
         return f"{self.testcase.problem}_{self.name}_{self.value}"
@@ -96,26 +140,31 @@ class Language(models.Model):
 
 class TestCase(models.Model):
     public_id = models.UUIDField(default=generate_default_uuid, unique=True)
-    problem = models.ForeignKey(Problem, related_name="testcases", to_field="public_id", on_delete=models.CASCADE, null=True)
+    problem = models.ForeignKey(Problem, related_name="testcases", on_delete=models.CASCADE, null=True, db_index=False)
     is_sample = models.BooleanField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["problem", "is_sample"], name="testcase_problem_sample_idx")
+        ]
+
 class Code(models.Model):
     public_id = models.UUIDField(default=generate_default_uuid, unique=True)
-    language = models.ForeignKey(Language, related_name="codes", to_field="public_id", on_delete=models.CASCADE)
-    problem = models.ForeignKey(Problem, related_name="defaultCode", to_field="public_id", on_delete=models.CASCADE)
+    language = models.ForeignKey(Language, related_name="codes", on_delete=models.CASCADE)
+    problem = models.ForeignKey(Problem, related_name="defaultCode", on_delete=models.CASCADE)
     value = models.TextField(null=True)
 
 class Solution(models.Model):
     public_id = models.UUIDField(default=generate_default_uuid, unique=True)
-    problem = models.ForeignKey(Problem, to_field="public_id", related_name="solutions", on_delete=models.CASCADE, null=True)
+    problem = models.ForeignKey(Problem, related_name="solutions", on_delete=models.CASCADE, null=True)
     name = models.CharField(max_length=100)
     intution = models.TextField(null=True)
     algorithm = models.TextField(null=True)
 
 class Implementation(models.Model):
     public_id = models.UUIDField(default=generate_default_uuid, unique=True)
-    language = models.ForeignKey(Language, related_name="implementations", to_field="public_id", on_delete=models.CASCADE)
-    solution = models.ForeignKey(Solution, related_name="implementations", to_field="public_id", on_delete=models.CASCADE)
+    language = models.ForeignKey(Language, related_name="implementations", on_delete=models.CASCADE)
+    solution = models.ForeignKey(Solution, related_name="implementations", on_delete=models.CASCADE)
     value = models.TextField(null=True)
 
 class Complexity(models.Model):
@@ -123,20 +172,144 @@ class Complexity(models.Model):
     value = models.CharField(max_length=20)
     explanation = models.TextField()
     type = models.IntegerField(choices=ComplexityType.choices)
-    solution = models.ForeignKey(Solution, related_name="complexities", to_field="public_id", on_delete=models.CASCADE)
+    solution = models.ForeignKey(Solution, related_name="complexities", on_delete=models.CASCADE)
+
+class ProblemBaseline(models.Model):
+    """
+    Outcome of running the reference implementations of a problem in one language
+    against all of its test cases (see problems/verification.py). The runtime and
+    memory of the slowest implementation are the baseline of the language.
+    """
+    # indexed by the (problem, language) unique constraint
+    problem = models.ForeignKey(Problem, related_name="baselines", on_delete=models.CASCADE, db_index=False)
+    language = models.ForeignKey(Language, related_name="baselines", on_delete=models.CASCADE)
+
+    passed = models.BooleanField(default=False)
+    implementations_count = models.IntegerField(default=0)
+
+    # average seconds and memory (KB) per test case
+    time = models.FloatField(null=True, blank=True)
+    memory = models.FloatField(null=True, blank=True)
+
+    # what the failing implementations did wrong
+    errors = models.JSONField(default=list, blank=True)
+    verified_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["problem", "language"], name="unique_baseline_per_problem_language")
+        ]
+
+class SourceCompression(models.IntegerChoices):
+    NONE = 0
+    ZLIB = 1
+
+class SourceCode(models.Model):
+    """
+    A submitted source body, stored once per distinct content (see problems/sources.py).
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    compression = models.IntegerField(choices=SourceCompression.choices, default=SourceCompression.ZLIB)
+    data = models.BinaryField()
+    size = models.IntegerField()
+    # refreshed when a submission or job reuses the body, unused bodies are only deleted
+    # once this is old enough that no submit can still be about to refer to them
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    def get_text(self):
+        data = bytes(self.data)
+        if self.compression == SourceCompression.ZLIB:
+            data = zlib.decompress(data)
+        return data.decode("utf-8")
 
 class Submission(models.Model):
-    public_id = models.UUIDField(default=generate_default_uuid, unique=True)
-    problem = models.ForeignKey(Problem, to_field="public_id", related_name="submissions", on_delete=models.CASCADE, null=True)
-    account = models.ForeignKey(Account, to_field="public_id", related_name="submissions", on_delete=models.CASCADE, null=True)
+    """
+    On postgres the table is partitioned by month of ``date`` (see problems/partitions.py),
+    unique constraints there would have to include the date, so public_id is only indexed.
+    """
+    public_id = models.UUIDField(default=generate_default_uuid, db_index=True)
+    # both foreign keys are indexed by the composite indexes below
+    problem = models.ForeignKey(Problem, related_name="submissions", on_delete=models.CASCADE, null=True, db_index=False)
+    account = models.ForeignKey(Account, related_name="submissions", on_delete=models.CASCADE, null=True, db_index=False)
 
     status = models.IntegerField(choices=SubmissionStatus.choices)
-    code = models.TextField()
-    language = models.ForeignKey(Language, related_name="submissions", to_field="public_id", on_delete=models.CASCADE)
+
+    # code is only filled for rows not yet moved to the shared source table
+    code = models.TextField(blank=True, default="")
+    source = models.ForeignKey(SourceCode, related_name="submissions", on_delete=models.PROTECT, null=True, blank=True)
+
+    language = models.ForeignKey(Language, related_name="submissions", on_delete=models.CASCADE)
     time = models.CharField(max_length=100)
     memory = models.IntegerField()
     date = models.DateTimeField(default=datetime.now)
     time_percent = models.FloatField()
     memory_percent = models.FloatField()
     error_string = models.TextField(null=True, blank=True)
-    reject_details = models.JSONField(null=True, blank=True)
\ No newline at end of file
+    reject_details = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # id breaks date ties for the keyset pagination of the listings
+            models.Index(fields=["problem", "-date", "-id"], name="submission_problem_date_idx"),
+            models.Index(fields=["account", "-date", "-id"], name="submission_account_date_idx"),
+            models.Index(fields=["account", "status"], name="submission_account_status_idx")
+        ]
+
+    def get_code(self):
+        if self.source_id:
+            return self.source.get_text()
+        return self.code
+
+class JudgeJobKind(models.IntegerChoices):
+    RUN = 1, "Run"
+    SUBMIT = 2, "Submit"
+
+class JudgeJobStatus(models.IntegerChoices):
+    QUEUED = 1, "Queued"
+    RUNNING = 2, "Running"
+    DONE = 3, "Done"
+    FAILED = 4, "Failed"
+
+class JudgeJob(models.Model):
+    """
+    A run or submit waiting for (or judged by) a ``judgeworker``, see problems/judging.py.
+
+    The submission is created once the job is done and only referenced by its
+    public id, nothing can hold a foreign key to the partitioned submissions table.
+    """
+    public_id = models.UUIDField(default=generate_default_uuid, unique=True)
+    kind = models.IntegerField(choices=JudgeJobKind.choices)
+    status = models.IntegerField(choices=JudgeJobStatus.choices, default=JudgeJobStatus.QUEUED)
+
+    problem = models.ForeignKey(Problem, related_name="judge_jobs", on_delete=models.CASCADE)
+    account = models.ForeignKey(Account, related_name="judge_jobs", on_delete=models.CASCADE, null=True)
+    language = models.ForeignKey(Language, related_name="judge_jobs", on_delete=models.CASCADE)
+    source = models.ForeignKey(SourceCode, related_name="judge_jobs", on_delete=models.PROTECT)
+
+    attempts = models.IntegerField(default=0)
+    # not claimed before, pushed back after every failed attempt
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, blank=True, default="")
+
+    # result of a run, the public id of the created submission of a submit
+    result = models.JSONField(null=True, blank=True)
+    submission_public_id = models.UUIDField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    # timings of the last attempt: time spent queued and judging, in seconds
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    wait_time = models.FloatField(null=True, blank=True)
+    run_time = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the claim query of the workers, only over the few unfinished jobs
+            models.Index(
+                fields=["status", "run_after"],
+                name="judgejob_pending_idx",
+                condition=models.Q(status__in=[JudgeJobStatus.QUEUED, JudgeJobStatus.RUNNING])
+            ),
+            models.Index(fields=["finished_at"], name="judgejob_finished_idx")
+        ]
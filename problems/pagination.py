@@ -0,0 +1,134 @@
+import json
+import base64
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset (seek) pagination.
+
+    Rows are ordered by ``ordering`` (the last field must be unique) and the cursor
+    stores the ordering values of the last row on the page, so every page is a single
+    indexed range scan instead of an OFFSET that grows with the page number.
+    """
+    ordering = ("id",)
+    page_size = 50
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(position))
+
+        # fetch one extra row to know whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("results", data)
+        ]))
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        try:
+            page_size = int(page_size)
+        except (TypeError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_seek_filter(self, position):
+        """
+        Build the row-value comparison ``(a, b, c) > (x, y, z)`` as an OR of prefixes
+        so it works for mixed ascending/descending orderings on every database.
+
+        The OR is also bounded by a plain range on the first ordering field, which
+        it implies anyway, so the planner can use it to narrow index scans and
+        prune partitions (e.g. the monthly submission partitions by date).
+        """
+        seek = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            lookup = "__lt" if field.startswith("-") else "__gt"
+
+            condition = {f.lstrip("-"): position[f.lstrip("-")] for f in self.ordering[:index]}
+            condition[name + lookup] = position[name]
+            seek |= Q(**condition)
+
+        first = self.ordering[0]
+        bound = "__lte" if first.startswith("-") else "__gte"
+        return Q(**{first.lstrip("-") + bound: position[first.lstrip("-")]}) & seek
+
+    def encode_cursor(self, instance):
+        position = [getattr(instance, field.lstrip("-")) for field in self.ordering]
+        data = json.dumps(position, default=str, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError(cursor)
+
+            position = {}
+            for field, value in zip(self.ordering, values):
+                name = field.lstrip("-")
+                try:
+                    position[name] = model._meta.get_field(name).to_python(value)
+                except FieldDoesNotExist:
+                    # annotations (e.g. a search rank) are kept as decoded
+                    position[name] = value
+            return position
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+class ProblemPagination(KeysetPagination):
+    ordering = ("difficulty", "name", "id")
+    page_size = 50
+    max_page_size = 100
+
+class ProblemSearchPagination(KeysetPagination):
+    ordering = ("-rank", "id")
+    page_size = 50
+    max_page_size = 100
+
+class SubmissionPagination(KeysetPagination):
+    ordering = ("-date", "-id")
+    page_size = 20
+    max_page_size = 100
+
+class RecentSubmissionPagination(SubmissionPagination):
+    page_size = 10
+    page_size_query_param = "size"
@@ -0,0 +1,237 @@
+import os
+import gzip
+import json
+from datetime import datetime, timezone
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, F
+from django.utils import timezone as django_timezone
+
+from .models import Problem, Submission, SubmissionStatus, SourceCode
+from .sources import UNUSED_SOURCE_AGE
+
+# partitions created ahead of time, so inserts never land in the default partition
+MONTHS_AHEAD = 3
+
+BATCH_SIZE = 1000
+
+def is_partitioned(using=connection):
+    """
+    Returns whether the submissions table is a partitioned (postgres) table,
+    on other databases it stays a plain table.
+    """
+    if using.vendor != "postgresql":
+        return False
+
+    with using.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [Submission._meta.db_table])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+def iter_months(start, end):
+    """
+    Yields the first instant of every month from ``start`` up to and including ``end``.
+    """
+    month = month_start(start)
+    while month <= end:
+        yield month
+        month = add_months(month, 1)
+
+def partition_name(month, table=None):
+    return f"{table or Submission._meta.db_table}_y{month.year}m{month.month:02d}"
+
+def default_partition_name(table=None):
+    return f"{table or Submission._meta.db_table}_default"
+
+def get_partitions(cursor, table=None):
+    """
+    Returns the names of the monthly partitions of the submissions table.
+    """
+    table = table or Submission._meta.db_table
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = %s AND child.relname <> %s",
+        [table, default_partition_name(table)]
+    )
+    return sorted(row[0] for row in cursor.fetchall())
+
+def create_partition(cursor, month, table=None):
+    """
+    Create the partition of ``month`` unless it exists. Rows of that month which
+    already landed in the default partition are moved into it.
+    """
+    table = table or Submission._meta.db_table
+    name, default = partition_name(month, table), default_partition_name(table)
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+
+    start, end = month, add_months(month, 1)
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE date >= %s AND date < %s)', [start, end])
+    if not cursor.fetchone()[0]:
+        cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)', [start, end])
+        return True
+
+    # the new bounds would overlap rows of the default partition, move them over
+    cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{default}"')
+    cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)', [start, end])
+    cursor.execute(f'INSERT INTO "{name}" SELECT * FROM "{default}" WHERE date >= %s AND date < %s', [start, end])
+    cursor.execute(f'DELETE FROM "{default}" WHERE date >= %s AND date < %s', [start, end])
+    cursor.execute(f'ALTER TABLE "{table}" ATTACH PARTITION "{default}" DEFAULT')
+    return True
+
+def ensure_partitions(months_ahead=MONTHS_AHEAD):
+    """
+    Create the partitions from the current month up to ``months_ahead`` months ahead.
+
+    Returns:
+        List[str]: names of the created partitions
+    """
+    if not is_partitioned():
+        return []
+
+    now = datetime.now(timezone.utc)
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for month in iter_months(now, add_months(month_start(now), months_ahead)):
+            if create_partition(cursor, month):
+                created.append(partition_name(month))
+    return created
+
+def get_archive_row(submission):
+    row = {field.attname: getattr(submission, field.attname) for field in Submission._meta.concrete_fields if field.name not in ("code", "source")}
+    row["code"] = submission.get_code()
+    return row
+
+def write_archive(path, submissions):
+    """
+    Write submissions as gzip compressed JSON lines, one self-contained row each
+    (the code is inlined), and return the number of written rows.
+    """
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        for submission in submissions:
+            file.write(json.dumps(get_archive_row(submission), separators=(",", ":"), default=str))
+            file.write("\n")
+            count += 1
+    return count
+
+def record_archived(submissions):
+    """
+    Add the submissions about to be archived to the archived totals of their
+    problems and accounts, so counters recounted from the submissions table
+    (reconcilecounters, rebuild_account_stats) still include them.
+    """
+    from accounts.models import AccountStats
+    from accounts.stats import count_by, add_counts, rebuild_account_stats
+
+    totals = submissions.values("problem") \
+        .annotate(total=Count("pk"), accepted=Count("pk", filter=Q(status=SubmissionStatus.ACCEPTED))) \
+        .order_by()
+    for row in totals.iterator():
+        Problem.objects.filter(pk=row["problem"]).update(
+            archived_submissions_count = F("archived_submissions_count") + row["total"],
+            archived_accepted_count = F("archived_accepted_count") + row["accepted"]
+        )
+
+    language_counts = count_by(submissions.filter(status=SubmissionStatus.ACCEPTED, account__isnull=False), "language__public_id")
+    if not language_counts:
+        return
+
+    # accounts without stats get them counted while their submissions are still there
+    existing = AccountStats.objects.filter(account__in=language_counts.keys()).values_list("account", flat=True)
+    missing = set(language_counts) - set(existing)
+    if missing:
+        rebuild_account_stats(list(missing))
+
+    stats = list(AccountStats.objects.select_for_update().filter(account__in=language_counts.keys()))
+    for entry in stats:
+        for public_id, count in language_counts[entry.pk].items():
+            add_counts(entry.archived_language_counts, [public_id], count)
+    AccountStats.objects.bulk_update(stats, ["archived_language_counts"], batch_size=BATCH_SIZE)
+
+def archive_month(month, path):
+    """
+    Move the submissions of ``month`` to an archive file. On postgres the month's
+    partition is detached and dropped, elsewhere the rows are deleted. Their
+    counts are kept in the archived totals of their problems and accounts.
+
+    The archive is written next to ``path`` and only moved there once the rows
+    are gone, a failed or rolled back run leaves no archive of rows which stayed
+    in the table.
+
+    Returns:
+        int: number of archived submissions
+    """
+    start, end = month, add_months(month, 1)
+    submissions = Submission.objects.filter(date__gte=start, date__lt=end).select_related("source").order_by("date", "id")
+    partial_path = f"{path}.partial"
+
+    try:
+        with transaction.atomic():
+            # empty months (e.g. partitions created ahead) leave no file behind
+            count = 0
+            if submissions.exists():
+                count = write_archive(partial_path, submissions.iterator(chunk_size=BATCH_SIZE))
+                record_archived(Submission.objects.filter(date__gte=start, date__lt=end))
+
+            if is_partitioned():
+                name = partition_name(month)
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT to_regclass(%s)", [name])
+                    if cursor.fetchone()[0] is not None:
+                        cursor.execute(f'ALTER TABLE "{Submission._meta.db_table}" DETACH PARTITION "{name}"')
+                        cursor.execute(f'DROP TABLE "{name}"')
+
+            # rows outside of a monthly partition (and every row on other databases)
+            Submission.objects.filter(date__gte=start, date__lt=end).delete()
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    # committed, should the rename fail the rows are still in the partial file
+    if count:
+        os.replace(partial_path, path)
+    return count
+
+def delete_unused_sources():
+    """
+    Delete the stored source bodies no submission or judge job refers to anymore
+    and which were not reused for UNUSED_SOURCE_AGE, a submit that just found one
+    (see sources.store_source) still gets to refer to it.
+    """
+    unused = SourceCode.objects.filter(
+        submissions__isnull=True,
+        judge_jobs__isnull=True,
+        last_used_at__lt=django_timezone.now() - UNUSED_SOURCE_AGE
+    )
+
+    with transaction.atomic():
+        # locked rows are being reused right now, the conditions are checked again once locked
+        candidates = list(SourceCode.objects.select_for_update(skip_locked=True).filter(pk__in=unused.values("pk")).values_list("pk", flat=True))
+        return unused.filter(pk__in=candidates).delete()[0]
+
+def get_archivable_months(before):
+    """
+    Returns the months, oldest first, which end before ``before`` and have a
+    partition (postgres) or submissions (other databases).
+    """
+    if is_partitioned():
+        with connection.cursor() as cursor:
+            names = get_partitions(cursor)
+        prefix = len(Submission._meta.db_table) + 2
+        months = [datetime(int(name[prefix:prefix + 4]), int(name[prefix + 5:prefix + 7]), 1, tzinfo=timezone.utc) for name in names]
+    else:
+        months = [month_start(month) for month in Submission.objects.filter(date__lt=before).dates("date", "month")]
+
+    return [month for month in months if add_months(month, 1) <= before]
@@ -0,0 +1,188 @@
+import gzip
+from hashlib import sha1
+
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers, get_conditional_response
+from django.utils.http import quote_etag
+
+from backend.renderers import FastJSONRenderer
+
+from .models import Problem, TestCase, Code, Solution, Implementation
+from .serializers import RetrieveProblemSerializer, ViewSolutionSerializer
+from .cache import cache, get_problem_version, problem_payload_key
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# preferred order when the client accepts several encodings
+ENCODINGS = ["br", "gzip"]
+
+def materialize(data):
+    """
+    Encode ``data`` once into JSON bytes plus their compressed variants.
+
+    Args:
+        data (dict|list): serialized response data
+
+    Returns:
+        dict: encoded bodies keyed by content encoding ("identity", "gzip", "br")
+    """
+    if data is None:
+        return None
+
+    body = FastJSONRenderer().render(data)
+    payload = {
+        "identity": body,
+        "gzip": gzip.compress(body, compresslevel=GZIP_LEVEL)
+    }
+    if brotli is not None:
+        payload["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return payload
+
+def get_accepted_encodings(request):
+    accepted = set()
+    for entry in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _, params = entry.partition(";")
+        coding = coding.strip().lower()
+
+        # skip codings explicitly refused with q=0
+        quality = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0
+
+        if coding and quality > 0:
+            accepted.add(coding)
+    return accepted
+
+def get_encoding(request):
+    """
+    Returns the preferred content encoding accepted by the client, or None for identity.
+    """
+    accepted = get_accepted_encodings(request)
+    available = ENCODINGS if brotli is not None else ["gzip"]
+    return next((entry for entry in available if entry in accepted or "*" in accepted), None)
+
+def make_etag(request, *versions):
+    """
+    Build a strong ETag out of the versions a response is built from.
+
+    Every encoding is a different representation, so it is part of the tag.
+
+    Args:
+        request (Request): current request
+        versions: resource versions (and anything else the body depends on)
+
+    Returns:
+        str: quoted ETag
+    """
+    tag = sha1(":".join(str(version) for version in versions).encode("utf-8")).hexdigest()
+    encoding = get_encoding(request)
+    if encoding:
+        tag = f"{tag}-{encoding}"
+    return quote_etag(tag)
+
+def not_modified(request, etag):
+    """
+    Returns a 304 response when ``If-None-Match`` matches ``etag``, None otherwise.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        return None
+
+    response["ETag"] = etag
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+def payload_response(request, payload, status=200, etag=None):
+    """
+    Serve a materialized payload as is, picking the best encoding the client accepts.
+    """
+    encoding = get_encoding(request)
+    if encoding not in payload:
+        encoding = None
+
+    response = HttpResponse(payload[encoding or "identity"], content_type="application/json", status=status)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    if etag:
+        response["ETag"] = etag
+
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+def get_code_queryset(model, language_id=None):
+    queryset = model.objects.select_related("language")
+    if language_id:
+        queryset = queryset.filter(language__public_id=language_id)
+    return queryset
+
+def build_problem_detail(public_id, fields=None, language_id=None):
+    """
+    Serialize the detail payload of a published problem. Only the relations in
+    ``fields`` are prefetched (only sample testcases are exposed), starter code
+    and solution implementations can be narrowed to a single language.
+
+    Args:
+        public_id (str): public ID of the problem
+        fields (list): fields to serialize, all of them when None
+        language_id (str): public ID of the language to keep code for, all languages when None
+
+    Returns:
+        dict: serialized problem or None if it does not exist
+    """
+    def wanted(name):
+        return fields is None or name in fields
+
+    prefetches = []
+    if wanted("tags"):
+        prefetches.append("tags")
+    if wanted("defaultCode"):
+        prefetches.append(Prefetch("defaultCode", queryset=get_code_queryset(Code, language_id)))
+    if wanted("solutions"):
+        prefetches.append(Prefetch("solutions__implementations", queryset=get_code_queryset(Implementation, language_id)))
+        prefetches.append("solutions__complexities")
+    if wanted("testcases"):
+        prefetches.append(Prefetch("testcases", queryset=TestCase.objects.filter(is_sample=True).prefetch_related("inputs")))
+
+    problem = Problem.objects.filter(published=True, public_id=public_id).defer("search_vector").prefetch_related(*prefetches).first()
+    if not problem:
+        return None
+
+    return dict(RetrieveProblemSerializer(problem, fields=fields).data)
+
+def build_problem_payload(public_id, fields=None, language_id=None):
+    return materialize(build_problem_detail(public_id, fields, language_id))
+
+def build_solutions_payload(public_id, language_id=None):
+    """
+    Materialize the editorial (solutions with their implementations and complexities)
+    of a published problem, or None if it does not exist.
+    """
+    if not Problem.objects.filter(published=True, public_id=public_id).exists():
+        return None
+
+    solutions = Solution.objects.filter(problem__public_id=public_id).prefetch_related(
+        Prefetch("implementations", queryset=get_code_queryset(Implementation, language_id)),
+        "complexities"
+    )
+    return materialize(ViewSolutionSerializer(solutions, many=True).data)
+
+def warm_problem_payload(public_id):
+    """
+    Materialize the detail payload of a problem under its current version.
+    """
+    version = get_problem_version(public_id)
+    payload = build_problem_payload(public_id)
+    if payload is not None:
+        cache.set(problem_payload_key(public_id, version), payload)
+    return payload
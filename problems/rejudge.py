@@ -0,0 +1,178 @@
+import time
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from accounts.models import AccountSolvedProblems
+from accounts.stats import rebuild_account_activity, rebuild_account_stats
+from .models import Problem, Submission, SubmissionStatus
+from .cache import invalidate_problem
+from .judging import JudgeError, judge_code, get_retry_delay
+
+BATCH_SIZE = 1000
+
+# verdict fields of a submission a rejudge rewrites
+VERDICT_FIELDS = ["status", "time", "memory", "time_percent", "memory_percent", "error_string", "reject_details"]
+
+class RateLimiter:
+    """
+    Lets at most ``rate`` judge executions (test case runs) per second through,
+    shared by every thread of a rejudge. A token bucket holding up to one second
+    of executions, a batch larger than that waits for a full bucket and goes
+    into debt for the rest.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def acquire(self, count):
+        if not self.rate:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                needed = min(count, self.rate)
+                if self.tokens >= needed:
+                    self.tokens -= count
+                    return
+                wait = (needed - self.tokens) / self.rate
+            time.sleep(wait)
+
+def get_rejudge_queryset(problem_ids=None, language_ids=None, statuses=None, since=None, until=None):
+    """
+    Returns the submissions to rejudge, every filter is optional.
+
+    Args:
+        problem_ids (List[int]): primary keys of the problems
+        language_ids (List[int]): primary keys of the languages
+        statuses (List[SubmissionStatus]): current verdicts
+        since (datetime): submitted at or after
+        until (datetime): submitted before
+    """
+    submissions = Submission.objects.filter(problem__isnull=False)
+    if problem_ids:
+        submissions = submissions.filter(problem__in=problem_ids)
+    if language_ids:
+        submissions = submissions.filter(language__in=language_ids)
+    if statuses:
+        submissions = submissions.filter(status__in=statuses)
+    if since:
+        submissions = submissions.filter(date__gte=since)
+    if until:
+        submissions = submissions.filter(date__lt=until)
+    return submissions
+
+def iter_chunks(submissions, after_id, size):
+    """
+    Yields the submissions in primary key order, ``size`` at a time, starting after
+    ``after_id`` (where an interrupted rejudge stopped).
+    """
+    submissions = submissions.select_related("language", "source").order_by("pk")
+    while True:
+        chunk = list(submissions.filter(pk__gt=after_id)[:size])
+        if not chunk:
+            return
+        yield chunk
+        after_id = chunk[-1].pk
+
+def load_problems(problem_ids):
+    """
+    Returns the problems by primary key with their test cases and inputs prefetched,
+    so harnesses are generated without a query per submission.
+    """
+    problems = Problem.objects.filter(pk__in=problem_ids).defer("search_vector").prefetch_related("testcases__inputs")
+    return {problem.pk: problem for problem in problems}
+
+def judge_with_retries(problem, language, code, limiter):
+    """
+    Judge code against every test case of the problem, retrying failed attempts
+    with backoff. Makes no queries when the test cases are prefetched, so it can
+    run in worker threads.
+
+    Returns:
+        dict: verdict fields
+
+    Raises:
+        JudgeError: the judge kept failing for JUDGE_MAX_ATTEMPTS attempts
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        limiter.acquire(len(problem.testcases.all()))
+        try:
+            return judge_code(problem, language, code)
+        except JudgeError:
+            if attempts >= settings.JUDGE_MAX_ATTEMPTS:
+                raise
+            time.sleep(get_retry_delay(attempts))
+
+def judge_submission(submission, problem, limiter):
+    return judge_with_retries(problem, submission.language, submission.get_code(), limiter)
+
+def apply_verdicts(verdicts, problems):
+    """
+    Write the new verdicts of a chunk in one transaction. The accepted counters,
+    solved problems and stats of the affected accounts follow verdicts which
+    changed between accepted and not accepted.
+
+    Args:
+        verdicts (List[tuple]): (submission, verdict fields) pairs
+        problems (dict): the problems of the submissions by primary key
+
+    Returns:
+        int: number of submissions whose status changed
+    """
+    changed = 0
+    accepted_deltas = defaultdict(int)
+    gained, lost = set(), set()
+
+    for submission, fields in verdicts:
+        was_accepted = submission.status == SubmissionStatus.ACCEPTED
+        if submission.status != fields["status"]:
+            changed += 1
+
+        for field in VERDICT_FIELDS:
+            setattr(submission, field, fields[field])
+
+        accepted = submission.status == SubmissionStatus.ACCEPTED
+        if accepted == was_accepted:
+            continue
+
+        accepted_deltas[submission.problem_id] += 1 if accepted else -1
+        if submission.account_id:
+            (gained if accepted else lost).add((submission.account_id, submission.problem_id))
+
+    with transaction.atomic():
+        Submission.objects.bulk_update([submission for submission, _ in verdicts], VERDICT_FIELDS, batch_size=BATCH_SIZE)
+
+        for problem_id, delta in accepted_deltas.items():
+            if delta:
+                Problem.objects.filter(pk=problem_id).update(accepted_submissions_count=F("accepted_submissions_count") + delta)
+                public_id = problems[problem_id].public_id
+                transaction.on_commit(lambda public_id=public_id: invalidate_problem(public_id))
+
+        # the AccountSolvedProblems signals keep the solve counters in step
+        for account_id, problem_id in gained:
+            AccountSolvedProblems.objects.get_or_create(account_id=account_id, problem_id=problem_id)
+
+        for account_id, problem_id in lost - gained:
+            if not Submission.objects.filter(account=account_id, problem=problem_id, status=SubmissionStatus.ACCEPTED).exists():
+                AccountSolvedProblems.objects.filter(account=account_id, problem=problem_id).delete()
+
+        # accepted counts per day and language
+        account_ids = sorted({account_id for account_id, _ in gained | lost})
+        if account_ids:
+            rebuild_account_activity(account_ids)
+            rebuild_account_stats(account_ids)
+
+    return changed
@@ -0,0 +1,227 @@
+import re
+import math
+import threading
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models import Case, When, Value, FloatField, OuterRef, Subquery, F
+from django.db.models.functions import Cast
+
+from .models import Problem, ProblemTag
+from .cache import get_version, bump_version
+
+# postgres text search configuration used for both the stored vectors and the queries
+SEARCH_CONFIG = "english"
+
+# weight letter per indexed field, highest first
+SEARCH_WEIGHTS = {
+    "name": "A",
+    "tags": "B",
+    "description": "C"
+}
+
+# rank multipliers for the D, C, B, A weight classes (postgres defaults)
+RANK_WEIGHTS = [0.1, 0.2, 0.4, 1.0]
+
+# maximum number of matches the in-process fallback hands to the database
+FALLBACK_RESULT_LIMIT = 1000
+
+VERSION_KEY = "version:search_index"
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "given", "in", "is", "it",
+    "of", "on", "or", "return", "such", "that", "the", "this", "to", "with", "you", "your"
+}
+
+def is_postgres(using="default"):
+    return connections[using].vendor == "postgresql"
+
+def tokenize(text):
+    if not text:
+        return []
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOP_WORDS]
+
+def update_search_vectors(problem_ids):
+    """
+    Recompute the stored tsvector of the given problems (postgres only).
+
+    Args:
+        problem_ids (List[int]): primary keys of the problems to refresh
+    """
+    if not problem_ids or not is_postgres():
+        return
+
+    from django.contrib.postgres.aggregates import StringAgg
+    from django.contrib.postgres.search import SearchVector
+
+    tag_names = ProblemTag.objects.filter(problem=OuterRef("pk")) \
+        .values("problem") \
+        .annotate(names=StringAgg("tag__name", delimiter=" ")) \
+        .values("names")
+
+    Problem.objects.filter(pk__in=problem_ids).update(search_vector=(
+        SearchVector("name", weight=SEARCH_WEIGHTS["name"], config=SEARCH_CONFIG) +
+        SearchVector(Subquery(tag_names), weight=SEARCH_WEIGHTS["tags"], config=SEARCH_CONFIG) +
+        SearchVector("description", weight=SEARCH_WEIGHTS["description"], config=SEARCH_CONFIG)
+    ))
+
+def search_problems(queryset, text):
+    """
+    Filter a problem queryset down to the problems matching ``text`` and annotate
+    every row with a ``rank`` relevance score (higher is better).
+
+    Uses the GIN indexed tsvector column on postgres and the in-process inverted
+    index everywhere else.
+    """
+    if is_postgres(queryset.db):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+        # ts_rank is a float4, widened to the float8 a python float (and so the
+        # pagination cursor) holds exactly, the seek compares the same value it encoded
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F("search_vector"), query, weights=RANK_WEIGHTS), FloatField())
+        )
+
+    scores = SEARCH_INDEX.search(text, limit=FALLBACK_RESULT_LIMIT)
+    if not scores:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+    return queryset.filter(pk__in=scores.keys()).annotate(rank=Case(
+        *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+        default=Value(0.0),
+        output_field=FloatField()
+    ))
+
+class InvertedIndex:
+    """
+    Weighted in-memory inverted index over problem names, tags and descriptions,
+    used when the database has no full-text search (e.g. SQLite dev databases).
+
+    Built lazily on first search. Changes made in this process are applied
+    incrementally by the problem signals; changes made by other processes bump a
+    shared version in the cache which makes this process rebuild on its next search.
+    """
+    field_weights = {
+        "name": RANK_WEIGHTS[3],
+        "tags": RANK_WEIGHTS[2],
+        "description": RANK_WEIGHTS[1]
+    }
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.version = None
+        self.postings = defaultdict(dict)
+        self.documents = {}
+
+    def build(self):
+        with self.lock:
+            version = get_version(VERSION_KEY)
+            self.postings = defaultdict(dict)
+            self.documents = {}
+
+            tags = defaultdict(list)
+            for problem_id, name in ProblemTag.objects.values_list("problem_id", "tag__name"):
+                tags[problem_id].append(name)
+
+            for problem in Problem.objects.values("pk", "name", "description"):
+                self._add(problem["pk"], problem["name"], " ".join(tags[problem["pk"]]), problem["description"])
+
+            self.version = version
+            self.loaded = True
+
+    def ensure_fresh(self):
+        with self.lock:
+            if not self.loaded or self.version != get_version(VERSION_KEY):
+                self.build()
+
+    def patchable(self, version):
+        # a stale index is rebuilt as a whole instead of patched
+        if self.loaded and self.version != version - 1:
+            self.loaded = False
+        return self.loaded
+
+    def update(self, problem_ids):
+        """
+        Re-read the given problems and patch their postings in place.
+        """
+        version = bump_version(VERSION_KEY)
+
+        with self.lock:
+            if not self.patchable(version):
+                return
+
+            for problem_id in problem_ids:
+                self._remove(problem_id)
+
+            problems = Problem.objects.filter(pk__in=problem_ids).prefetch_related("tags")
+            for problem in problems:
+                tags = " ".join(tag.name for tag in problem.tags.all())
+                self._add(problem.pk, problem.name, tags, problem.description)
+
+            self.version = version
+
+    def remove(self, problem_id):
+        version = bump_version(VERSION_KEY)
+
+        with self.lock:
+            if not self.patchable(version):
+                return
+
+            self._remove(problem_id)
+            self.version = version
+
+    def search(self, text, limit=None):
+        """
+        Returns a ``{problem_id: score}`` dict of the problems containing every term
+        of ``text``, limited to the ``limit`` best scores.
+        """
+        self.ensure_fresh()
+
+        with self.lock:
+            terms = set(tokenize(text))
+            if not terms:
+                return {}
+
+            # intersect the rarest posting lists first
+            postings = sorted((self.postings.get(term, {}) for term in terms), key=len)
+            if not postings[0]:
+                return {}
+
+            total = max(len(self.documents), 1)
+            scores = {problem_id: 0.0 for problem_id in postings[0]}
+            for posting in postings:
+                idf = math.log(1 + total / len(posting))
+                for problem_id in list(scores):
+                    weight = posting.get(problem_id)
+                    if weight is None:
+                        del scores[problem_id]
+                    else:
+                        scores[problem_id] += weight * idf
+
+        ranked = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+        if limit:
+            ranked = ranked[:limit]
+        return dict(ranked)
+
+    def _add(self, problem_id, name, tags, description):
+        weights = defaultdict(float)
+        for field, text in (("name", name), ("tags", tags), ("description", description)):
+            for token in tokenize(text):
+                weights[token] += self.field_weights[field]
+
+        for token, weight in weights.items():
+            self.postings[token][problem_id] = weight
+        self.documents[problem_id] = set(weights)
+
+    def _remove(self, problem_id):
+        for token in self.documents.pop(problem_id, ()):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(problem_id, None)
+            if not posting:
+                del self.postings[token]
+
+SEARCH_INDEX = InvertedIndex()
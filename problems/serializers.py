@@ -1,8 +1,10 @@
 from typing import List
 
 from .judge import JudgeManager
+from .cache import invalidate_problem
+from .languages import LANGUAGES
 from .models import Problem, TestCase, Code, Language, ValueField, Solution, Implementation, Complexity, Tag
-from .models import Submission
+from .models import Submission, VoteType
 
 import rest_framework.serializers as serializers
 from django.db import models
@@ -11,9 +13,18 @@ from django.db import models
 def createCode(name: str, inputs: List[dict]):
     return JudgeManager.create_default_code(name, inputs)
 
-class VoteType(models.IntegerChoices):
-    LIKE = (0, "Like")
-    DISLIKE = (1, "Dislike")
+class SparseFieldsMixin:
+    """
+    Lets the caller pick the serialized fields with a ``fields`` argument,
+    every field is serialized when it is None.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 class TagNameSerializer(serializers.ModelSerializer):
     class Meta:
@@ -75,16 +86,30 @@ class TestCaseSerializer(serializers.ModelSerializer):
 
         return testcase
     
+class LanguageIdField(serializers.Field):
+    """
+    A language given by its public id, checked against the language registry
+    instead of the database. Validates to the public id.
+    """
+    default_error_messages = {
+        "does_not_exist": "Language with public_id={value} does not exist."
+    }
+
+    def to_internal_value(self, data):
+        language = LANGUAGES.get(data)
+        if language is None:
+            self.fail("does_not_exist", value=data)
+        return language.public_id
+
+    def to_representation(self, value):
+        return str(value.public_id)
+
 class CreateImplementationSerializer(serializers.ModelSerializer):   
+    language = LanguageIdField()
 
     class Meta:
         model = Implementation
         fields = ['language', 'value']
-
-    def to_internal_value(self, data):
-        val = super().to_internal_value(data)
-        val['language'] = val['language'].public_id
-        return val
     
 class ListImplementationSerializer(serializers.ModelSerializer):
     language = LanguageSerializer()
@@ -121,12 +146,12 @@ class CreateSolutionSerializer(serializers.ModelSerializer):
         # create implementations
         for entry in validated_data.get("implementations"):
             serializer = CreateImplementationSerializer(data=entry)
-            language = Language.objects.filter(public_id=entry.get("language")).first()
+            language = LANGUAGES.get(entry.get("language"))
             if serializer.is_valid():
                 implementation = Implementation.objects.create(
                     value = entry.get("value"),
-                    language_id = language.public_id,
-                    solution_id = solution.public_id
+                    language = language,
+                    solution = solution
                 )
                 solution.implementations.add(implementation)
                 language.implementations.add(implementation)
@@ -141,7 +166,7 @@ class CreateSolutionSerializer(serializers.ModelSerializer):
                     value = entry.get("value"),
                     type = entry.get("type"),
                     explanation = entry.get("explanation"),
-                    solution_id = solution.public_id
+                    solution = solution
                 )
                 solution.complexities.add(complexity)
             else:
@@ -167,12 +192,12 @@ class ViewSolutionSerializer(serializers.ModelSerializer):
         # create implementations
         for entry in validated_data.get("implementations"):
             serializer = ListImplementationSerializer(data=entry)
-            language = Language.objects.filter(public_id=entry.get("language")).first()
+            language = LANGUAGES.get(entry.get("language"))
             if serializer.is_valid():
                 implementation = Implementation.objects.create(
                     value = entry.get("value"),
-                    language_id = language.public_id,
-                    solution_id = solution.public_id
+                    language = language,
+                    solution = solution
                 )
                 solution.implementations.add(implementation)
                 language.implementations.add(implementation)
@@ -187,7 +212,7 @@ class ViewSolutionSerializer(serializers.ModelSerializer):
                     value = entry.get("value"),
                     type = entry.get("type"),
                     explanation = entry.get("explanation"),
-                    solution_id = solution.public_id
+                    solution = solution
                 )
                 solution.complexities.add(complexity)
             else:
@@ -217,7 +242,7 @@ class CreateProblemSerializer(serializers.ModelSerializer):
         return data
     
     def get_testcases(self, problem_id):
-        testcases = TestCase.objects.filter(problem_id=problem_id, is_sample=True).all()
+        testcases = TestCase.objects.filter(problem__public_id=problem_id, is_sample=True).all()
         serializer = TestCaseSerializer(testcases, many=True)
         return serializer.data
 
@@ -242,11 +267,11 @@ class CreateProblemSerializer(serializers.ModelSerializer):
         # create default code
         codes = createCode(validated_data.get("name"), testcase.inputs.all())
         for key in codes:
-            language = Language.objects.filter(name=key).first()
+            language = LANGUAGES.get_by_name(key)
             if not language:
                 print(f"Unable to find language '{key}'")
             Code.objects.create(
-                language_id=language.public_id,
+                language=language,
                 problem=problem,
                 value=codes[key]
             )
@@ -274,9 +299,11 @@ class CreateProblemSerializer(serializers.ModelSerializer):
             
             problem.tags.add(tag)
 
+        # children were attached with bulk updates which send no signals
+        invalidate_problem(problem.public_id)
         return problem
     
-class ListProblemSerializer(serializers.ModelSerializer):
+class ListProblemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tags = TagNameSerializer(many=True)
 
     class Meta:
@@ -309,11 +336,11 @@ class ViewProblemSerializer(serializers.ModelSerializer):
         return data
     
     def get_testcases(self, problem_id):
-        testcases = TestCase.objects.filter(problem_id=problem_id, is_sample=True).all()
+        testcases = TestCase.objects.filter(problem__public_id=problem_id, is_sample=True).all()
         serializer = TestCaseSerializer(testcases, many=True)
         return serializer.data
     
-class RetrieveProblemSerializer(serializers.ModelSerializer):
+class RetrieveProblemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     testcases = TestCaseSerializer(many=True)
     defaultCode = CodeSerializer(many=True)
     solutions = ViewSolutionSerializer(many=True)
@@ -339,7 +366,7 @@ class RetrieveProblemSerializer(serializers.ModelSerializer):
         return data
     
     def get_testcases(self, problem_id):
-        testcases = TestCase.objects.filter(problem_id=problem_id, is_sample=True).all()
+        testcases = TestCase.objects.filter(problem__public_id=problem_id, is_sample=True).all()
         serializer = TestCaseSerializer(testcases, many=True)
         return serializer.data
 
@@ -353,12 +380,37 @@ class RunSerializer(serializers.Serializer):
 class SubmissionSerializer(serializers.ModelSerializer):
     language = LanguageSerializer()
     problem = ProblemNameSerializer()
+    code = serializers.CharField(source="get_code", read_only=True)
 
     class Meta:
         model = Submission
         fields = ["public_id", "problem", "status", "code", "language", "time", "memory", "date", "time_percent", "memory_percent", "error_string", "reject_details"]
         read_only_fields = ["__all__"]
 
+class SubmissionListSerializer(serializers.ModelSerializer):
+    """
+    Compact submission rows for listings, the code and judge output are only
+    served for a single submission.
+    """
+    language = LanguageSerializer()
+    problem = ProblemNameSerializer()
+
+    class Meta:
+        model = Submission
+        fields = ["public_id", "problem", "status", "language", "time", "memory", "date", "time_percent", "memory_percent"]
+        read_only_fields = ["__all__"]
+
+def get_submission_list_queryset(queryset):
+    """
+    Narrow a submission queryset to the columns of SubmissionListSerializer,
+    joining the language and problem instead of loading them per row.
+    """
+    return queryset.select_related("language", "problem").only(
+        "public_id", "status", "time", "memory", "date", "time_percent", "memory_percent",
+        "language", "language__public_id", "language__name",
+        "problem", "problem__public_id", "problem__name"
+    )
+
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
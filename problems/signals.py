@@ -0,0 +1,128 @@
+from django.db import transaction
+from django.dispatch import receiver
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from .models import Problem, ProblemTag, Tag, TestCase, ValueField, Code, Solution, Implementation, Complexity, Language
+from .search import SEARCH_INDEX, update_search_vectors
+from .tag_index import TAG_INDEX
+from .languages import LANGUAGES
+from .cache import invalidate_problem, invalidate_problem_list, invalidate_catalog, invalidate_namespace
+
+def refresh_indexes(problem_ids):
+    """
+    Re-index the given problems once the current transaction commits, so no
+    process rebuilds its indexes from rows that are not visible yet (or get
+    rolled back).
+    """
+    problem_ids = list(problem_ids)
+
+    def refresh():
+        update_search_vectors(problem_ids)
+        SEARCH_INDEX.update(problem_ids)
+        TAG_INDEX.update(problem_ids)
+    transaction.on_commit(refresh)
+
+    # names, difficulties, tags and publication all show up in the list payloads
+    invalidate_problem_list()
+
+@receiver(post_save, sender=Problem)
+def problem_saved(sender, instance, **kwargs):
+    refresh_indexes([instance.pk])
+
+@receiver(post_delete, sender=Problem)
+def problem_deleted(sender, instance, **kwargs):
+    problem_id = instance.pk
+
+    def remove():
+        SEARCH_INDEX.remove(problem_id)
+        TAG_INDEX.update([problem_id])
+    transaction.on_commit(remove)
+
+@receiver(post_save, sender=ProblemTag)
+@receiver(post_delete, sender=ProblemTag)
+def problem_tag_changed(sender, instance, **kwargs):
+    if instance.problem_id:
+        refresh_indexes([instance.problem_id])
+
+@receiver(m2m_changed, sender=Problem.tags.through)
+def problem_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # remember the affected problems, the relation is gone once it is cleared
+        instance._cleared_problem_ids = list(Problem.objects.filter(tags=instance).values_list("pk", flat=True))
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        refresh_indexes([instance.pk])
+        invalidate_problem(instance.public_id)
+        return
+
+    invalidate_catalog()
+    if action == "post_clear":
+        refresh_indexes(getattr(instance, "_cleared_problem_ids", []))
+    else:
+        refresh_indexes(pk_set)
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, **kwargs):
+    invalidate_namespace("tag")
+
+    if not created:
+        refresh_indexes(Problem.objects.filter(tags=instance).values_list("pk", flat=True))
+
+        # the bitmaps are keyed by tag name, a rename is cheaper to rebuild than to patch
+        transaction.on_commit(TAG_INDEX.invalidate)
+        invalidate_catalog()
+
+def get_problem_public_id(instance):
+    """
+    Returns the public id of the problem whose detail payload contains ``instance``.
+    """
+    try:
+        if isinstance(instance, Problem):
+            return instance.public_id
+        if isinstance(instance, ValueField):
+            return instance.testcase.problem.public_id
+        if isinstance(instance, (Implementation, Complexity)):
+            return instance.solution.problem.public_id
+        return instance.problem.public_id
+    except (AttributeError, ObjectDoesNotExist):
+        # detached rows (e.g. a testcase not yet attached to its problem)
+        return None
+
+def problem_detail_changed(sender, instance, **kwargs):
+    public_id = get_problem_public_id(instance)
+    if public_id:
+        invalidate_problem(public_id)
+
+for model in [Problem, ProblemTag, TestCase, ValueField, Code, Solution, Implementation, Complexity]:
+    post_save.connect(problem_detail_changed, sender=model, dispatch_uid=f"problem_detail_saved_{model.__name__}")
+    post_delete.connect(problem_detail_changed, sender=model, dispatch_uid=f"problem_detail_deleted_{model.__name__}")
+
+@receiver(post_save, sender=Problem)
+def problem_changed(sender, instance, created, **kwargs):
+    # re-materialize edited (or newly published) problems right away instead of
+    # on the first read, after the version bump registered by problem_detail_changed;
+    # new problems get their children attached afterwards
+    if created or not instance.published:
+        return
+
+    from .payloads import warm_problem_payload
+    public_id = instance.public_id
+    transaction.on_commit(lambda: warm_problem_payload(public_id))
+
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+def language_changed(sender, instance, **kwargs):
+    invalidate_namespace("language")
+    transaction.on_commit(LANGUAGES.invalidate)
+
+    # language names are embedded in every problem's default code and solutions
+    invalidate_catalog()
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    invalidate_namespace("tag")
@@ -0,0 +1,142 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from .models import Language, Tag, Problem, ProblemTag, TestCase, ValueField, Code, Solution, Implementation, Complexity, ProblemBaseline
+from .signals import refresh_indexes
+from .cache import invalidate_catalog, invalidate_problem_list, invalidate_namespace
+
+# bump whenever the layout of the file or the meaning of its values changes
+# (2: foreign keys hold primary keys instead of public ids)
+SNAPSHOT_VERSION = 2
+
+GZIP_LEVEL = 6
+BATCH_SIZE = 1000
+
+# catalog tables in insertion order (referenced tables first)
+# (with the verification baselines, so a restore keeps what verifyproblems found)
+CATALOG_MODELS = [Language, Tag, Problem, ProblemTag, TestCase, ValueField, Code, Solution, Implementation, Complexity, ProblemBaseline]
+
+# per-environment state, rebuilt or recounted after a restore
+EXCLUDED_FIELDS = {
+    Problem: [
+        "likes", "dislikes", "legacy_likes", "legacy_dislikes", "accepted_submissions_count", "total_submissions_count",
+        "archived_submissions_count", "archived_accepted_count", "search_vector"
+    ]
+}
+
+class SnapshotError(Exception):
+    pass
+
+def get_snapshot_fields(model):
+    excluded = EXCLUDED_FIELDS.get(model, [])
+    return [field for field in model._meta.concrete_fields if field.name not in excluded]
+
+def export_snapshot(path):
+    """
+    Dump every catalog table to a gzip compressed JSON snapshot.
+
+    Rows are stored as value lists under the column names of their table, so the
+    file stays compact and maps straight back to ``bulk_create``.
+
+    Args:
+        path (str): destination file
+
+    Returns:
+        dict: number of exported rows per table
+    """
+    tables = {}
+    counts = {}
+    for model in CATALOG_MODELS:
+        columns = [field.attname for field in get_snapshot_fields(model)]
+        rows = list(model.objects.order_by("pk").values_list(*columns).iterator())
+        tables[model._meta.label_lower] = {"columns": columns, "rows": rows}
+        counts[model._meta.label_lower] = len(rows)
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "tables": tables
+    }
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=GZIP_LEVEL) as file:
+        json.dump(snapshot, file, separators=(",", ":"), default=str)
+
+    return counts
+
+def read_snapshot(path):
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        snapshot = json.load(file)
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {snapshot.get('version')!r}, expected {SNAPSHOT_VERSION}")
+    return snapshot
+
+def get_instances(model, table):
+    """
+    Build unsaved instances of ``model`` out of a snapshot table.
+    """
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    unknown = [column for column in table["columns"] if column not in fields]
+    if unknown:
+        raise SnapshotError(f"{model._meta.label_lower} has no column(s) {', '.join(unknown)}")
+
+    columns = [(column, fields[column]) for column in table["columns"]]
+    return [
+        model(**{column: field.to_python(value) for (column, field), value in zip(columns, row)})
+        for row in table["rows"]
+    ]
+
+def load_snapshot(path, flush=False):
+    """
+    Restore the catalog from a snapshot with bulk inserts.
+
+    Foreign keys are only checked once every table is loaded (where the database
+    allows deferring them), the whole restore is one transaction.
+
+    Args:
+        path (str): snapshot file
+        flush (bool): delete the current catalog first, this also deletes its submissions and votes
+
+    Returns:
+        dict: number of restored rows per table
+    """
+    snapshot = read_snapshot(path)
+    tables = snapshot["tables"]
+
+    counts = {}
+    with connection.constraint_checks_disabled():
+        with transaction.atomic():
+            if flush:
+                for model in reversed(CATALOG_MODELS):
+                    model.objects.all().delete()
+            else:
+                populated = [model._meta.label_lower for model in CATALOG_MODELS if model.objects.exists()]
+                if populated:
+                    raise SnapshotError(f"The catalog is not empty ({', '.join(populated)}), restore with flush to replace it")
+
+            for model in CATALOG_MODELS:
+                table = tables.get(model._meta.label_lower, {"columns": [], "rows": []})
+                instances = get_instances(model, table)
+                model.objects.bulk_create(instances, batch_size=BATCH_SIZE)
+                counts[model._meta.label_lower] = len(instances)
+
+            connection.check_constraints(table_names=[model._meta.db_table for model in CATALOG_MODELS])
+
+            # primary keys were restored as is, move the sequences past them
+            statements = connection.ops.sequence_reset_sql(no_style(), CATALOG_MODELS)
+            if statements:
+                with connection.cursor() as cursor:
+                    for statement in statements:
+                        cursor.execute(statement)
+
+    # bulk inserts send no signals
+    refresh_indexes(Problem.objects.values_list("pk", flat=True))
+    invalidate_catalog()
+    invalidate_problem_list()
+    for namespace in ["problem", "tag", "language"]:
+        invalidate_namespace(namespace)
+
+    return counts
@@ -0,0 +1,77 @@
+import zlib
+from datetime import timedelta
+from hashlib import sha256
+
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+
+from .models import SourceCode, SourceCompression
+
+COMPRESSION_LEVEL = 6
+
+# a reused body has its last use refreshed at most this often, unused bodies are
+# only deleted once their last use is older than UNUSED_SOURCE_AGE
+TOUCH_INTERVAL = timedelta(hours=1)
+UNUSED_SOURCE_AGE = timedelta(days=1)
+
+def get_digest(code):
+    return sha256(code.encode("utf-8")).hexdigest()
+
+def build_source(code, digest=None):
+    """
+    Build an unsaved SourceCode for ``code``, compressed unless that does not
+    make it any smaller (short snippets).
+    """
+    raw = code.encode("utf-8")
+    data = zlib.compress(raw, COMPRESSION_LEVEL)
+    compression = SourceCompression.ZLIB
+    if len(data) >= len(raw):
+        data, compression = raw, SourceCompression.NONE
+
+    return SourceCode(digest=digest or get_digest(code), compression=compression, data=data, size=len(raw))
+
+def touch_sources(digests):
+    # before the lookup, so a body found by it is never old enough to be deleted
+    now = timezone.now()
+    SourceCode.objects.filter(digest__in=digests, last_used_at__lt=now - TOUCH_INTERVAL).update(last_used_at=now)
+
+def store_source(code):
+    """
+    Returns the stored SourceCode of ``code``, identical bodies (e.g. a user
+    resubmitting the same solution) share one row.
+    """
+    digest = get_digest(code)
+    touch_sources([digest])
+    source = SourceCode.objects.filter(digest=digest).defer("data").first()
+    if source:
+        return source
+
+    try:
+        with transaction.atomic():
+            source = build_source(code, digest)
+            source.save()
+            return source
+    except IntegrityError:
+        # stored by a concurrent submission
+        return SourceCode.objects.defer("data").get(digest=digest)
+
+def store_sources(codes):
+    """
+    Store many bodies with one lookup and one bulk insert.
+
+    Args:
+        codes (Iterable[str]): source bodies
+
+    Returns:
+        dict: primary key of the SourceCode per digest
+    """
+    sources = {get_digest(code): code for code in codes}
+    touch_sources(list(sources))
+    existing = dict(SourceCode.objects.filter(digest__in=sources).values_list("digest", "pk"))
+
+    missing = [build_source(code, digest) for digest, code in sources.items() if digest not in existing]
+    if missing:
+        SourceCode.objects.bulk_create(missing, ignore_conflicts=True)
+        existing.update(SourceCode.objects.filter(digest__in=[source.digest for source in missing]).values_list("digest", "pk"))
+
+    return existing
@@ -0,0 +1,217 @@
+import threading
+from collections import defaultdict
+
+from django.db.models import Exists, OuterRef
+
+from .cache import get_version, bump_version
+from .models import Problem, ProblemTag, DifficultyChoices
+
+VERSION_KEY = "version:tag_index"
+
+# larger matches are filtered with tag subqueries instead of a primary key list
+# (one bound parameter per problem, capped by SQLite and slow to plan on postgres)
+MAX_FILTER_IDS = 500
+
+class TagBitmapIndex:
+    """
+    Per-process bitmap index over published problems.
+
+    Every problem gets a bit position, every tag and difficulty a bitset (a python
+    int) of the problems carrying it, so tag queries are AND/OR/NOT over ints and
+    facet counts are popcounts. Changes made in this process are applied
+    incrementally; changes made by other processes bump a shared version in the
+    cache which makes this process rebuild on its next query.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.version = None
+        self.positions = {}
+        self.problem_ids = []
+        self.free_positions = []
+        self.published = 0
+        self.tags = defaultdict(int)
+        self.difficulties = defaultdict(int)
+
+    def build(self):
+        with self.lock:
+            version = get_version(VERSION_KEY)
+
+            self.positions = {}
+            self.problem_ids = []
+            self.free_positions = []
+            self.published = 0
+            self.tags = defaultdict(int)
+            self.difficulties = defaultdict(int)
+
+            for problem in Problem.objects.filter(published=True).values("pk", "difficulty"):
+                bit = self._allocate(problem["pk"])
+                self.published |= bit
+                self.difficulties[problem["difficulty"]] |= bit
+
+            for problem_id, name in ProblemTag.objects.filter(problem__published=True).values_list("problem_id", "tag__name"):
+                self.tags[name] |= 1 << self.positions[problem_id]
+
+            self.version = version
+            self.loaded = True
+
+    def ensure_fresh(self):
+        with self.lock:
+            if not self.loaded or self.version != get_version(VERSION_KEY):
+                self.build()
+
+    def update(self, problem_ids):
+        """
+        Re-read the given problems and patch their bits in place.
+        """
+        version = bump_version(VERSION_KEY)
+
+        with self.lock:
+            if not self.loaded:
+                return
+
+            # a stale index is rebuilt as a whole instead of patched
+            if self.version != version - 1:
+                self.loaded = False
+                return
+
+            for problem_id in problem_ids:
+                self._clear(problem_id)
+
+            problems = Problem.objects.filter(pk__in=problem_ids, published=True).prefetch_related("tags")
+            for problem in problems:
+                bit = self._allocate(problem.pk)
+                self.published |= bit
+                self.difficulties[problem.difficulty] |= bit
+                for tag in problem.tags.all():
+                    self.tags[tag.name] |= bit
+
+            self.version = version
+
+    def invalidate(self):
+        bump_version(VERSION_KEY)
+        with self.lock:
+            self.loaded = False
+
+    def query(self, all_tags=(), any_tags=(), exclude_tags=(), difficulty=None):
+        """
+        Returns the bitset of published problems that have every tag in ``all_tags``,
+        at least one tag in ``any_tags`` (when given), none of ``exclude_tags`` and
+        the given difficulty (when given).
+        """
+        self.ensure_fresh()
+
+        with self.lock:
+            result = self.published
+
+            for name in all_tags:
+                result &= self.tags.get(name, 0)
+
+            if any_tags:
+                matches = 0
+                for name in any_tags:
+                    matches |= self.tags.get(name, 0)
+                result &= matches
+
+            for name in exclude_tags:
+                result &= ~self.tags.get(name, 0)
+
+            if difficulty is not None:
+                result &= self.difficulties.get(difficulty, 0)
+
+            return result
+
+    def bitmap_of(self, problem_ids):
+        self.ensure_fresh()
+
+        with self.lock:
+            result = 0
+            for problem_id in problem_ids:
+                position = self.positions.get(problem_id)
+                if position is not None:
+                    result |= 1 << position
+            return result & self.published
+
+    def ids(self, bitmap):
+        with self.lock:
+            ids = []
+            while bitmap:
+                low = bitmap & -bitmap
+                ids.append(self.problem_ids[low.bit_length() - 1])
+                bitmap ^= low
+            return ids
+
+    def facets(self, bitmap):
+        """
+        Returns the number of problems per tag and per difficulty inside ``bitmap``.
+        """
+        with self.lock:
+            return {
+                "total": bitmap.bit_count(),
+                "tags": {name: (bits & bitmap).bit_count() for name, bits in sorted(self.tags.items()) if bits & bitmap},
+                "difficulty": {
+                    choice.label.lower(): (self.difficulties.get(choice.value, 0) & bitmap).bit_count()
+                    for choice in DifficultyChoices
+                }
+            }
+
+    def tag_counts(self):
+        """
+        Returns the number of published problems per tag name.
+        """
+        self.ensure_fresh()
+
+        with self.lock:
+            return {name: bits.bit_count() for name, bits in self.tags.items()}
+
+    def _allocate(self, problem_id):
+        if self.free_positions:
+            position = self.free_positions.pop()
+            self.problem_ids[position] = problem_id
+        else:
+            position = len(self.problem_ids)
+            self.problem_ids.append(problem_id)
+
+        self.positions[problem_id] = position
+        return 1 << position
+
+    def _clear(self, problem_id):
+        position = self.positions.pop(problem_id, None)
+        if position is None:
+            return
+
+        mask = ~(1 << position)
+        self.published &= mask
+        for table in (self.tags, self.difficulties):
+            for key in list(table):
+                table[key] &= mask
+                if not table[key]:
+                    del table[key]
+
+        self.problem_ids[position] = None
+        self.free_positions.append(position)
+
+TAG_INDEX = TagBitmapIndex()
+
+def filter_by_tags(queryset, bitmap, all_tags=(), any_tags=(), exclude_tags=(), difficulty=None):
+    """
+    Filter a problem queryset down to ``bitmap``, the result of ``TAG_INDEX.query``
+    for the same tags and difficulty: by primary key when it is small, through
+    tag subqueries otherwise.
+    """
+    if bitmap.bit_count() <= MAX_FILTER_IDS:
+        return queryset.filter(pk__in=TAG_INDEX.ids(bitmap))
+
+    def tagged(names):
+        return Exists(ProblemTag.objects.filter(problem=OuterRef("pk"), tag__name__in=names))
+
+    for name in all_tags:
+        queryset = queryset.filter(tagged([name]))
+    if any_tags:
+        queryset = queryset.filter(tagged(any_tags))
+    if exclude_tags:
+        queryset = queryset.exclude(tagged(exclude_tags))
+    if difficulty is not None:
+        queryset = queryset.filter(difficulty=difficulty)
+    return queryset
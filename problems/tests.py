@@ -0,0 +1,1408 @@
+import os
+import gzip
+import json
+import base64
+import tempfile
+from decimal import Decimal
+from uuid import uuid4
+import threading
+from io import StringIO
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from urllib.parse import urlsplit, parse_qs
+
+from django.db import connection, DatabaseError
+from django.core.management import call_command, CommandError
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APIClient
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import Account, AccountSolvedProblems
+from backend.cache import TieredCache
+from backend.renderers import FastJSONRenderer
+from .models import Problem, Language, Submission, SubmissionStatus, TestCase as ProblemTestCase, JudgeJob, JudgeJobKind, JudgeJobStatus
+from .models import Solution, Implementation, ProblemBaseline, ValueField, FieldType, Tag, ProblemTag, ProblemVote, VoteType, Code, Complexity, ComplexityType
+from .models import SourceCode, SourceCompression
+from .admin import ProblemAdminForm
+from .judging import enqueue_job, claim_job, finish_job, retry_job, record_submission, judge_code, get_harness_fragments, JUDGE_MANAGER, JudgeError
+from .warmup import warm_caches
+from .cache import bump_version, get_version, problem_version_key, LIST_VERSION_KEY
+from .votes import VoteBuffer
+from .rejudge import RateLimiter, judge_with_retries
+from .payloads import materialize, payload_response
+from .search import InvertedIndex
+from .tag_index import TAG_INDEX, filter_by_tags
+from .serializers import CreateImplementationSerializer
+from .languages import LANGUAGES
+from .sources import TOUCH_INTERVAL, UNUSED_SOURCE_AGE, get_digest, store_source, store_sources
+from .importer import ProblemImporter, InvalidImportError, validate_entry
+from .partitions import archive_month, delete_unused_sources
+from .snapshot import CATALOG_MODELS, SnapshotError, export_snapshot, load_snapshot, get_snapshot_fields
+from .pagination import ProblemPagination, SubmissionPagination, RecentSubmissionPagination
+
+class QueryPlanTests(TestCase):
+    """
+    Checks that the hot query shapes are answered from their indexes on a
+    catalog and submission history of representative proportions.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        language = Language.objects.create(name="python", judge_id=71)
+
+        problems = Problem.objects.bulk_create([
+            Problem(name=f"Problem {index}", difficulty=index % 3, description="", constraints="", published=index % 10 != 0)
+            for index in range(600)
+        ])
+        accounts = Account.objects.bulk_create([
+            Account(email=f"user{index}@example.com", username=f"user{index}", first_name="User", last_name=str(index))
+            for index in range(60)
+        ])
+
+        ProblemTestCase.objects.bulk_create([
+            ProblemTestCase(problem=problem, is_sample=index < 2)
+            for problem in problems for index in range(8)
+        ])
+
+        now = datetime.now()
+        Submission.objects.bulk_create([
+            Submission(
+                problem=problems[index % len(problems)],
+                account=accounts[index % len(accounts)],
+                status=SubmissionStatus.values[index % len(SubmissionStatus.values)],
+                code="",
+                language=language,
+                time="0.01",
+                memory=1024,
+                date=now - timedelta(minutes=index),
+                time_percent=50,
+                memory_percent=50
+            )
+            for index in range(6000)
+        ])
+        AccountSolvedProblems.objects.bulk_create([
+            AccountSolvedProblems(account=account, problem=problems[index])
+            for account in accounts for index in range(0, 600, 20)
+        ])
+
+        # planner statistics for the freshly loaded tables
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.problem = problems[1]
+        cls.account = accounts[1]
+
+    def assertUsesIndex(self, queryset, *indexes):
+        plan = queryset.explain()
+        self.assertTrue(any(index in plan for index in indexes), f"{' or '.join(indexes)} is not used by:\n{plan}")
+
+    def test_submissions_by_problem(self):
+        self.assertUsesIndex(Submission.objects.filter(problem=self.problem).order_by("-date")[:20], "submission_problem_date_idx")
+
+    def test_submissions_by_account(self):
+        self.assertUsesIndex(Submission.objects.filter(account=self.account).order_by("-date")[:20], "submission_account_date_idx")
+
+    def test_submissions_by_account_and_status(self):
+        queryset = Submission.objects.filter(account=self.account, status=SubmissionStatus.ACCEPTED)
+        self.assertUsesIndex(queryset, "submission_account_status_idx")
+
+    def test_solved_problem_lookup(self):
+        queryset = AccountSolvedProblems.objects.filter(account=self.account, problem=self.problem)
+        # sqlite keeps unique constraints inline, under an automatic index name
+        self.assertUsesIndex(queryset, "unique_solved_problem_per_account", "sqlite_autoindex_accounts_accountsolvedproblems_2")
+
+    def test_sample_testcases(self):
+        self.assertUsesIndex(ProblemTestCase.objects.filter(problem=self.problem, is_sample=True), "testcase_problem_sample_idx")
+
+    def test_published_problems_by_difficulty(self):
+        queryset = Problem.objects.filter(published=True, difficulty=1).order_by("difficulty", "name", "id")[:50]
+        self.assertUsesIndex(queryset, "problem_published_order_idx")
+
+class KeysetPaginationTests(TestCase):
+    """
+    Pages through problems and submissions the way clients follow ``next`` links.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        language = Language.objects.create(name="python", judge_id=71)
+        account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="One")
+
+        # several problems per difficulty, so pages end in the middle of one
+        Problem.objects.bulk_create([
+            Problem(name=name, difficulty=difficulty, description="", constraints="", published=True)
+            for name, difficulty in [("Delta", 1), ("Alpha", 2), ("Echo", 1), ("Bravo", 1), ("Golf", 0), ("Charlie", 2), ("Foxtrot", 0)]
+        ])
+
+        # submissions sharing a date are told apart by their id
+        now = timezone.now()
+        problem = Problem.objects.first()
+        Submission.objects.bulk_create([
+            Submission(
+                problem=problem, account=account, status=SubmissionStatus.ACCEPTED, code="", language=language,
+                time="0.01", memory=1024, date=now - timedelta(minutes=index // 3), time_percent=50, memory_percent=50
+            )
+            for index in range(14)
+        ])
+
+    def paginate(self, paginator_class, queryset, **params):
+        paginator = paginator_class()
+        page = paginator.paginate_queryset(queryset, Request(APIRequestFactory().get("/", params)))
+        return paginator, page
+
+    def follow(self, paginator_class, queryset, **params):
+        """
+        Returns every page up to the last one.
+        """
+        pages = []
+        while True:
+            paginator, page = self.paginate(paginator_class, queryset, **params)
+            pages.append(page)
+            link = paginator.get_next_link()
+            if link is None:
+                return pages
+
+            # a cursor that does not move past its row would page forever
+            self.assertLessEqual(len(pages), queryset.count(), "pagination does not advance")
+            params = {key: values[0] for key, values in parse_qs(urlsplit(link).query).items()}
+
+    def encode(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+    def test_problem_pages_follow_catalog_order(self):
+        problems = Problem.objects.filter(published=True)
+        pages = self.follow(ProblemPagination, problems, page_size=2)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(
+            [problem.pk for page in pages for problem in page],
+            list(problems.order_by("difficulty", "name", "id").values_list("pk", flat=True))
+        )
+
+    def test_submission_ties_are_broken_by_id(self):
+        submissions = Submission.objects.all()
+        pages = self.follow(SubmissionPagination, submissions, page_size=4)
+
+        seen = [submission.pk for page in pages for submission in page]
+        self.assertEqual(seen, list(submissions.order_by("-date", "-id").values_list("pk", flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_cursor_round_trips(self):
+        paginator, page = self.paginate(ProblemPagination, Problem.objects.all(), page_size=3)
+        last = page[-1]
+
+        cursor = paginator.encode_cursor(last)
+        request = Request(APIRequestFactory().get("/", {"cursor": cursor}))
+        self.assertEqual(paginator.decode_cursor(request, Problem), {"difficulty": last.difficulty, "name": last.name, "id": last.id})
+
+    def test_invalid_cursors_are_rejected(self):
+        for cursor in ["not-base64!", self.encode({"id": 1}), self.encode([1, "Alpha"]), self.encode(["x", "Alpha", 1])]:
+            with self.subTest(cursor=cursor), self.assertRaises(NotFound):
+                self.paginate(ProblemPagination, Problem.objects.all(), cursor=cursor)
+
+    def test_seek_is_bounded_by_the_first_field(self):
+        date = timezone.now()
+        seek = SubmissionPagination().get_seek_filter({"date": date, "id": 5})
+        self.assertIn(("date__lte", date), seek.children)
+
+        seek = ProblemPagination().get_seek_filter({"difficulty": 1, "name": "Bravo", "id": 5})
+        self.assertIn(("difficulty__gte", 1), seek.children)
+
+    def test_recent_submissions_page_size(self):
+        submissions = Submission.objects.all()
+
+        paginator, page = self.paginate(RecentSubmissionPagination, submissions)
+        self.assertEqual(len(page), 10)
+
+        paginator, page = self.paginate(RecentSubmissionPagination, submissions, size=3)
+        self.assertEqual(len(page), 3)
+        self.assertEqual(parse_qs(urlsplit(paginator.get_next_link()).query)["size"], ["3"])
+
+        # page_size is not the parameter of this paginator, invalid sizes fall back to the default
+        for params, expected in [({"page_size": 3}, 10), ({"size": 0}, 10), ({"size": "many"}, 10), ({"size": 500}, 14)]:
+            with self.subTest(params=params):
+                paginator, page = self.paginate(RecentSubmissionPagination, submissions, **params)
+                self.assertEqual(len(page), expected)
+
+class SubmissionListingTests(TestCase):
+    """
+    The submission listing of a problem pages through every account's submissions
+    without their code.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        language = Language.objects.create(name="python", judge_id=71)
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="")
+        cls.accounts = [
+            Account.objects.create_user(f"user{index}@example.com", "password", username=f"user{index}", first_name="User", last_name=str(index))
+            for index in range(2)
+        ]
+        now = timezone.now()
+        Submission.objects.bulk_create([
+            Submission(
+                problem=cls.problem, account=cls.accounts[index % 2], status=SubmissionStatus.ACCEPTED, code="secret", language=language,
+                time="0.01", memory=1024, date=now - timedelta(minutes=index), time_percent=50, memory_percent=50
+            )
+            for index in range(5)
+        ])
+
+    def test_lists_submissions_of_every_account(self):
+        client = APIClient()
+        client.force_authenticate(self.accounts[0])
+
+        response = client.get(f"/api/v1/problem/{self.problem.public_id}/submissions/", {"page_size": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertNotIn("code", response.data["results"][0])
+
+        response = client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["next"])
+
+class SearchIndexTests(TestCase):
+    """
+    Two InvertedIndex instances stand in for the indexes of two worker processes
+    sharing one cache.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="Find the numbers adding up to a target", constraints="")
+        Problem.objects.create(name="Valid Parentheses", difficulty=1, description="Check the brackets", constraints="")
+
+    def test_ranks_name_matches_first(self):
+        Problem.objects.create(name="Target Practice", difficulty=0, description="", constraints="")
+        scores = InvertedIndex().search("target")
+        self.assertEqual(list(scores), [Problem.objects.get(name="Target Practice").pk, self.problem.pk])
+
+    def test_changes_of_another_process_are_picked_up(self):
+        writer, reader = InvertedIndex(), InvertedIndex()
+        self.assertEqual(list(writer.search("sum")), [self.problem.pk])
+        self.assertEqual(list(reader.search("sum")), [self.problem.pk])
+
+        Problem.objects.filter(pk=self.problem.pk).update(name="Pair Sum")
+        writer.update([self.problem.pk])
+
+        self.assertEqual(list(reader.search("pair")), [self.problem.pk])
+        self.assertEqual(reader.search("two"), {})
+
+    def test_stale_index_rebuilds_instead_of_patching(self):
+        first, second = InvertedIndex(), InvertedIndex()
+        first.search("sum")
+        second.search("sum")
+
+        Problem.objects.filter(pk=self.problem.pk).update(name="Pair Sum")
+        second.update([self.problem.pk])
+
+        # first missed second's change, patching would leave it out
+        Problem.objects.filter(pk=self.problem.pk).update(description="Pair up numbers")
+        first.update([])
+        self.assertFalse(first.loaded)
+        self.assertEqual(list(first.search("pair")), [self.problem.pk])
+
+    def test_removed_problems_are_not_found(self):
+        index = InvertedIndex()
+        index.search("sum")
+        index.remove(self.problem.pk)
+        self.assertEqual(index.search("sum"), {})
+
+@override_settings(JUDGE_MAX_ATTEMPTS=3, JUDGE_RETRY_DELAY=10, JUDGE_JOB_TIMEOUT=300)
+class JudgeJobTests(TestCase):
+    """
+    Walks judge jobs through claims, retries and timed out attempts without a judge.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name="python", judge_id=71)
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="")
+
+    def setUp(self):
+        self.job = enqueue_job(JudgeJobKind.RUN, self.problem, self.language, "print(1)")
+
+    def make_due(self):
+        JudgeJob.objects.filter(pk=self.job.pk).update(run_after=timezone.now())
+
+    def time_out(self):
+        JudgeJob.objects.filter(pk=self.job.pk).update(started_at=timezone.now() - timedelta(seconds=301))
+
+    def test_claims_queued_job_once(self):
+        job = claim_job("worker-a")
+        self.assertEqual((job.pk, job.status, job.attempts, job.worker), (self.job.pk, JudgeJobStatus.RUNNING, 1, "worker-a"))
+        self.assertIsNone(claim_job("worker-b"))
+
+    def test_retry_backs_off_exponentially(self):
+        for attempt, delay in [(1, 10), (2, 20)]:
+            job = claim_job("worker-a")
+            self.assertEqual(job.attempts, attempt)
+
+            before = timezone.now()
+            self.assertEqual(retry_job(job, "judge down", 0.1), JudgeJobStatus.QUEUED)
+            job.refresh_from_db()
+            self.assertEqual(job.error, "judge down")
+            self.assertAlmostEqual((job.run_after - before).total_seconds(), delay, delta=1)
+
+            # not due again before its backoff passed
+            self.assertIsNone(claim_job("worker-a"))
+            self.make_due()
+
+    def test_fails_after_max_attempts(self):
+        for _ in range(2):
+            retry_job(claim_job("worker-a"), "judge down", 0.1)
+            self.make_due()
+
+        job = claim_job("worker-a")
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(retry_job(job, "judge down", 0.1), JudgeJobStatus.FAILED)
+
+        job.refresh_from_db()
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_job("worker-a"))
+
+    def test_stale_attempt_is_rejected_after_takeover(self):
+        stale = claim_job("worker-a")
+        self.time_out()
+
+        current = claim_job("worker-b")
+        self.assertEqual((current.pk, current.attempts, current.worker), (self.job.pk, 2, "worker-b"))
+
+        # the first worker finishing late changes nothing
+        self.assertIsNone(finish_job(stale, {"submissions": []}, None, 0.1))
+        self.assertIsNone(retry_job(stale, "late", 0.1))
+
+        self.assertEqual(finish_job(current, {"submissions": []}, None, 0.1), JudgeJobStatus.DONE)
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.worker, self.job.error), (JudgeJobStatus.DONE, "worker-b", ""))
+
+    def test_timed_out_job_fails_at_max_attempts(self):
+        JudgeJob.objects.filter(pk=self.job.pk).update(status=JudgeJobStatus.RUNNING, attempts=3, started_at=timezone.now())
+        self.time_out()
+
+        self.assertIsNone(claim_job("worker-a"))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.error), (JudgeJobStatus.FAILED, "Judging timed out"))
+
+def get_verdict(status):
+    return {"status": status, "time": "0.02", "memory": 2048, "error_string": "", "reject_details": {}}
+
+class PublishTests(TestCase):
+    """
+    Publishing through the endpoint and the admin runs the reference implementations
+    (with the judge patched out), plain saves publish as they always did.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name="python", judge_id=71)
+        cls.staff = Account.objects.create_superuser("staff@example.com", "password", username="staff", first_name="Staff", last_name="User")
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="", published=False)
+        ProblemTestCase.objects.create(problem=cls.problem, is_sample=True)
+        solution = Solution.objects.create(problem=cls.problem, name="Hash map")
+        Implementation.objects.create(solution=solution, language=cls.language, value="class Solution: pass")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def publish(self, status):
+        with mock.patch("problems.verification.judge_with_retries", return_value=get_verdict(status)) as judge:
+            response = self.client.post(f"/api/v1/problem/{self.problem.public_id}/publish/")
+        self.assertEqual(judge.call_count, 1)
+        self.problem.refresh_from_db()
+        return response
+
+    def test_failing_implementation_blocks_publishing(self):
+        response = self.publish(SubmissionStatus.REJECTED)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data["errors"]), 1)
+        self.assertFalse(self.problem.published)
+        self.assertFalse(ProblemBaseline.objects.get(problem=self.problem, language=self.language).passed)
+
+    def test_passing_implementations_publish(self):
+        response = self.publish(SubmissionStatus.ACCEPTED)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.problem.published)
+        baseline = ProblemBaseline.objects.get(problem=self.problem, language=self.language)
+        self.assertEqual((baseline.passed, baseline.time, baseline.memory), (True, 0.02, 2048))
+
+    def test_publish_requires_staff(self):
+        self.client.force_authenticate(Account.objects.create_user("user@example.com", "password", username="user", first_name="A", last_name="B"))
+        response = self.client.post(f"/api/v1/problem/{self.problem.public_id}/publish/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_admin_only_publishes_verified_problems(self):
+        def form():
+            data = {field.name: getattr(self.problem, field.attname) for field in Problem._meta.concrete_fields if field.editable}
+            data["published"] = True
+            return ProblemAdminForm(data, instance=Problem.objects.get(pk=self.problem.pk))
+
+        self.assertIn("published", form().errors)
+        ProblemBaseline.objects.create(problem=self.problem, language=self.language, passed=True)
+        self.assertNotIn("published", form().errors)
+
+    def test_plain_saves_still_publish(self):
+        problem = Problem.objects.create(name="Unverified", difficulty=0, description="", constraints="")
+        self.assertTrue(problem.published)
+
+
+class ImporterTests(TestCase):
+    """
+    Imports a small problem file with ProblemImporter and re-imports it.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name="python", judge_id=71)
+
+    def setUp(self):
+        LANGUAGES.invalidate()
+
+    def get_entry(self, name="Two Sum", **fields):
+        entry = {
+            "name": name,
+            "difficulty": 1,
+            "description": "Find two numbers adding up to a target",
+            "constraints": "",
+            "tags": [{"name": "Array"}],
+            "testcases": [{"is_sample": True, "inputs": [{"name": "nums", "type": 3, "value": [1, 2]}]}],
+            "solutions": [{"name": "Brute force", "implementations": [{"language": str(self.language.public_id), "value": "pass"}], "complexities": [{"type": 1, "value": "O(n^2)"}]}]
+        }
+        entry.update(fields)
+        return entry
+
+    def run_import(self, entries):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as file:
+            json.dump(entries, file)
+            file.flush()
+            return ProblemImporter(chunk_size=2).run(file.name)
+
+    def test_reimport_is_idempotent(self):
+        entries = [self.get_entry(), self.get_entry("Valid Parentheses"), self.get_entry("Climbing Stairs")]
+        stats = self.run_import(entries)
+        self.assertEqual((stats["created"], stats["updated"], stats["unchanged"]), (3, 0, 0))
+        ids = set(Problem.objects.values_list("public_id", flat=True))
+
+        stats = self.run_import(entries)
+        self.assertEqual((stats["created"], stats["updated"], stats["unchanged"], stats["rows"]), (0, 0, 3, 0))
+        self.assertEqual(set(Problem.objects.values_list("public_id", flat=True)), ids)
+        self.assertEqual(ProblemTestCase.objects.count(), 3)
+        self.assertEqual(Implementation.objects.count(), 3)
+
+    def test_changed_problem_is_updated_in_place(self):
+        self.run_import([self.get_entry()])
+        problem = Problem.objects.get(name="Two Sum")
+
+        stats = self.run_import([self.get_entry(difficulty=2, tags=[{"name": "Hash Table"}])])
+        self.assertEqual((stats["created"], stats["updated"]), (0, 1))
+        updated = Problem.objects.get(name="Two Sum")
+        self.assertEqual((updated.pk, updated.difficulty), (problem.pk, 2))
+        self.assertEqual(list(updated.tags.values_list("name", flat=True)), ["Hash Table"])
+        self.assertEqual(updated.testcases.count(), 1)
+
+    def test_changed_problem_loses_its_baselines(self):
+        self.run_import([self.get_entry()])
+        problem = Problem.objects.get(name="Two Sum")
+        self.assertTrue(problem.published)
+        ProblemBaseline.objects.create(problem=problem, language=self.language, passed=True, implementations_count=1, errors=[], verified_at=timezone.now())
+
+        # an unchanged problem keeps them
+        self.run_import([self.get_entry()])
+        self.assertTrue(ProblemBaseline.objects.filter(problem=problem).exists())
+
+        stats = self.run_import([self.get_entry(description="Find a pair adding up to a target")])
+        self.assertEqual(stats["unpublished"], 1)
+        self.assertFalse(ProblemBaseline.objects.filter(problem=problem).exists())
+        self.assertFalse(Problem.objects.get(pk=problem.pk).published)
+
+    def test_invalid_file_writes_nothing(self):
+        with self.assertRaises(InvalidImportError) as context:
+            self.run_import([self.get_entry(), self.get_entry(difficulty=7), self.get_entry("Two Sum")])
+        # the bad difficulty and two repeated names
+        self.assertEqual(len(context.exception.errors), 3)
+        self.assertFalse(Problem.objects.exists())
+
+    def test_validate_entry(self):
+        language_ids = {str(self.language.public_id)}
+        self.assertEqual(validate_entry(self.get_entry(), language_ids), [])
+
+        for difficulty in [True, False, "1", 1.0, None, 4]:
+            with self.subTest(difficulty=difficulty):
+                self.assertEqual(validate_entry(self.get_entry(difficulty=difficulty), language_ids), [f"invalid difficulty {difficulty!r}"])
+
+        self.assertEqual(len(validate_entry(self.get_entry(name="", testcases=[]), language_ids)), 2)
+        self.assertEqual(len(validate_entry(self.get_entry(), set())), 1)
+        self.assertEqual(validate_entry([], language_ids), ["entry is not an object"])
+
+class HarnessTests(TestCase):
+    """
+    Builds the judge harness of a problem from its (cached) fragments.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.python = Language.objects.create(name="python", judge_id=71)
+        cls.java = Language.objects.create(name="java", judge_id=62)
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="")
+
+        for index, (nums, output) in enumerate([("[1, 2]", "3"), ("[4, 5]", "9"), ("[7, 1]", "8")]):
+            testcase = ProblemTestCase.objects.create(problem=cls.problem, is_sample=index == 0)
+            ValueField.objects.create(testcase=testcase, name="nums", type=FieldType.ARRAY_INT, value=nums)
+            ValueField.objects.create(testcase=testcase, name="output", type=FieldType.INT, value=output)
+
+    def setUp(self):
+        # the cache outlives the rolled back test data, drop the harnesses of earlier tests
+        bump_version(problem_version_key(self.problem.public_id))
+
+    def get_problem(self):
+        return Problem.objects.prefetch_related("testcases__inputs").get(pk=self.problem.pk)
+
+    def by_output(self, fragments):
+        return {fragment["details"]["expected_output"]: fragment for fragment in fragments}
+
+    def get_response(self, outputs):
+        return {"submissions": [
+            {"stdout": output, "stderr": None, "compile_output": None, "time": "0.01", "memory": 1024}
+            for output in outputs
+        ]}
+
+    def test_fragments(self):
+        fragments = self.by_output(JUDGE_MANAGER.get_harness_fragments(self.get_problem(), self.java, is_sample=False))
+        self.assertEqual(set(fragments), {"3", "9", "8"})
+        self.assertEqual(fragments["3"]["func_name"], "twoSum")
+        self.assertEqual(fragments["3"]["args"], "nums")
+        self.assertEqual((fragments["3"]["out_type"], fragments["3"]["out_print"]), ("int", "System.out.print(output);"))
+        self.assertEqual(fragments["3"]["read_inputs"], "int[] nums = new int[] { 1, 2 };\n")
+        self.assertEqual(fragments["9"]["details"], {"inputs": [{"name": "nums", "value": "[4, 5]"}, {"name": "output", "value": "9"}], "expected_output": "9"})
+
+        self.assertEqual(set(self.by_output(JUDGE_MANAGER.get_harness_fragments(self.get_problem(), self.java))), {"3"})
+
+    def test_boilerplate_from_fragments(self):
+        problem = self.get_problem()
+        source_code = "class Solution:\n    def twoSum(self, nums):\n        return sum(nums)"
+        fragments = JUDGE_MANAGER.get_harness_fragments(problem, self.python, is_sample=False)
+
+        codes = JUDGE_MANAGER.create_boilerplate_code(source_code, problem, self.python, fragments=fragments)
+        self.assertEqual(codes, JUDGE_MANAGER.create_boilerplate_code(source_code, problem, self.python, is_sample=False))
+        self.assertEqual(len(codes), 3)
+        self.assertTrue(all(source_code in code and "print(sol.twoSum(nums), end='')" in code for code in codes))
+        self.assertEqual(sorted(line for code in codes for line in code.splitlines() if line.startswith("nums =")), ["nums = [1, 2]", "nums = [4, 5]", "nums = [7, 1]"])
+
+    def test_submission_status(self):
+        details = [fragment["details"] for fragment in JUDGE_MANAGER.get_harness_fragments(self.get_problem(), self.python, is_sample=False)]
+        outputs = [testcase["expected_output"] for testcase in details]
+        self.assertEqual(JUDGE_MANAGER.get_submission_status(details, self.get_response(outputs)["submissions"]), (True, {}))
+
+        status, failed = JUDGE_MANAGER.get_submission_status(details, self.get_response([output if output != "9" else "10" for output in outputs])["submissions"])
+        self.assertFalse(status)
+        self.assertEqual(failed, {"inputs": [{"name": "nums", "value": "[4, 5]"}, {"name": "output", "value": "9"}], "expected_output": "9", "original_output": "10"})
+
+    def test_judge_code(self):
+        outputs = [fragment["details"]["expected_output"] for fragment in get_harness_fragments(self.get_problem(), self.python, is_sample=False)]
+        with mock.patch("problems.judging.judge_batch", return_value=self.get_response(outputs)) as judge_batch:
+            fields = judge_code(self.get_problem(), self.python, "")
+        self.assertEqual(len(judge_batch.call_args.args[0]), 3)
+        self.assertEqual(fields["status"], SubmissionStatus.ACCEPTED)
+
+        with mock.patch("problems.judging.judge_batch", return_value=self.get_response(outputs[:2] + ["0"])):
+            fields = judge_code(self.get_problem(), self.python, "")
+        self.assertEqual(fields["status"], SubmissionStatus.REJECTED)
+        self.assertEqual(fields["reject_details"]["expected_output"], outputs[2])
+
+    def test_fragments_are_cached_per_problem_version(self):
+        fragments = get_harness_fragments(self.get_problem(), self.python, is_sample=False)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_harness_fragments(self.problem, self.python, is_sample=False), fragments)
+        self.assertEqual(len(get_harness_fragments(self.get_problem(), self.python)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ValueField.objects.filter(testcase__problem=self.problem, name="output", value="9").update(value="10")
+            ProblemTestCase.objects.filter(problem=self.problem).first().save()
+        self.assertEqual(set(self.by_output(get_harness_fragments(self.get_problem(), self.python, is_sample=False))), {"3", "10", "8"})
+
+class WarmupTests(TestCase):
+    """
+    Runs warm_caches over a small catalog.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name="python", judge_id=71)
+        cls.account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="Name")
+        cls.problems = [
+            Problem.objects.create(name=name, difficulty=1, description="", constraints="", published=published)
+            for name, published in [("Two Sum", True), ("Valid Parentheses", True), ("Hidden", False)]
+        ]
+        for problem in cls.problems:
+            testcase = ProblemTestCase.objects.create(problem=problem, is_sample=True)
+            ValueField.objects.create(testcase=testcase, name="output", type=FieldType.INT, value="1")
+
+        # the second problem had the recent traffic
+        Submission.objects.create(problem=cls.problems[1], account=cls.account, status=SubmissionStatus.ACCEPTED, code="", language=cls.language, time="0.01", memory=1024, time_percent=50, memory_percent=50)
+
+    def setUp(self):
+        LANGUAGES.invalidate()
+        for problem in self.problems:
+            bump_version(problem_version_key(problem.public_id))
+
+    def test_warm_caches(self):
+        lines = []
+        steps = warm_caches(top=5, days=7, list_urls=["http://localhost/api/v1/problem/"], log=lines.append)
+
+        self.assertEqual([step[0] for step in steps], ["languages", "tag index", "search index", "tags and catalog totals", "problem list pages", "popular problems"])
+        counts = {step[0]: step[1] for step in steps}
+        self.assertEqual(counts["languages"], 1)
+        self.assertEqual(counts["problem list pages"], 1)
+        # unpublished problems are not warmed
+        self.assertEqual(counts["popular problems"], 2)
+        self.assertTrue(all(step[2] > 0 for step in steps if step[1]))
+        self.assertGreaterEqual(len(lines), len(steps))
+
+        # the harnesses are served from the cache afterwards
+        with self.assertNumQueries(0):
+            get_harness_fragments(self.problems[1], self.language)
+
+    def test_bad_list_url(self):
+        with self.assertRaises(ValueError):
+            warm_caches(top=0, list_urls=["http://localhost/api/v1/problem/?difficulty=impossible"])
+
+class ArchiveTests(TestCase):
+    """
+    Archives a month of submissions to a file.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        language = Language.objects.create(name="python", judge_id=71)
+        account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="Name")
+        problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="")
+
+        Submission.objects.bulk_create([
+            Submission(
+                problem=problem, account=account, status=SubmissionStatus.ACCEPTED, code="print(1)", language=language,
+                time="0.01", memory=1024, date=date, time_percent=50, memory_percent=50
+            )
+            for date in [datetime(2024, 1, 5, tzinfo=dt_timezone.utc), datetime(2024, 1, 20, tzinfo=dt_timezone.utc), datetime(2024, 2, 1, tzinfo=dt_timezone.utc)]
+        ])
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, "submissions-2024-01.jsonl.gz")
+
+    def test_archive_month(self):
+        self.assertEqual(archive_month(datetime(2024, 1, 1, tzinfo=dt_timezone.utc), self.path), 2)
+
+        with gzip.open(self.path, "rt") as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(os.listdir(self.directory), ["submissions-2024-01.jsonl.gz"])
+        self.assertEqual(Submission.objects.count(), 1)
+
+    def test_failed_archive_leaves_no_file(self):
+        with mock.patch("problems.partitions.record_archived", side_effect=RuntimeError("boom")), self.assertRaises(RuntimeError):
+            archive_month(datetime(2024, 1, 1, tzinfo=dt_timezone.utc), self.path)
+
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(Submission.objects.count(), 3)
+
+    def test_empty_month(self):
+        self.assertEqual(archive_month(datetime(2023, 12, 1, tzinfo=dt_timezone.utc), self.path), 0)
+        self.assertEqual(os.listdir(self.directory), [])
+
+class ImplementationLanguageTests(TestCase):
+    """
+    Validates the language of reference implementations against the language registry.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name="python", judge_id=71)
+
+    def setUp(self):
+        # the registry outlives the rolled back languages of earlier tests
+        LANGUAGES.invalidate()
+
+    def test_known_language(self):
+        LANGUAGES.load()
+        for value in [str(self.language.public_id), self.language.public_id]:
+            with self.subTest(value=value), self.assertNumQueries(0):
+                serializer = CreateImplementationSerializer(data={"language": value, "value": "pass"})
+                self.assertTrue(serializer.is_valid(), serializer.errors)
+                self.assertEqual(str(serializer.validated_data["language"]), str(self.language.public_id))
+
+    def test_unknown_language(self):
+        for value in ["00000000-0000-0000-0000-000000000000", "python", "", {"public_id": str(self.language.public_id)}]:
+            with self.subTest(value=value):
+                serializer = CreateImplementationSerializer(data={"language": value, "value": "pass"})
+                self.assertFalse(serializer.is_valid())
+                self.assertIn("language", serializer.errors)
+
+class TagIndexTests(TestCase):
+    """
+    Queries the tag bitmap index of a small catalog and patches it.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        tags = {name: Tag.objects.create(name=name) for name in ["Array", "Hash Table", "Stack", "String"]}
+        cls.problems = {}
+        for name, difficulty, published, tag_names in [
+            ("Two Sum", 1, True, ["Array", "Hash Table"]),
+            ("Valid Parentheses", 1, True, ["Stack", "String"]),
+            ("Group Anagrams", 2, True, ["Array", "Hash Table", "String"]),
+            ("Trapping Rain Water", 3, True, ["Array", "Stack"]),
+            ("Hidden", 1, False, ["Array"])
+        ]:
+            problem = Problem.objects.create(name=name, difficulty=difficulty, description="", constraints="", published=published)
+            ProblemTag.objects.bulk_create([ProblemTag(problem=problem, tag=tags[tag_name]) for tag_name in tag_names])
+            cls.problems[name] = problem
+
+    def setUp(self):
+        # the index outlives the rolled back problems of earlier tests
+        TAG_INDEX.invalidate()
+
+    def names(self, bitmap):
+        return {problem.name for problem in Problem.objects.filter(pk__in=TAG_INDEX.ids(bitmap))}
+
+    def test_query(self):
+        for filters, expected in [
+            ({"all_tags": ["Array"]}, {"Two Sum", "Group Anagrams", "Trapping Rain Water"}),
+            ({"all_tags": ["Array", "Hash Table"]}, {"Two Sum", "Group Anagrams"}),
+            ({"any_tags": ["Stack", "String"]}, {"Valid Parentheses", "Group Anagrams", "Trapping Rain Water"}),
+            ({"exclude_tags": ["Array"]}, {"Valid Parentheses"}),
+            ({"all_tags": ["Array"], "difficulty": 1}, {"Two Sum"}),
+            ({"all_tags": ["Array"], "exclude_tags": ["Stack"], "any_tags": ["String", "Hash Table"]}, {"Two Sum", "Group Anagrams"}),
+            ({"all_tags": ["Graph"]}, set())
+        ]:
+            with self.subTest(filters=filters):
+                self.assertEqual(self.names(TAG_INDEX.query(**filters)), expected)
+
+    def test_facets(self):
+        self.assertEqual(TAG_INDEX.facets(TAG_INDEX.query(all_tags=["Array"])), {
+            "total": 3,
+            "tags": {"Array": 3, "Hash Table": 2, "Stack": 1, "String": 1},
+            "difficulty": {"school": 0, "easy": 1, "medium": 1, "hard": 1}
+        })
+        # unpublished problems are not counted
+        self.assertEqual(TAG_INDEX.tag_counts(), {"Array": 3, "Hash Table": 2, "Stack": 2, "String": 2})
+
+    def test_update_patches_changed_problems(self):
+        TAG_INDEX.query()
+        anagrams, hidden = self.problems["Group Anagrams"], self.problems["Hidden"]
+
+        ProblemTag.objects.filter(problem=anagrams, tag__name="String").delete()
+        Problem.objects.filter(pk=anagrams.pk).update(difficulty=3)
+        Problem.objects.filter(pk=hidden.pk).update(published=True)
+        TAG_INDEX.update([anagrams.pk, hidden.pk])
+
+        self.assertTrue(TAG_INDEX.loaded)
+        self.assertEqual(self.names(TAG_INDEX.query(all_tags=["String"])), {"Valid Parentheses"})
+        self.assertEqual(self.names(TAG_INDEX.query(all_tags=["Array"], difficulty=3)), {"Group Anagrams", "Trapping Rain Water"})
+        self.assertEqual(self.names(TAG_INDEX.query(all_tags=["Array"], difficulty=1)), {"Two Sum", "Hidden"})
+
+        Problem.objects.filter(pk=hidden.pk).update(published=False)
+        TAG_INDEX.update([hidden.pk])
+        self.assertEqual(self.names(TAG_INDEX.query(difficulty=1)), {"Two Sum", "Valid Parentheses"})
+
+    def test_subquery_filter_matches_the_bitmap(self):
+        problems = Problem.objects.filter(published=True)
+        for filters in [{"all_tags": ["Array", "Hash Table"]}, {"any_tags": ["Stack", "String"], "exclude_tags": ["Hash Table"]}, {"all_tags": ["Array"], "difficulty": 3}]:
+            with self.subTest(filters=filters):
+                bitmap = TAG_INDEX.query(**filters)
+                by_ids = set(filter_by_tags(problems, bitmap, **filters).values_list("pk", flat=True))
+                with mock.patch("problems.tag_index.MAX_FILTER_IDS", 0):
+                    by_subquery = set(filter_by_tags(problems, bitmap, **filters).values_list("pk", flat=True))
+                self.assertEqual(by_ids, by_subquery)
+                self.assertEqual(by_ids, set(TAG_INDEX.ids(bitmap)))
+
+class CounterTests(TestCase):
+    """
+    Keeps the denormalized submission and vote counters of problems in step.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name="python", judge_id=71)
+        cls.account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="Name")
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="")
+
+    def submit(self, status):
+        job = enqueue_job(JudgeJobKind.SUBMIT, self.problem, self.language, "print(1)", account=self.account)
+        return record_submission(job, {
+            "status": status, "time": "0.01", "memory": 1024, "time_percent": 50, "memory_percent": 50, "error_string": "", "reject_details": {}
+        })
+
+    def get_counters(self):
+        return Problem.objects.values_list("total_submissions_count", "accepted_submissions_count").get(pk=self.problem.pk)
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command("reconcilecounters", *args, stdout=out)
+        return out.getvalue()
+
+    def test_submissions_are_counted(self):
+        for status in [SubmissionStatus.REJECTED, SubmissionStatus.ACCEPTED, SubmissionStatus.ACCEPTED]:
+            self.submit(status)
+
+        self.assertEqual(self.get_counters(), (3, 2))
+        self.assertEqual(AccountSolvedProblems.objects.filter(account=self.account, problem=self.problem).count(), 1)
+        self.assertIn("Reconciled 0 problem(s)", self.reconcile())
+
+    def test_reconcile_fixes_drift(self):
+        self.submit(SubmissionStatus.ACCEPTED)
+        self.submit(SubmissionStatus.REJECTED)
+        Problem.objects.filter(pk=self.problem.pk).update(total_submissions_count=10, accepted_submissions_count=0)
+
+        self.assertIn("Found 1 drifted problem(s)", self.reconcile("--dry-run"))
+        self.assertEqual(self.get_counters(), (10, 0))
+
+        self.assertIn("Reconciled 1 problem(s)", self.reconcile())
+        self.assertEqual(self.get_counters(), (2, 1))
+
+    def test_reconcile_keeps_archived_and_legacy_counts(self):
+        self.submit(SubmissionStatus.ACCEPTED)
+        ProblemVote.objects.create(problem=self.problem, account=self.account, vote_type=VoteType.LIKE)
+        Problem.objects.filter(pk=self.problem.pk).update(
+            archived_submissions_count=5, archived_accepted_count=2, legacy_likes=4, legacy_dislikes=1, likes=0, dislikes=0
+        )
+
+        self.reconcile("--votes")
+        problem = Problem.objects.get(pk=self.problem.pk)
+        self.assertEqual((problem.total_submissions_count, problem.accepted_submissions_count), (6, 3))
+        self.assertEqual((problem.likes, problem.dislikes), (5, 1))
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "leetclone-test-cache")
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "shared"},
+    "file": {"BACKEND": "backend.cache.LockingFileBasedCache", "LOCATION": CACHE_DIR}
+})
+class CacheBackendTests(TestCase):
+    """
+    Runs the tiered cache against an in-memory L2 and the locking file cache
+    against a temporary directory. A second TieredCache instance over the same L2
+    stands in for another worker.
+    """
+
+    options = {
+        "SHARED_CACHE": "shared",
+        "LOCAL_MAX_ENTRIES": 3,
+        "GENERATION_TIMEOUT": 0,
+        "NAMESPACES": {"problem": {"timeout": 60, "local_timeout": 60}, "lock": {"local_timeout": 0}}
+    }
+
+    def setUp(self):
+        caches["shared"].clear()
+        caches["file"].clear()
+        self.cache = TieredCache(None, {"OPTIONS": self.options})
+        self.other = TieredCache(None, {"OPTIONS": self.options})
+
+    def test_local_then_shared_hits(self):
+        self.cache.set("problem:a", {"name": "Two Sum"})
+        self.assertEqual(self.cache.get("problem:a"), {"name": "Two Sum"})
+        self.assertEqual(self.other.get("problem:a"), {"name": "Two Sum"})
+        self.assertEqual(self.other.get("problem:a"), {"name": "Two Sum"})
+        self.assertIsNone(self.other.get("problem:b"))
+
+        self.assertEqual(self.cache.stats()["namespaces"]["problem"], {"sets": 1, "local_hits": 1})
+        self.assertEqual(self.other.stats()["namespaces"]["problem"], {"shared_hits": 1, "local_hits": 1, "misses": 1})
+
+    def test_values_are_copies(self):
+        value = {"tags": ["Array"]}
+        self.cache.set("problem:a", value)
+        value["tags"].append("Stack")
+        self.cache.get("problem:a")["tags"].append("String")
+        self.assertEqual(self.cache.get("problem:a"), {"tags": ["Array"]})
+
+    def test_namespace_invalidation_reaches_every_process(self):
+        self.cache.set("problem:a", 1)
+        self.cache.set("tag:a", 2)
+        self.assertEqual(self.other.get("problem:a"), 1)
+
+        self.other.invalidate_namespace("problem")
+        self.assertIsNone(self.cache.get("problem:a"))
+        self.assertIsNone(self.other.get("problem:a"))
+        self.assertEqual(self.cache.get("tag:a"), 2)
+
+    def test_generation_survives_eviction(self):
+        self.cache.set("problem:a", 1)
+        generation = self.cache.get_generation("problem")
+
+        # an evicted generation restarts above every generation used before
+        caches["shared"].delete("namespace:problem")
+        self.assertGreater(self.other.get_generation("problem"), generation)
+
+    def test_local_capacity_and_zero_local_timeout(self):
+        for index in range(5):
+            self.cache.set(f"problem:{index}", index)
+        local = self.cache.stats()["local"]
+        self.assertEqual((local["entries"], local["evictions"]), (3, 2))
+        self.assertEqual(self.cache.get("problem:0"), 0)
+
+        self.cache.add("lock:a", 1)
+        caches["shared"].clear()
+        self.assertIsNone(self.cache.get("lock:a"))
+
+    def test_incr_and_add(self):
+        self.assertTrue(self.cache.add("problem:count", 1))
+        self.assertFalse(self.other.add("problem:count", 5))
+        self.assertEqual(self.other.incr("problem:count"), 2)
+        self.assertEqual(self.cache.incr("problem:count", 3), 5)
+
+    def run_threads(self, target, count=8):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_file_cache_add_is_atomic(self):
+        cache = caches["file"]
+        won = []
+        self.run_threads(lambda: won.append(cache.add("lock", 1, timeout=60)))
+        self.assertEqual(won.count(True), 1)
+
+    def test_file_cache_incr_is_atomic(self):
+        cache = caches["file"]
+        cache.set("counter", 0, timeout=None)
+
+        def increment():
+            for _ in range(25):
+                cache.incr("counter")
+        self.run_threads(increment)
+        self.assertEqual(cache.get("counter"), 200)
+
+class VoteBufferTests(TestCase):
+    """
+    Buffers vote counter deltas and flushes them, directly and through the vote endpoint.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="")
+        cls.other = Problem.objects.create(name="Valid Parentheses", difficulty=1, description="", constraints="")
+        cls.accounts = [
+            Account.objects.create(email=f"user{index}@example.com", username=f"user{index}", first_name="User", last_name=str(index))
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        # flushed by the tests only
+        self.buffer = VoteBuffer(interval=3600)
+        patcher = mock.patch.object(self.buffer, "start")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_votes(self, problem):
+        return Problem.objects.values_list("likes", "dislikes").get(pk=problem.pk)
+
+    def test_deltas_are_coalesced(self):
+        for likes, dislikes in [(1, 0), (1, 0), (0, 1), (-1, 0)]:
+            self.buffer.add(self.problem.pk, self.problem.public_id, likes=likes, dislikes=dislikes)
+        self.buffer.add(self.other.pk, self.other.public_id, dislikes=1)
+        self.assertEqual(self.get_votes(self.problem), (0, 0))
+
+        version = get_version(problem_version_key(self.problem.public_id))
+        list_version = get_version(LIST_VERSION_KEY)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.buffer.flush(), 2)
+        # one update per problem
+        self.assertEqual(len([query for query in queries if query["sql"].startswith("UPDATE")]), 2)
+
+        self.assertEqual(self.get_votes(self.problem), (1, 1))
+        self.assertEqual(self.get_votes(self.other), (0, 1))
+        self.assertGreater(get_version(problem_version_key(self.problem.public_id)), version)
+        self.assertGreater(get_version(LIST_VERSION_KEY), list_version)
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_failed_flush_puts_deltas_back(self):
+        self.buffer.add(self.problem.pk, self.problem.public_id, likes=2)
+
+        with mock.patch("problems.votes.Problem.objects.filter", side_effect=DatabaseError("locked")), self.assertRaises(DatabaseError):
+            self.buffer.flush()
+        self.buffer.add(self.problem.pk, self.problem.public_id, likes=1)
+        self.assertEqual(self.get_votes(self.problem), (0, 0))
+
+        self.buffer.flush()
+        self.assertEqual(self.get_votes(self.problem), (3, 0))
+
+    def vote(self, account, method, data=None):
+        client = APIClient()
+        client.force_authenticate(account)
+        with mock.patch("problems.views.VOTE_BUFFER", self.buffer), self.captureOnCommitCallbacks(execute=True):
+            return getattr(client, method)(f"/api/v1/problem/{self.problem.public_id}/vote/", data, format="json")
+
+    def test_vote_endpoint(self):
+        self.assertEqual(self.vote(self.accounts[0], "put", {"vote_type": VoteType.LIKE}).status_code, 200)
+        self.vote(self.accounts[0], "put", {"vote_type": VoteType.LIKE})
+        self.vote(self.accounts[1], "put", {"vote_type": VoteType.LIKE})
+        self.vote(self.accounts[2], "put", {"vote_type": VoteType.DISLIKE})
+        self.vote(self.accounts[1], "put", {"vote_type": VoteType.DISLIKE})
+        self.vote(self.accounts[2], "delete")
+        self.assertEqual(self.vote(self.accounts[2], "put", {"vote_type": 5}).status_code, 400)
+
+        self.buffer.flush()
+        self.assertEqual(self.get_votes(self.problem), (1, 1))
+        self.assertEqual(ProblemVote.objects.filter(problem=self.problem).count(), 2)
+
+class PayloadTests(TestCase):
+    """
+    Encodes response payloads once and serves them as stored.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="Find two numbers", constraints="")
+        cls.account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="Name")
+
+    def setUp(self):
+        bump_version(problem_version_key(self.problem.public_id))
+        self.client = APIClient()
+        self.client.force_authenticate(self.account)
+
+    def test_materialize(self):
+        data = {"name": "Two Sum", "tags": ["Array"] * 50}
+        payload = materialize(data)
+
+        self.assertEqual(json.loads(payload["identity"]), data)
+        self.assertEqual(gzip.decompress(payload["gzip"]), payload["identity"])
+        self.assertLess(len(payload["gzip"]), len(payload["identity"]))
+        self.assertIsNone(materialize(None))
+
+    def test_fast_renderer_matches_drf(self):
+        data = {"id": uuid4(), "time": Decimal("0.25"), "date": timezone.now(), "values": [1, None, True], "nested": {"name": "é"}}
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+        indented = FastJSONRenderer().render({"a": 1}, "application/json; indent=2")
+        self.assertEqual(indented, JSONRenderer().render({"a": 1}, "application/json; indent=2"))
+
+    def test_payload_response_encoding(self):
+        payload = materialize({"name": "Two Sum"})
+        for accept, encoding in [("gzip, deflate", "gzip"), ("gzip;q=0", None), ("", None), ("identity", None)]:
+            with self.subTest(accept=accept):
+                response = payload_response(APIRequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept), payload, etag='"tag"')
+                self.assertEqual(response.get("Content-Encoding"), encoding)
+                self.assertEqual(response.content, payload[encoding or "identity"])
+                self.assertEqual((response["ETag"], response["Vary"]), ('"tag"', "Accept-Encoding"))
+
+    def test_detail_is_served_pre_encoded(self):
+        url = f"/api/v1/problem/{self.problem.public_id}/"
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.content))["name"], "Two Sum")
+
+        # the second request serves the stored bytes without serializing again
+        with mock.patch("problems.views.build_problem_payload") as build:
+            response = self.client.get(url)
+        build.assert_not_called()
+        self.assertEqual(json.loads(response.content)["name"], "Two Sum")
+
+class ConditionalGetTests(TestCase):
+    """
+    Answers revalidations of the problem, tag and language endpoints with 304s
+    until what they were built from changes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name="python", judge_id=71)
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="")
+        cls.account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="Name")
+
+    def setUp(self):
+        bump_version(problem_version_key(self.problem.public_id))
+        self.client = APIClient()
+        self.client.force_authenticate(self.account)
+
+    def revalidate(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual((cached.content, cached["ETag"]), (b"", etag))
+        self.assertIn("Accept-Encoding", cached["Vary"])
+        return etag
+
+    def test_unchanged_resources_are_not_modified(self):
+        for url in [f"/api/v1/problem/{self.problem.public_id}/", "/api/v1/problem/list_all_tags/", "/api/v1/language/"]:
+            with self.subTest(url=url):
+                self.revalidate(url)
+
+    def test_every_encoding_has_its_own_tag(self):
+        url = f"/api/v1/problem/{self.problem.public_id}/"
+        self.assertNotEqual(self.revalidate(url), self.revalidate(url, HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertNotEqual(self.revalidate(url), self.revalidate(f"{url}?fields=name"))
+
+    def test_changed_problem_is_sent_again(self):
+        url = f"/api/v1/problem/{self.problem.public_id}/"
+        etag = self.revalidate(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Problem.objects.get(pk=self.problem.pk).save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+class SnapshotTests(TestCase):
+    """
+    Exports the catalog to a snapshot and restores it.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        language = Language.objects.create(name="python", judge_id=71)
+        tag = Tag.objects.create(name="Array")
+        for index, name in enumerate(["Two Sum", "Valid Parentheses"]):
+            problem = Problem.objects.create(name=name, difficulty=index, description=f"{name} description", constraints="", published=index == 0, source_hash="abc")
+            ProblemTag.objects.create(problem=problem, tag=tag)
+            testcase = ProblemTestCase.objects.create(problem=problem, is_sample=True)
+            ValueField.objects.create(testcase=testcase, name="output", type=FieldType.INT, value="1")
+            Code.objects.create(problem=problem, language=language, value="class Solution: pass")
+            solution = Solution.objects.create(problem=problem, name="Brute force", intution="", algorithm="")
+            Implementation.objects.create(solution=solution, language=language, value="pass")
+            Complexity.objects.create(solution=solution, type=ComplexityType.TIME, value="O(n)", explanation="")
+            ProblemBaseline.objects.create(problem=problem, language=language, passed=True, implementations_count=1, time=0.01, memory=1024, errors=[], verified_at=timezone.now())
+
+        Problem.objects.filter(name="Two Sum").update(likes=3, total_submissions_count=7)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "catalog.json.gz")
+
+    def get_rows(self):
+        return {
+            model._meta.label_lower: list(model.objects.order_by("pk").values_list(*[field.attname for field in get_snapshot_fields(model)]))
+            for model in CATALOG_MODELS
+        }
+
+    def test_round_trip(self):
+        rows = self.get_rows()
+        counts = export_snapshot(self.path)
+        self.assertEqual(counts, {table: len(values) for table, values in rows.items()})
+
+        self.assertEqual(load_snapshot(self.path, flush=True), counts)
+        self.assertEqual(self.get_rows(), rows)
+
+        # per-environment counters start over
+        problem = Problem.objects.get(name="Two Sum")
+        self.assertEqual((problem.likes, problem.total_submissions_count, problem.published), (0, 0, True))
+        self.assertFalse(Problem.objects.get(name="Valid Parentheses").published)
+
+    def test_restore_needs_an_empty_catalog_or_flush(self):
+        export_snapshot(self.path)
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path)
+
+        for model in reversed(CATALOG_MODELS):
+            model.objects.all().delete()
+        load_snapshot(self.path)
+        self.assertEqual(Problem.objects.count(), 2)
+
+    def test_unsupported_version(self):
+        with gzip.open(self.path, "wt") as file:
+            json.dump({"version": 1, "tables": {}}, file)
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path, flush=True)
+        self.assertEqual(Problem.objects.count(), 2)
+
+class SourceCodeTests(TestCase):
+    """
+    Stores identical source bodies once, compressed, and deletes the unused ones.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name="python", judge_id=71)
+        cls.account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="Name")
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="")
+        cls.code = "class Solution:\n" + "    def twoSum(self, nums, target):\n        pass\n" * 20
+
+    def submit(self, code):
+        return Submission.objects.create(
+            problem=self.problem, account=self.account, status=SubmissionStatus.ACCEPTED, code="", source=store_source(code),
+            language=self.language, time="0.01", memory=1024, time_percent=50, memory_percent=50
+        )
+
+    def test_identical_bodies_share_a_row(self):
+        first, second = self.submit(self.code), self.submit(self.code)
+        self.assertEqual(first.source_id, second.source_id)
+        self.assertEqual(SourceCode.objects.count(), 1)
+
+        source = SourceCode.objects.get()
+        self.assertEqual((source.compression, source.size), (SourceCompression.ZLIB, len(self.code)))
+        self.assertLess(len(bytes(source.data)), source.size)
+        self.assertEqual(Submission.objects.get(pk=first.pk).get_code(), self.code)
+
+    def test_short_bodies_are_not_compressed(self):
+        source = SourceCode.objects.get(pk=store_source("x").pk)
+        self.assertEqual((source.compression, bytes(source.data)), (SourceCompression.NONE, b"x"))
+        self.assertEqual(source.get_text(), "x")
+
+    def test_store_sources(self):
+        existing = store_source(self.code)
+        with self.assertNumQueries(4):
+            sources = store_sources([self.code, "print(1)", "print(1)"])
+
+        self.assertEqual(sources, {get_digest(self.code): existing.pk, get_digest("print(1)"): SourceCode.objects.get(digest=get_digest("print(1)")).pk})
+        self.assertEqual(SourceCode.objects.count(), 2)
+
+    def test_reuse_refreshes_the_last_use(self):
+        source = store_source(self.code)
+        recent = timezone.now() - TOUCH_INTERVAL / 2
+        SourceCode.objects.update(last_used_at=recent)
+
+        # refreshed at most once per TOUCH_INTERVAL
+        store_source(self.code)
+        self.assertEqual(SourceCode.objects.get(pk=source.pk).last_used_at, recent)
+
+        SourceCode.objects.update(last_used_at=timezone.now() - UNUSED_SOURCE_AGE * 2)
+        store_source(self.code)
+        self.assertGreater(SourceCode.objects.get(pk=source.pk).last_used_at, recent)
+
+    def test_delete_unused_sources(self):
+        used = self.submit(self.code).source
+        unused = store_source("print(1)")
+        fresh = store_source("print(2)")
+        SourceCode.objects.exclude(pk=fresh.pk).update(last_used_at=timezone.now() - UNUSED_SOURCE_AGE * 2)
+
+        # referenced and recently used bodies are kept
+        self.assertEqual(delete_unused_sources(), 1)
+        self.assertEqual(set(SourceCode.objects.values_list("pk", flat=True)), {used.pk, fresh.pk})
+
+    def test_backfill(self):
+        submissions = [
+            Submission.objects.create(
+                problem=self.problem, account=self.account, status=SubmissionStatus.ACCEPTED, code=code,
+                language=self.language, time="0.01", memory=1024, time_percent=50, memory_percent=50
+            )
+            for code in [self.code, self.code, "print(1)"]
+        ]
+
+        call_command("backfillsourcecode", chunk_size=2, stdout=StringIO())
+        self.assertEqual(SourceCode.objects.count(), 2)
+        for submission in submissions:
+            moved = Submission.objects.get(pk=submission.pk)
+            self.assertEqual((moved.code, moved.get_code()), ("", submission.code))
+
+class RejudgeTests(TestCase):
+    """
+    Paces a rejudge with the rate limiter and resumes an interrupted one from its state file.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name="python", judge_id=71)
+        cls.account = Account.objects.create(email="user@example.com", username="user", first_name="User", last_name="Name")
+        cls.problem = Problem.objects.create(name="Two Sum", difficulty=1, description="", constraints="")
+        cls.submissions = [
+            Submission.objects.create(
+                problem=cls.problem, account=cls.account, status=SubmissionStatus.REJECTED, code=f"print({index})",
+                language=cls.language, time="0.01", memory=1024, time_percent=50, memory_percent=50
+            )
+            for index in range(5)
+        ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.state_file = os.path.join(directory.name, "rejudge.state.json")
+        self.judged = []
+        self.failing = set()
+
+    def judge(self, problem, language, code, limiter):
+        if code in self.failing:
+            raise JudgeError("judge unavailable")
+        self.judged.append(code)
+        return {
+            "status": SubmissionStatus.ACCEPTED, "time": "0.02", "memory": 2048, "time_percent": 90, "memory_percent": 90,
+            "error_string": "", "reject_details": {}
+        }
+
+    def rejudge(self, **options):
+        with mock.patch("problems.rejudge.judge_with_retries", side_effect=self.judge):
+            call_command("rejudge", chunk_size=2, state_file=self.state_file, stdout=StringIO(), **options)
+
+    def test_rate_limiter(self):
+        clock = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        with mock.patch("problems.rejudge.time.monotonic", side_effect=lambda: clock[0]), mock.patch("problems.rejudge.time.sleep", side_effect=sleep):
+            limiter = RateLimiter(10)
+            # a full bucket lets a second of executions through
+            limiter.acquire(10)
+            self.assertEqual(sleeps, [])
+
+            limiter.acquire(5)
+            self.assertAlmostEqual(sum(sleeps), 0.5)
+
+            # a batch larger than the bucket waits for a full one and goes into debt
+            limiter.acquire(25)
+            self.assertAlmostEqual(sum(sleeps), 1.5)
+            limiter.acquire(1)
+            self.assertAlmostEqual(sum(sleeps), 3.1)
+
+            sleeps.clear()
+            RateLimiter(0).acquire(1000)
+            self.assertEqual(sleeps, [])
+
+    def test_judge_failures_are_retried(self):
+        limiter = RateLimiter(0)
+        with override_settings(JUDGE_MAX_ATTEMPTS=3), mock.patch("problems.rejudge.time.sleep"):
+            with mock.patch("problems.rejudge.judge_code", side_effect=[JudgeError("busy"), {"status": SubmissionStatus.ACCEPTED}]) as judge:
+                self.assertEqual(judge_with_retries(self.problem, self.language, "", limiter), {"status": SubmissionStatus.ACCEPTED})
+                self.assertEqual(judge.call_count, 2)
+
+            with mock.patch("problems.rejudge.judge_code", side_effect=JudgeError("down")) as judge:
+                with self.assertRaises(JudgeError):
+                    judge_with_retries(self.problem, self.language, "", limiter)
+                self.assertEqual(judge.call_count, 3)
+
+    def test_rejudge(self):
+        self.rejudge()
+
+        self.assertEqual(sorted(self.judged), sorted(submission.code for submission in self.submissions))
+        self.assertEqual(Submission.objects.filter(status=SubmissionStatus.ACCEPTED).count(), 5)
+        self.assertEqual(Problem.objects.get(pk=self.problem.pk).accepted_submissions_count, 5)
+        self.assertTrue(AccountSolvedProblems.objects.filter(account=self.account, problem=self.problem).exists())
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def test_interrupted_rejudge_resumes(self):
+        # the second chunk fails, the first one is written and checkpointed
+        self.failing.add(self.submissions[2].code)
+        with self.assertRaises(CommandError):
+            self.rejudge()
+
+        with open(self.state_file) as file:
+            state = json.load(file)
+        self.assertEqual((state["last_id"], state["rejudged"], state["changed"]), (self.submissions[1].pk, 2, 2))
+        self.assertEqual(Submission.objects.filter(status=SubmissionStatus.ACCEPTED).count(), 2)
+
+        # progress of other filters is not resumed
+        with self.assertRaises(CommandError):
+            self.rejudge(status=["rejected"])
+
+        self.failing.clear()
+        self.judged.clear()
+        self.rejudge()
+        self.assertEqual(sorted(self.judged), sorted(submission.code for submission in self.submissions[2:]))
+        self.assertEqual(Submission.objects.filter(status=SubmissionStatus.ACCEPTED).count(), 5)
+        self.assertFalse(os.path.exists(self.state_file))
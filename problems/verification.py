@@ -0,0 +1,161 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Problem, ProblemBaseline, SubmissionStatus
+from .rejudge import RateLimiter, judge_with_retries
+
+# reference implementations judged in parallel
+CONCURRENCY = 16
+
+class VerificationError(Exception):
+    """
+    Raised when a problem is published while its reference implementations do not
+    pass its test cases, the problem stays unpublished in that case.
+    """
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} verification error{'' if len(errors) == 1 else 's'}")
+
+def load_problems(problem_ids):
+    """
+    Returns the problems with their test cases and reference implementations
+    prefetched, so they are judged from worker threads without queries.
+    """
+    return list(
+        Problem.objects.filter(pk__in=problem_ids)
+        .defer("search_vector")
+        .prefetch_related("testcases__inputs", "solutions__implementations__language")
+        .order_by("pk")
+    )
+
+def get_implementations(problem):
+    return [implementation for solution in problem.solutions.all() for implementation in solution.implementations.all()]
+
+def verify_problems(problems, executor, limiter):
+    """
+    Judge every reference implementation of the problems against all of their test
+    cases, in parallel on ``executor``, and record the baseline of each language.
+
+    Args:
+        problems (List[Problem]): problems loaded by ``load_problems``
+        executor (ThreadPoolExecutor): runs the judge calls
+        limiter (RateLimiter): caps the test case runs per second
+
+    Returns:
+        dict: the errors of each problem (empty when it passed) by primary key
+
+    Raises:
+        JudgeError: the judge kept failing, nothing is recorded for the problems
+    """
+    # problems without test cases have nothing to be judged against
+    tasks = [
+        (problem, implementation)
+        for problem in problems if problem.testcases.all()
+        for implementation in get_implementations(problem)
+    ]
+    verdicts = executor.map(lambda task: judge_with_retries(task[0], task[1].language, task[1].value or "", limiter), tasks)
+
+    results = defaultdict(list)
+    for (problem, implementation), fields in zip(tasks, verdicts):
+        results[problem.pk].append((implementation, fields))
+
+    return {problem.pk: record_baselines(problem, results[problem.pk]) for problem in problems}
+
+def record_baselines(problem, results):
+    """
+    Store the baseline of every language of the problem: whether all of its
+    implementations passed and the average runtime and memory per test case of
+    the slowest one, a reference for time and memory limits.
+
+    Returns:
+        List[str]: what is wrong with the problem
+    """
+    errors = []
+    if not problem.testcases.all():
+        errors.append(f"{problem.name} has no test cases")
+    elif not results:
+        errors.append(f"{problem.name} has no reference implementations")
+
+    by_language = defaultdict(list)
+    for implementation, fields in results:
+        by_language[implementation.language].append((implementation, fields))
+
+    now = timezone.now()
+    baselines = []
+    for language, entries in by_language.items():
+        failures = []
+        accepted = []
+        for implementation, fields in entries:
+            if fields["status"] == SubmissionStatus.ACCEPTED:
+                accepted.append(fields)
+                continue
+
+            status = SubmissionStatus(fields["status"]).label
+            failures.append({
+                "implementation": str(implementation.public_id),
+                "status": status,
+                "error": fields["error_string"],
+                "details": fields["reject_details"]
+            })
+            errors.append(f"{problem.name}: {language.name} implementation {implementation.public_id} failed ({status})")
+
+        baselines.append(ProblemBaseline(
+            problem = problem,
+            language = language,
+            passed = not failures,
+            implementations_count = len(entries),
+            time = max((float(fields["time"]) for fields in accepted), default=None),
+            memory = max((fields["memory"] for fields in accepted), default=None),
+            errors = failures,
+            verified_at = now
+        ))
+
+    with transaction.atomic():
+        ProblemBaseline.objects.bulk_create(
+            baselines,
+            update_conflicts=True,
+            unique_fields=["problem", "language"],
+            update_fields=["passed", "implementations_count", "time", "memory", "errors", "verified_at"]
+        )
+        # languages whose implementations were removed
+        ProblemBaseline.objects.filter(problem=problem).exclude(language__in=[baseline.language for baseline in baselines]).delete()
+
+    return errors
+
+def get_publish_errors(problem):
+    """
+    Returns why ``problem`` may not be published: it was never verified or one of
+    its languages failed the last verification.
+    """
+    baselines = list(ProblemBaseline.objects.filter(problem_id=problem.pk).select_related("language")) if problem.pk else []
+    if not baselines:
+        return [f"{problem.name} has not passed a verification"]
+
+    return [
+        f"{problem.name}: {baseline.language.name} implementations failed the last verification"
+        for baseline in baselines if not baseline.passed
+    ]
+
+def publish_problem(problem):
+    """
+    Verify the reference implementations of the problem and publish it, unless
+    one of them fails.
+
+    Raises:
+        VerificationError: the problem did not pass its verification
+        JudgeError: the judge kept failing
+    """
+    problem = load_problems([problem.pk])[0]
+    with ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix="verify") as executor:
+        errors = verify_problems([problem], executor, RateLimiter(0))[problem.pk]
+
+    if errors:
+        raise VerificationError(errors)
+
+    if not problem.published:
+        problem.published = True
+        problem.save(update_fields=["published"])
+    return problem
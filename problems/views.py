@@ -1,29 +1,107 @@
-import time
 import base64
+from uuid import UUID
 from http import HTTPMethod, HTTPStatus
 
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from .models import Submission
-from .models import Problem, Language, SubmissionStatus, TestCase, Tag
-from .serializers import CreateProblemSerializer, ViewProblemSerializer, VoteSerializer, RunSerializer, LanguageSerializer, SubmissionSerializer, RetrieveProblemSerializer, TagSerializer, ListProblemSerializer
-
-from accounts.models import AccountSolvedProblems
+from .models import Submission, JudgeJob, JudgeJobKind, JudgeJobStatus
+from .models import Problem, SubmissionStatus, ProblemVote, VoteType
+from .serializers import CreateProblemSerializer, VoteSerializer, RunSerializer, LanguageSerializer, SubmissionSerializer, RetrieveProblemSerializer, ListProblemSerializer
+from .serializers import SubmissionListSerializer, get_submission_list_queryset
+from .pagination import ProblemPagination, ProblemSearchPagination, SubmissionPagination
+from .search import search_problems
+from .tag_index import TAG_INDEX, VERSION_KEY as TAG_INDEX_VERSION_KEY, filter_by_tags
+from .votes import VOTE_BUFFER
+from .payloads import materialize, payload_response, build_problem_payload, build_solutions_payload, make_etag, not_modified
+from .cache import get_or_build, get_version, get_namespace_version, get_problem_version, get_problem_payload, get_problem_list_version, problem_list_key
+from .cache import get_published_problem, get_tag_list
+from .languages import LANGUAGES
+from .judging import JudgeError, enqueue_job, wait_for_job
+from .verification import VerificationError, publish_problem
 
 from django.conf import settings
 
-from django.db.models import Q
-from django.db import reset_queries, connection
+from django.db import transaction, IntegrityError
+
+def parse_uuid(value):
+    try:
+        return str(UUID(str(value)))
+    except ValueError:
+        return None
+
+def record_vote(problem, vote_type, delta):
+    if vote_type == VoteType.LIKE:
+        VOTE_BUFFER.add(problem.pk, problem.public_id, likes=delta)
+    else:
+        VOTE_BUFFER.add(problem.pk, problem.public_id, dislikes=delta)
+
+def get_job_response(job):
+    """
+    Answer a run or submit with the outcome of its judge job, or with the job id
+    to poll while it is not finished yet.
+    """
+    if job.status == JudgeJobStatus.FAILED:
+        return Response({"message": job.error}, status=HTTPStatus.BAD_REQUEST)
+
+    if job.status != JudgeJobStatus.DONE:
+        return Response({"job_id": job.public_id, "status": job.get_status_display().lower()}, status=HTTPStatus.ACCEPTED)
+
+    if job.kind == JudgeJobKind.RUN:
+        return Response(job.result)
+
+    submission = Submission.objects.select_related("language", "problem", "source").filter(public_id=job.submission_public_id).first()
+    if not submission:
+        return Response({"message": "Invalid job ID"}, status=HTTPStatus.BAD_REQUEST)
+
+    output = SubmissionSerializer(submission).data
 
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from .judge import JudgeManager
+    # add failed test case details in case if the 
+    # submission was rejected
+    if submission.status != SubmissionStatus.ACCEPTED:
+        output['details'] = submission.reject_details
+    return Response(output)
 
-JUDGE_MANAGER = JudgeManager()
+def parse_list_param(value):
+    if not value:
+        return []
+    return [entry.strip() for entry in value.split(",") if entry.strip()]
+
+# nested fields of the problem detail, each one costs extra queries
+PROBLEM_RELATIONS = ["testcases", "defaultCode", "solutions", "tags"]
+
+def parse_fields(request, available, relations):
+    """
+    Returns the fields selected with ``?fields=`` and ``?include=`` (None when
+    neither is given) along with the unknown names among them.
+
+    ``include`` adds relations on top of ``fields``, or on top of every plain
+    field when ``fields`` is not given.
+    """
+    fields = parse_list_param(request.GET.get("fields"))
+    include = parse_list_param(request.GET.get("include"))
+    if not fields and not include:
+        return None, []
+
+    if not fields:
+        fields = [name for name in available if name not in relations]
+    selected = list(dict.fromkeys(fields + include))
+    return selected, [name for name in selected if name not in available]
+
+def parse_language(value):
+    """
+    Returns the public id of the language given by public id or name, None if it is unknown.
+    """
+    language = LANGUAGES.resolve(value)
+    return str(language.public_id) if language else None
+
+def get_payload_variant(fields=None, language_id=None):
+    if fields is None and language_id is None:
+        return None
+    return f"fields={','.join(fields or ['*'])};language={language_id or '*'}"
 
 class ProblemViewSet(ViewSet):
     """
@@ -41,257 +119,267 @@ class ProblemViewSet(ViewSet):
             return Response({"id": problem.public_id, "message": "Problem created successfully"}, status=201)
         return Response(serializer.errors, status=HTTPStatus.BAD_REQUEST)
     
-    # cache response for 24 hours
+    # cache response until the problem changes
     def retrieve(self, request, pk=None):
-        if not pk:
+        public_id = parse_uuid(pk)
+        if not public_id:
             return Response({"message": "Invalid problem ID"}, status=HTTPStatus.BAD_REQUEST)
 
-        problem = Problem.objects.filter(published=True, public_id=pk).first()
-        if not problem:
+        # only the selected relations are queried and serialized
+        fields, invalid = parse_fields(request, RetrieveProblemSerializer.Meta.fields, PROBLEM_RELATIONS)
+        if invalid:
+            return Response({"message": f"Invalid fields: {', '.join(invalid)}"}, status=HTTPStatus.BAD_REQUEST)
+
+        language_id = None
+        if request.GET.get("language"):
+            language_id = parse_language(request.GET.get("language"))
+            if not language_id:
+                return Response({"message": "Invalid language"}, status=HTTPStatus.BAD_REQUEST)
+
+        # answer revalidations from the version alone
+        variant = get_payload_variant(fields, language_id)
+        version = get_problem_version(public_id)
+        etag = make_etag(request, "problem", public_id, version, variant)
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        # serve the pre-encoded payload, the serializers only run when it is rebuilt
+        payload = get_problem_payload(public_id, lambda: build_problem_payload(public_id, fields, language_id), version, variant)
+        if not payload:
             return Response({"message": "Invalid problem ID"}, status=HTTPStatus.BAD_REQUEST)
 
-        serializer = RetrieveProblemSerializer(problem)
-        data = serializer.data
-        data['testcases'] = serializer.get_testcases(problem.public_id)
-        return Response(data)
+        return payload_response(request, payload, etag=etag)
     
-    # cache response for 24 hours
+    # cache response until the problem list changes
     def list(self, request):
 
         filters = request.GET
         difficulty = filters.get("difficulty")
-        search = filters.get("search")
-        tags = filters.get("tags")
-
-        filter_obj = Q()
 
         # process difficulty filters
-        if search:
-            filter_obj &= Q(name__icontains=search)
         if difficulty:
-            filter_obj &= Q(difficulty=difficulty)
-        if tags:
-            if "," in tags:
-                for tag in tags.split(","):
-                    filter_obj |= Q(tags__name__contains=tag)
-            else:
-                filter_obj &=Q(tags__name__contains=tags)
-
-        problems = Problem.objects.filter(published=True).filter(filter_obj).all()
-        serializer = ListProblemSerializer(problems, many=True)
-        return Response(serializer.data)
+            try:
+                difficulty = int(difficulty)
+            except ValueError:
+                return Response({"message": "Invalid difficulty"}, status=HTTPStatus.BAD_REQUEST)
+        else:
+            difficulty = None
+
+        fields, invalid = parse_fields(request, ListProblemSerializer.Meta.fields, ["tags"])
+        if invalid:
+            return Response({"message": f"Invalid fields: {', '.join(invalid)}"}, status=HTTPStatus.BAD_REQUEST)
+
+        # every distinct url (filters, cursor, page size) is materialized separately
+        url = request.build_absolute_uri()
+        version = get_problem_list_version()
+        etag = make_etag(request, "problem_list", url, version)
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        payload = get_or_build(problem_list_key(url, version), lambda: materialize(self.get_list_data(request, difficulty, fields)))
+        return payload_response(request, payload, etag=etag)
+
+    def get_list_data(self, request, difficulty, fields=None):
+        filters = request.GET
+        search = filters.get("search")
+        all_tags = parse_list_param(filters.get("tags"))
+        any_tags = parse_list_param(filters.get("any_tags"))
+        exclude_tags = parse_list_param(filters.get("exclude_tags"))
+        with_facets = filters.get("facets") in ["1", "true"]
+
+        problems = Problem.objects.filter(published=True)
+        bitmap = None
+
+        # resolve tag filters (and difficulty with them) through the bitmap index
+        if all_tags or any_tags or exclude_tags:
+            bitmap = TAG_INDEX.query(all_tags, any_tags, exclude_tags, difficulty)
+            problems = filter_by_tags(problems, bitmap, all_tags, any_tags, exclude_tags, difficulty)
+        elif difficulty is not None:
+            problems = problems.filter(difficulty=difficulty)
+
+        # only load listed columns and fetch all tags of the page in one query
+        problems = problems.only("public_id", "name", "likes", "dislikes", "difficulty")
+        if fields is None or "tags" in fields:
+            problems = problems.prefetch_related("tags")
+
+        # rank by relevance when searching, otherwise keep the catalog order
+        if search:
+            problems = search_problems(problems, search)
+            paginator = ProblemSearchPagination()
+        else:
+            paginator = ProblemPagination()
+        page = paginator.paginate_queryset(problems, request, view=self)
+        serializer = ListProblemSerializer(page, many=True, fields=fields)
+        data = paginator.get_paginated_response(serializer.data).data
+
+        # facet counts cover the whole filtered result, not only this page
+        if with_facets:
+            if search:
+                bitmap = TAG_INDEX.bitmap_of(problems.values_list("pk", flat=True))
+            elif bitmap is None:
+                bitmap = TAG_INDEX.query(difficulty=difficulty)
+            data["facets"] = TAG_INDEX.facets(bitmap)
+
+        return data
     
     @action(detail=False, methods=[HTTPMethod.GET])
     def list_all_tags(self, request):
-        tags = Tag.objects.all()
-        serializer = TagSerializer(tags, many=True)
-        return Response(serializer.data)
+        # tag names come from the tag namespace, the counts from the tag index
+        version = f"{get_namespace_version('tag')}.{get_version(TAG_INDEX_VERSION_KEY)}"
+        etag = make_etag(request, "tag_list", version)
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        payload = get_or_build(f"tag:payload:{version}", lambda: materialize(self.get_tags_data()))
+        return payload_response(request, payload, etag=etag)
+
+    def get_tags_data(self):
+        counts = TAG_INDEX.tag_counts()
+        return [{**tag, "count": counts.get(tag["name"], 0)} for tag in get_tag_list()]
     
-    @action(detail=True, methods=[HTTPMethod.PUT])
+    @action(detail=True, methods=[HTTPMethod.GET])
+    def solutions(self, request, pk=None):
+        public_id = parse_uuid(pk)
+        if not public_id:
+            return Response({"message": "Invalid problem ID"}, status=HTTPStatus.BAD_REQUEST)
+
+        language_id = None
+        if request.GET.get("language"):
+            language_id = parse_language(request.GET.get("language"))
+            if not language_id:
+                return Response({"message": "Invalid language"}, status=HTTPStatus.BAD_REQUEST)
+
+        # the editorial is only loaded when asked for, but changes with the problem
+        variant = f"solutions;language={language_id or '*'}"
+        version = get_problem_version(public_id)
+        etag = make_etag(request, "problem", public_id, version, variant)
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        payload = get_problem_payload(public_id, lambda: build_solutions_payload(public_id, language_id), version, variant)
+        if not payload:
+            return Response({"message": "Invalid problem ID"}, status=HTTPStatus.BAD_REQUEST)
+
+        return payload_response(request, payload, etag=etag)
+
+    @action(detail=True, methods=[HTTPMethod.PUT, HTTPMethod.DELETE])
     def vote(self, request, pk=None):
+        problem = get_published_problem(parse_uuid(pk))
+        if not problem:
+            return Response({"message": "Invalid problem ID"}, status=HTTPStatus.BAD_REQUEST)
+
+        # remove the vote of the user (if any)
+        if request.method == HTTPMethod.DELETE:
+            with transaction.atomic():
+                vote = ProblemVote.objects.select_for_update().filter(problem=problem, account=request.user).first()
+                if vote:
+                    vote.delete()
+                    transaction.on_commit(lambda: record_vote(problem, vote.vote_type, -1))
+            return Response({"message": "Vote removed successfully"})
+
         serializer = VoteSerializer(data=request.data)
         if serializer.is_valid():
             vote_type = serializer.validated_data.get("vote_type")
 
-            problem = Problem.objects.filter(public_id=pk, published=True).first()
-            if not problem:
-                return Response({"message": "Invalid problem ID"}, status=HTTPStatus.BAD_REQUEST)
-            
-            if vote_type not in [0, 1]:
+            if vote_type not in VoteType.values:
                 return Response({"message": "Invalid vote ID"}, status=HTTPStatus.BAD_REQUEST)
-            
-            if vote_type == 0:
-                problem.likes += 1
-            elif vote_type == 1:
-                problem.dislikes += 1
-            problem.save()
+
+            # one vote per user, repeating the same vote is a no-op
+            try:
+                with transaction.atomic():
+                    vote = ProblemVote.objects.select_for_update().filter(problem=problem, account=request.user).first()
+                    if not vote:
+                        ProblemVote.objects.create(problem=problem, account=request.user, vote_type=vote_type)
+                        transaction.on_commit(lambda: record_vote(problem, vote_type, 1))
+                    elif vote.vote_type != vote_type:
+                        previous = vote.vote_type
+                        vote.vote_type = vote_type
+                        vote.save(update_fields=["vote_type"])
+                        transaction.on_commit(lambda: record_vote(problem, previous, -1))
+                        transaction.on_commit(lambda: record_vote(problem, vote_type, 1))
+            except IntegrityError:
+                # a concurrent request of the same user created the vote first
+                pass
 
             return Response({"message": "Vote submitted successfully"})
 
         return Response(serializer.errors, status=HTTPStatus.BAD_REQUEST)
     
-    @action(detail=True, methods=[HTTPMethod.POST])
-    def run(self, request, pk=None):
-        serializer = RunSerializer(data=request.data)
-        if serializer.is_valid():
+    @action(detail=True, methods=[HTTPMethod.POST], permission_classes=[IsAdminUser])
+    def publish(self, request, pk=None):
+        problem = Problem.objects.filter(public_id=parse_uuid(pk)).defer("search_vector").first()
+        if not problem:
+            return Response({"message": "Invalid problem ID"}, status=HTTPStatus.BAD_REQUEST)
 
-            # get language ID and code
-            language_id = serializer.validated_data.get("language_id")
-            code = serializer.validated_data.get("code")
+        # only published once every reference implementation passes the test cases
+        try:
+            publish_problem(problem)
+        except VerificationError as ex:
+            return Response({"message": str(ex), "errors": ex.errors}, status=HTTPStatus.BAD_REQUEST)
+        except JudgeError as ex:
+            return Response({"message": str(ex)}, status=HTTPStatus.SERVICE_UNAVAILABLE)
 
-            # check if language id is valid or not
-            language = Language.objects.filter(public_id=language_id).first()
-            if not language:
-                return Response({"message", "Invalid language ID"}, status=HTTPStatus.BAD_REQUEST)
-            
-            # check if problem id is valid or not
-            problem = Problem.objects.filter(public_id=pk, published=True).first()
-            if not problem:
-                return Response({"message": "Invalid problem ID"}, status=HTTPStatus.BAD_REQUEST)
-            
-            # add stdin and stdout code
-            code = base64.b64decode(code).decode('utf-8')
-            codes = JUDGE_MANAGER.create_boilerplate_code(code, problem, language)
-            
-            # run code
-            count = problem.testcases.filter(is_sample=True).count()
-            status, response = JUDGE_MANAGER.create_batch(codes=codes, language=language.judge_id)
-            if not status:
-                return Response({"message": str(response)}, status=HTTPStatus.BAD_REQUEST)
-            
-            tokens = [entry['token'] for entry in response]
-            while True:
-
-                status, response = JUDGE_MANAGER.get_batch(tokens)
-                if not status:
-                    return Response({"message": str(response)}, status=HTTPStatus.BAD_REQUEST)
-                
-                loop_state = False
-                for entry in response['submissions']:
-                    id = entry['status']['id']
-                    if id == 2 or id == 1:
-                        loop_state = True
-                        break
-
-                if loop_state:
-                    time.sleep(2)
-                    continue
-                else:
-                    for index, _ in enumerate(response['submissions']):
-                        del response['submissions'][index]['token']
-                        response['submissions'][index]['stdout'] = JUDGE_MANAGER.parse_stdout(response['submissions'][index]['stdout'])
-
-                return Response(response)
-                
-        return Response(serializer.errors, status=HTTPStatus.BAD_REQUEST)
+        return Response({"message": "Problem published successfully"})
+
+    @action(detail=True, methods=[HTTPMethod.POST])
+    def run(self, request, pk=None):
+        return self.enqueue(request, pk, JudgeJobKind.RUN)
     
     @action(detail=True, methods=[HTTPMethod.GET])
     def submissions(self, request, pk=None):
 
         # check if problem id is valid or not
-        problem = Problem.objects.filter(public_id=pk, published=True).first()
+        problem = get_published_problem(parse_uuid(pk))
         if not problem:
             return Response({"message": "Invalid problem ID"}, status=HTTPStatus.BAD_REQUEST)
         
-        submissions = Submission.objects.filter(problem=problem).order_by('-date').all()
-        serializer = SubmissionSerializer(submissions, many=True)
-        return Response(serializer.data, status=200)
+        # every submission of the problem, newest first
+        submissions = get_submission_list_queryset(Submission.objects.filter(problem=problem))
+        paginator = SubmissionPagination()
+        page = paginator.paginate_queryset(submissions, request, view=self)
+        serializer = SubmissionListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=[HTTPMethod.POST])
     def submit(self, request, pk=None):
+        return self.enqueue(request, pk, JudgeJobKind.SUBMIT)
+
+    @action(detail=False, methods=[HTTPMethod.GET], url_path=r"jobs/(?P<job_id>[^/.]+)")
+    def job(self, request, job_id=None):
+        job = JudgeJob.objects.filter(public_id=parse_uuid(job_id), account=request.user).first()
+        if not job:
+            return Response({"message": "Invalid job ID"}, status=HTTPStatus.BAD_REQUEST)
+        return get_job_response(job)
+
+    def enqueue(self, request, pk, kind):
         serializer = RunSerializer(data=request.data)
         if serializer.is_valid():
-            
+
             # get language ID and code
             language_id = serializer.validated_data.get("language_id")
             code = serializer.validated_data.get("code")
 
             # check if language id is valid or not
-            language = Language.objects.filter(public_id=language_id).first()
+            language = LANGUAGES.get(language_id)
             if not language:
-                return Response({"message", "Invalid language ID"}, status=HTTPStatus.BAD_REQUEST)
+                return Response({"message": "Invalid language ID"}, status=HTTPStatus.BAD_REQUEST)
             
             # check if problem id is valid or not
-            problem = Problem.objects.filter(public_id=pk, published=True).first()
+            problem = get_published_problem(parse_uuid(pk))
             if not problem:
                 return Response({"message": "Invalid problem ID"}, status=HTTPStatus.BAD_REQUEST)
             
-            # add stdin and stdout code
+            # queue the code for the judge workers and wait a while for the result,
+            # the client polls the job once that is not enough
             code = base64.b64decode(code).decode('utf-8')
-            codes = JUDGE_MANAGER.create_boilerplate_code(code, problem, language, is_sample=False)
-            
-            # run code
-            status, response = JUDGE_MANAGER.create_batch(codes=codes, language=language.judge_id)
-            if not status:
-                return Response({"message": str(response)}, status=HTTPStatus.BAD_REQUEST)
-            
-            tokens = [entry['token'] for entry in response]
-            while True:
-
-                status, response = JUDGE_MANAGER.get_batch(tokens)
-                if not status:
-                    return Response({"message": str(response)}, status=HTTPStatus.BAD_REQUEST)
-                
-                loop_state = False
-                for entry in response['submissions']:
-                    id = entry['status']['id']
-                    if id == 2 or id == 1:
-                        loop_state = True
-                        break
-
-                if loop_state:
-                    import time
-                    time.sleep(2)
-                    continue
-            
-                status = True
-                total_time = 0
-                total_memory = 0
-                count = len(codes)
-                error_string = ""
-
-                # check for errors in code and parse stdout
-                for index, entry in enumerate(response['submissions']):
-                    if entry['stderr']:
-                        error_string = entry['stderr']
-                        status = None
-                        break
-                    elif entry['compile_output']:
-                        error_string = entry['compile_output']
-                        status = None
-                        break
-
-                    total_time += float(entry['time'])
-                    total_memory += entry['memory']
-
-                    response['submissions'][index]['stdout'] = JUDGE_MANAGER.parse_stdout(entry['stdout'])
-
-                # check if answers are right or not
-                if status != None:
-                    testcases = TestCase.objects.filter(problem=problem).all()
-                    status, failed_testcase_details = JUDGE_MANAGER.get_submission_status(testcases, response['submissions'])
-
-                avg_time = float(total_time / count)
-                avg_memory = float(total_memory / count)
-
-                # create submission
-                submission = Submission.objects.create(
-                    problem = problem,
-                    account = request.user,
-                    language = language,
-                    status = SubmissionStatus.ACCEPTED if status == True else SubmissionStatus.REJECTED if status == False else SubmissionStatus.RUNTIME_ERROR,
-                    code = code,
-                    time = str(avg_time),
-                    memory = avg_memory,
-                    time_percent = 93.5,
-                    memory_percent = 98.3,
-                    error_string = error_string,
-                    reject_details = {} if status else failed_testcase_details
-                )
-
-                # if the solution is accepted, update the solved problems for the user
-                if status:
-
-                    # check if the same problem for the same account does not exist already
-                    existing_solved = AccountSolvedProblems.objects.filter(account=request.user, problem=problem).first()
-
-                    if not existing_solved:
-                        AccountSolvedProblems.objects.create(
-                            account = request.user,
-                            problem = problem
-                        )
-
-                serializer = SubmissionSerializer(submission)
-                output = serializer.data
-
-                # add failed test case details in case if the 
-                # submission was rejected
-                if not status:
-                    output['details'] = failed_testcase_details
-
-                return Response(output)
-
-        return Response(serializer.errors, status=400)
+            job = enqueue_job(kind, problem, language, code, account=request.user)
+            return get_job_response(wait_for_job(job, settings.JUDGE_WAIT_TIMEOUT))
+
+        return Response(serializer.errors, status=HTTPStatus.BAD_REQUEST)
 
     
 class LanguageViewSet(ViewSet):
@@ -300,6 +388,11 @@ class LanguageViewSet(ViewSet):
     """
 
     def list(self, request):
-        languages = Language.objects.all()
-        serializer = LanguageSerializer(languages, many=True)
-        return Response(serializer.data)
+        version = get_namespace_version("language")
+        etag = make_etag(request, "language_list", version)
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        payload = get_or_build(f"language:payload:{version}", lambda: materialize(LanguageSerializer(LANGUAGES.all(), many=True).data))
+        return payload_response(request, payload, etag=etag)
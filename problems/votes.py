@@ -0,0 +1,92 @@
+import time
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.db.models import F
+
+from .models import Problem
+from .cache import bump_version, problem_version_key, LIST_VERSION_KEY
+
+logger = logging.getLogger(__name__)
+
+class VoteBuffer:
+    """
+    Accumulates like/dislike deltas per problem in memory and flushes them as one
+    ``F()`` update per problem every ``interval`` seconds, so bursts of votes on a
+    hot problem neither lock nor rewrite its row once per click.
+
+    Votes themselves are durable in ProblemVote; only the denormalized counters are
+    buffered, and ``reconcilecounters --votes`` rebuilds them if a process dies
+    with pending deltas.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.thread = None
+
+    def add(self, problem_id, public_id, likes=0, dislikes=0):
+        self.add_pending(problem_id, public_id, likes, dislikes)
+        self.start()
+
+    def add_pending(self, problem_id, public_id, likes, dislikes):
+        with self.lock:
+            entry = self.pending.setdefault(problem_id, [public_id, 0, 0])
+            entry[1] += likes
+            entry[2] += dislikes
+
+    def start(self):
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self.run, name="vote-flusher", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered votes")
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """
+        Write every pending delta; deltas of a failed flush are put back.
+
+        Returns:
+            int: number of problems updated
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        if not pending:
+            return 0
+
+        try:
+            with transaction.atomic():
+                for problem_id, (_, likes, dislikes) in sorted(pending.items()):
+                    if likes or dislikes:
+                        Problem.objects.filter(pk=problem_id).update(
+                            likes = F("likes") + likes,
+                            dislikes = F("dislikes") + dislikes
+                        )
+        except Exception:
+            for problem_id, (public_id, likes, dislikes) in pending.items():
+                self.add_pending(problem_id, public_id, likes, dislikes)
+            raise
+
+        for public_id, _, _ in pending.values():
+            bump_version(problem_version_key(public_id))
+        bump_version(LIST_VERSION_KEY)
+        return len(pending)
+
+VOTE_BUFFER = VoteBuffer(getattr(settings, "VOTE_FLUSH_INTERVAL", 5))
+
+atexit.register(VOTE_BUFFER.flush)
@@ -0,0 +1,148 @@
+import time
+import pickle
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.db.models import Count
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import Problem, Submission
+from .cache import cache, get_difficulty_totals, get_problem_payload, get_published_problem, get_tag_list
+from .payloads import build_problem_payload
+from .languages import LANGUAGES
+from .tag_index import TAG_INDEX
+from .search import SEARCH_INDEX, is_postgres
+from .judging import get_harness_fragments
+
+# problems whose payloads are warmed, ranked by submissions over the last RECENT_DAYS
+TOP_PROBLEMS = 50
+RECENT_DAYS = 7
+
+def get_size(value):
+    return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) if value is not None else 0
+
+def get_popular_problems(limit=TOP_PROBLEMS, days=RECENT_DAYS):
+    """
+    Returns up to ``limit`` published problems ranked by their submissions over the
+    last ``days`` days, topped up by all time submissions when fewer had traffic.
+    """
+    since = timezone.now() - timedelta(days=days)
+    recent = Submission.objects.filter(date__gte=since, problem__published=True) \
+        .values("problem") \
+        .annotate(count=Count("pk")) \
+        .order_by("-count")[:limit]
+    problem_ids = [row["problem"] for row in recent]
+
+    if len(problem_ids) < limit:
+        rest = Problem.objects.filter(published=True).exclude(pk__in=problem_ids) \
+            .order_by("-total_submissions_count", "pk") \
+            .values_list("pk", flat=True)[:limit - len(problem_ids)]
+        problem_ids.extend(rest)
+
+    problems = Problem.objects.filter(pk__in=problem_ids).defer("search_vector").prefetch_related("testcases__inputs").in_bulk()
+    return [problems[pk] for pk in problem_ids if pk in problems]
+
+def warm_view(viewset, action, url):
+    """
+    Run a (cached) list action for ``url``, an absolute url as clients request
+    it, so its payload is materialized under the key they will look up.
+    """
+    parts = urlsplit(url)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    request = Request(RequestFactory().get(path, HTTP_HOST=parts.netloc, secure=parts.scheme == "https"))
+
+    view = viewset(action=action, request=request, args=(), kwargs={}, format_kwarg=None)
+    response = getattr(view, action)(request)
+
+    # cached payloads are served pre-encoded, a DRF response is an error (e.g. a bad filter)
+    if isinstance(response, Response):
+        raise ValueError(f"{url} answered {response.status_code}: {response.data}")
+    return len(response.content)
+
+def warm_problem(problem, languages):
+    """
+    Materialize the instance, detail payload and judge harnesses of a problem.
+
+    Returns:
+        int: size of the warmed values in bytes
+    """
+    public_id = str(problem.public_id)
+    size = get_size(get_published_problem(public_id))
+    size += get_size(get_problem_payload(public_id, lambda: build_problem_payload(public_id)))
+    for language in languages:
+        for is_sample in (True, False):
+            size += get_size(get_harness_fragments(problem, language, is_sample))
+    return size
+
+def warm_caches(top=TOP_PROBLEMS, days=RECENT_DAYS, list_urls=(), log=None):
+    """
+    Preload the per-process registries and indexes and the shared payloads the
+    first requests after a deploy would otherwise build: languages, tag index,
+    tag list, problem list pages and the detail payloads and judge harnesses of
+    the ``top`` most popular problems.
+
+    Args:
+        top (int): number of problems to warm
+        days (int): days of submissions the problems are ranked by
+        list_urls (List[str]): absolute urls of problem list pages to warm
+        log (callable): receives a line per warmed step
+
+    Returns:
+        List[tuple]: (step, warmed entries, bytes, seconds) of every step
+    """
+    from .views import ProblemViewSet, LanguageViewSet
+
+    steps = []
+    def step(name, warm):
+        start = time.monotonic()
+        count, size = warm()
+        steps.append((name, count, size, time.monotonic() - start))
+        if log:
+            log(f"Warmed {name}: {count} entr{'y' if count == 1 else 'ies'}, {size / 1024:.1f} KB in {time.monotonic() - start:.2f}s")
+
+    def warm_languages():
+        table = LANGUAGES.load()
+        return len(table.languages), get_size(table.languages)
+
+    def warm_tag_index():
+        TAG_INDEX.ensure_fresh()
+        return len(TAG_INDEX.problem_ids), get_size(dict(TAG_INDEX.tags))
+
+    def warm_search_index():
+        # postgres searches the search_vector column instead
+        if is_postgres():
+            return 0, 0
+        SEARCH_INDEX.ensure_fresh()
+        return len(SEARCH_INDEX.documents), get_size(dict(SEARCH_INDEX.postings))
+
+    def warm_catalog():
+        values = [get_tag_list(), get_difficulty_totals()]
+        size = sum(get_size(value) for value in values)
+        size += warm_view(LanguageViewSet, "list", "http://localhost/")
+        size += warm_view(ProblemViewSet, "list_all_tags", "http://localhost/")
+        return len(values) + 2, size
+
+    def warm_problem_list():
+        return len(list_urls), sum(warm_view(ProblemViewSet, "list", url) for url in list_urls)
+
+    def warm_problems():
+        languages = LANGUAGES.all()
+        problems = get_popular_problems(top, days)
+        return len(problems), sum(warm_problem(problem, languages) for problem in problems)
+
+    step("languages", warm_languages)
+    step("tag index", warm_tag_index)
+    step("search index", warm_search_index)
+    step("tags and catalog totals", warm_catalog)
+    step("problem list pages", warm_problem_list)
+    step("popular problems", warm_problems)
+
+    # process-local L1 of the tiered cache
+    if log and hasattr(cache, "stats"):
+        local = cache.stats()["local"]
+        log(f"Local cache holds {local['entries']}/{local['max_entries']} entries, {local['bytes'] / 1024:.1f} KB")
+
+    return steps